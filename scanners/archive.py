@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import threading
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from src.settings import config
+
+
+def to_json(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return HexBytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, Mapping):
+        return {key: to_json(item) for key, item in value.items()}
+    return value
+
+
+class LogArchive:
+    """
+    Append-only archive of decoded logs saved by scanner handlers.
+
+    Events are stored as gzipped newline-delimited JSON under
+    <root>/<network>/<handler type>/<contract address>/<segment>.jsonl.gz,
+    one segment per SEGMENT_BLOCKS blocks. Ranges replayed by scanners
+    are appended again, read() skips the duplicates.
+    """
+
+    SEGMENT_BLOCKS = 100000
+    HASH_FIELDS = ("blockHash", "transactionHash")
+
+    _lock = threading.Lock()
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    @classmethod
+    def from_config(cls) -> Optional["LogArchive"]:
+        if not config.SCANNER_ARCHIVE_DIR:
+            return None
+        return cls(config.SCANNER_ARCHIVE_DIR)
+
+    def get_dir(self, network_name: str, handler_type: str, address: str) -> str:
+        return os.path.join(self.root, network_name, handler_type, address.lower())
+
+    def append(self, network_name: str, handler_type: str, events: list) -> None:
+        segments = {}
+        for event in events:
+            segment = event["blockNumber"] // self.SEGMENT_BLOCKS * self.SEGMENT_BLOCKS
+            path = os.path.join(
+                self.get_dir(network_name, handler_type, event["address"]),
+                f"{segment:012d}.jsonl.gz",
+            )
+            segments.setdefault(path, []).append(json.dumps(to_json(event)))
+        with self._lock:
+            for path, lines in segments.items():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # every append is a new gzip member of the same file
+                with gzip.open(path, "at") as segment_file:
+                    segment_file.write("\n".join(lines) + "\n")
+
+    def get_addresses(self, network_name: str, handler_type: str) -> list:
+        path = os.path.join(self.root, network_name, handler_type)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.listdir(path))
+
+    def read(
+        self,
+        network_name: str,
+        handler_type: str,
+        address: str,
+        from_block: int = 0,
+        to_block: Optional[int] = None,
+    ) -> Iterator[AttributeDict]:
+        """Yield unique events of a contract in chain order"""
+        path = self.get_dir(network_name, handler_type, address)
+        if not os.path.isdir(path):
+            return
+        first_segment = from_block // self.SEGMENT_BLOCKS * self.SEGMENT_BLOCKS
+        for file_name in sorted(os.listdir(path)):
+            segment = int(file_name.split(".")[0])
+            if segment < first_segment or (to_block is not None and segment > to_block):
+                continue
+            events = {}
+            with gzip.open(os.path.join(path, file_name), "rt") as segment_file:
+                for line in segment_file:
+                    event = json.loads(line)
+                    if event["blockNumber"] < from_block or (
+                        to_block is not None and event["blockNumber"] > to_block
+                    ):
+                        continue
+                    events[(event["transactionHash"], event["logIndex"])] = event
+            for event in sorted(
+                events.values(), key=lambda e: (e["blockNumber"], e["logIndex"])
+            ):
+                yield self.load_event(event)
+
+    def load_event(self, event: dict) -> AttributeDict:
+        for field in self.HASH_FIELDS:
+            if event.get(field):
+                event[field] = HexBytes(event[field])
+        event["args"] = AttributeDict(event["args"])
+        return AttributeDict(event)
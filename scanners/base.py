@@ -1,9 +1,15 @@
 import logging
 import time
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Dict, Optional, Set
 
+from django.db import connection, transaction
+from django.utils import timezone
+
+from scanners.heads import HeadWatcher
+from scanners.users import user_resolver
 from src.accounts.models import AdvUser
+from src.networks.models import ProcessedLog, ScannerCursor
 from src.settings import config
 from src.store.models import Collection
 from src.utilities import RedisClient
@@ -19,6 +25,11 @@ loggers = {}
 
 class HandlerABC(ABC):
     TIMEOUT = None
+    # TokenHistory methods the handler can roll back after a reorg,
+    # handlers without them scan only final blocks
+    REVERTIBLE_METHODS = ()
+    # processed logs inserted by one statement
+    CLAIM_BATCH_SIZE = 1000
 
     def __init__(self, network, scanner, contract=None, standard=None) -> None:
         self.network = network
@@ -34,11 +45,11 @@ class HandlerABC(ABC):
         self.logger = loggers.get(logger_name)
 
     def get_owner(self, owner_address: str) -> Optional[AdvUser]:
-        try:
-            user = AdvUser.objects.get(username__iexact=owner_address)
-        except AdvUser.DoesNotExist:
-            user = AdvUser.objects.create(username=owner_address.lower())
-        return user
+        return user_resolver.get_user(owner_address)
+
+    def get_owners(self, owner_addresses) -> Dict[str, AdvUser]:
+        """Return users by lowercase address, unknown ones are created"""
+        return user_resolver.get_users(owner_addresses)
 
     def get_file_handler(self, name):
         file_handler = logging.FileHandler(f"logs/{name}.log")
@@ -72,6 +83,62 @@ class HandlerABC(ABC):
     def save_event(self) -> None:
         ...
 
+    def get_applied_tx_hashes(self, tx_hashes) -> Set[str]:
+        """
+        Return transactions already applied by other means, e.g. tasks or
+        scans older than the processed logs retention. Logs of them are
+        not claimed. Handlers with such writers override it.
+        """
+        return set()
+
+    def claim_events(self, event_list) -> list:
+        """
+        Mark logs as processed by the handler and return the new ones.
+        Called in the transaction of save_events and the scanner cursor,
+        so replayed block ranges become no-ops. Logs claimed concurrently
+        by another scanner are not returned, as the insert skips them.
+        """
+        events = {}
+        for event in event_list:
+            events.setdefault(
+                (event["transactionHash"].hex(), event["logIndex"]), event
+            )
+        applied = self.get_applied_tx_hashes({tx_hash for tx_hash, _ in events})
+        keys = [key for key in events if key[0] not in applied]
+
+        opts = ProcessedLog._meta
+        table = connection.ops.quote_name(opts.db_table)
+        columns = ", ".join(
+            connection.ops.quote_name(opts.get_field(name).column)
+            for name in ("network", "handler", "tx_hash", "log_index", "created_at")
+        )
+        created_at = timezone.now()
+        claimed = set()
+        with connection.cursor() as cursor:
+            for start in range(0, len(keys), self.CLAIM_BATCH_SIZE):
+                end = start + self.CLAIM_BATCH_SIZE
+                rows = [
+                    (self.network.id, self.TYPE, tx_hash, log_index, created_at)
+                    for tx_hash, log_index in keys[start:end]
+                ]
+                values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+                cursor.execute(
+                    f"INSERT INTO {table} ({columns}) VALUES {values} "
+                    "ON CONFLICT DO NOTHING RETURNING tx_hash, log_index",
+                    [value for row in rows for value in row],
+                )
+                claimed.update(cursor.fetchall())
+        return [events[key] for key in keys if key in claimed]
+
+    @transaction.atomic
+    def save_events(self, event_list) -> None:
+        """
+        Save all events of one block range in a single transaction.
+        Handlers with set-based processing override it.
+        """
+        for event_data in event_list:
+            self.save_event(event_data)
+
 
 class ScannerABC(ABC):
     def __init__(self, network, contract_type=None, contract=None, synced=None):
@@ -80,17 +147,66 @@ class ScannerABC(ABC):
         self.contract = contract
         self.synced = synced
         self.synced_status_changed = False
+        # tx hashes with exchange Trade events in the range being processed
+        self.exchange_tx_hashes = None
+        # head returned by the last get_last_cached_block call
+        self.last_head = None
+
+    @property
+    def head_watcher(self) -> Optional[HeadWatcher]:
+        return HeadWatcher.get(self.network)
 
     def sleep(self, custom_timeout=None) -> None:
+        head_watcher = self.head_watcher
+        if custom_timeout is None and head_watcher and head_watcher.head:
+            # woken up by the next block
+            head_watcher.wait(self.last_head, config.SCANNER_SLEEP)
+            return
         time.sleep(custom_timeout or config.SCANNER_SLEEP)
 
     def save_last_block(self, name, block) -> None:
-        redis_ = RedisClient()
-        redis_.connection.set(name, int(block) + 1)
+        """
+        Save the next block of a scanner in the database, within
+        the transaction of the events of its range if there is one.
+        Redis keeps a copy for lag estimations.
+        """
+        self.save_last_blocks([name], block)
+
+    def save_last_blocks(self, names, block) -> None:
+        """Save the same next block for several scanners at once"""
+        next_block = int(block) + 1
+        names = list(names)
+        updated = set(
+            ScannerCursor.objects.filter(name__in=names).values_list("name", flat=True)
+        )
+        ScannerCursor.objects.filter(name__in=updated).update(block=next_block)
+        ScannerCursor.objects.bulk_create(
+            [
+                ScannerCursor(name=name, block=next_block)
+                for name in names
+                if name not in updated
+            ],
+            ignore_conflicts=True,
+        )
+
+        def save_copy():
+            redis_ = RedisClient()
+            redis_.connection.mset(dict.fromkeys(names, next_block))
+
+        transaction.on_commit(save_copy)
 
     def get_last_block(self, name) -> int:
-        redis_ = RedisClient()
-        last_block_number = redis_.connection.get(name)
+        last_block_number = (
+            ScannerCursor.objects.filter(name=name)
+            .values_list("block", flat=True)
+            .first()
+        )
+        if last_block_number is None:
+            # cursors saved before they were moved to the database
+            redis_ = RedisClient()
+            last_block_number = redis_.connection.get(name)
+            if last_block_number:
+                self.save_last_block(name, int(last_block_number) - 1)
         if not last_block_number:
             # try to get deploy block for Collection
             if self.contract_type and self.contract:
@@ -111,12 +227,17 @@ class ScannerABC(ABC):
         return int(last_block_number)
 
     def get_last_cached_block(self) -> int:
+        head_watcher = self.head_watcher
+        if head_watcher and head_watcher.head:
+            self.last_head = head_watcher.head
+            return self.last_head
         redis_ = RedisClient()
         last_block_number = redis_.connection.get(self.network.name)
         if not last_block_number:
             last_block_number = int(self.get_last_network_block())
             redis_.connection.set(self.network.name, last_block_number, ex=10)
-        return int(last_block_number)
+        self.last_head = int(last_block_number)
+        return self.last_head
 
     def try_change_synced_status(self):
         if self.synced is False:
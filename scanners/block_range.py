@@ -0,0 +1,100 @@
+import logging
+import re
+from typing import Optional
+
+import requests
+
+from src.utilities import RedisClient
+
+
+class BlockRangeController:
+    """
+    Size of eth_getLogs block windows for one (network, contract).
+
+    The range grows while responses are small and fast, shrinks in
+    proportion to log count and latency when they are not, and is cut
+    to the provider suggestion (or halved) on "too many results" and
+    timeout errors. The tuned range is kept in Redis, so restarted
+    scanners continue with it instead of the default.
+    """
+
+    DEFAULT_RANGE = 5000
+    MIN_RANGE = 10
+    MAX_RANGE = 100000
+    # most providers cap eth_getLogs responses at 10000 logs
+    TARGET_LOGS = 5000
+    TARGET_LATENCY = 5
+    GROWTH = 2
+    SUGGESTED_RANGE = re.compile(r"\[(0x[0-9a-fA-F]+),\s*(0x[0-9a-fA-F]+)\]")
+
+    def __init__(self, name: str) -> None:
+        self.key = f"block_range_{name}"
+        self.value = self.load()
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
+
+    def load(self) -> int:
+        value = RedisClient().connection.get(self.key)
+        if not value:
+            return self.DEFAULT_RANGE
+        return self.clamp(int(value))
+
+    def save(self) -> None:
+        RedisClient().connection.set(self.key, self.value)
+
+    def clamp(self, value: int) -> int:
+        return max(self.MIN_RANGE, min(int(value), self.MAX_RANGE))
+
+    def set(self, value: int) -> None:
+        value = self.clamp(value)
+        if value != self.value:
+            logging.info(f"{self.key} changed from {self.value} to {value}")
+            self.value = value
+            self.save()
+
+    def on_success(self, blocks: int, logs_count: int, latency: float) -> None:
+        """Tune range by the result of a request over `blocks` blocks"""
+        logs_count = max(logs_count, 1)
+        if logs_count > self.TARGET_LOGS or latency > self.TARGET_LATENCY:
+            scale = self.TARGET_LOGS / logs_count
+            if latency > 0:
+                scale = min(scale, self.TARGET_LATENCY / latency)
+            self.set(min(self.value, blocks * scale))
+        # grow only after full windows, the head limits the others
+        elif (
+            blocks >= self.value
+            and logs_count * 2 < self.TARGET_LOGS
+            and latency * 2 < self.TARGET_LATENCY
+        ):
+            density_range = blocks * self.TARGET_LOGS / logs_count
+            self.set(min(self.value * self.GROWTH, density_range))
+
+    def on_error(self, error: Exception, blocks: Optional[int] = None) -> bool:
+        """
+        Shrink range if the error is caused by the range size,
+        return whether it was such an error.
+        """
+        blocks = blocks or self.value
+        if isinstance(error, requests.exceptions.Timeout):
+            self.set(min(self.value, blocks) // 2)
+            return True
+        if not self.is_range_error(error):
+            return False
+        suggested = self.SUGGESTED_RANGE.search(str(error.args[0].get("message")))
+        if suggested:
+            start, end = (int(value, 16) for value in suggested.groups())
+            self.set(min(self.value, end - start + 1))
+        else:
+            self.set(min(self.value, blocks) // 2)
+        return True
+
+    @staticmethod
+    def is_range_error(error: Exception) -> bool:
+        args = error.args
+        return bool(
+            args
+            and args[0]
+            and isinstance(args[0], dict)
+            and args[0].get("code") == -32005
+        )
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -53,3 +54,29 @@ class ApprovalData:
     account: str
     operator: str
     is_approved: bool
+
+
+@dataclass
+class Subscription:
+    """
+    Single (handler, contract) pair served by a multiplexed network scanner.
+    """
+
+    handler: object
+    scanner: object
+    event: object
+    address: str
+    topic: str
+    cursor: Optional[int] = None
+
+    @property
+    def block_name(self) -> str:
+        # same key as ScannerAbsolute.block_name to keep stored cursors
+        return (
+            f"{self.handler.TYPE}_{self.handler.network.name}"
+            f"_{self.scanner.contract.address}_{self.scanner.contract_type}"
+        )
+
+    @property
+    def synced(self) -> Optional[bool]:
+        return self.scanner.synced
@@ -10,17 +10,22 @@ from src.store.models import Bid, Ownership, Token, TransactionTracker
 
 class HandlerBuy(HandlerABC):
     TYPE = "buy"
+    REVERTIBLE_METHODS = ("Buy", "AuctionWin")
+
+    def get_applied_tx_hashes(self, tx_hashes):
+        # trades of end_auction_executer, or of ranges scanned before
+        # their processed logs were cleared
+        return set(
+            TokenHistory.objects.filter(tx_hash__in=tx_hashes).values_list(
+                "tx_hash", flat=True
+            )
+        )
 
     @transaction.atomic
     def save_event(self, event_data):
         data = self.scanner.parse_data_buy(event_data)
         self.logger.debug(f"New event: {data}")
 
-        # check if already processed
-        if TokenHistory.objects.filter(tx_hash=data.tx_hash).exists():
-            self.logger.debug(f"History with tx hash {data.tx_hash} exists")
-            return
-
         # 721 contract thinks amount is always zero
         if data.amount == 0:
             data.amount = 1
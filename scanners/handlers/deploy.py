@@ -1,7 +1,6 @@
 from django.db import transaction
 
 from scanners.base import HandlerABC
-from src.activity.models import TokenHistory
 from src.store.models import Collection, Status
 
 
@@ -13,10 +12,6 @@ class HandlerDeploy(HandlerABC):
         data = self.scanner.parse_data_deploy(event_data)
         self.logger.debug(f"New event: {data}")
 
-        if TokenHistory.objects.filter(tx_hash=data.tx_hash).exists():
-            self.logger.debug(f"History with tx hash {data.tx_hash} exists")
-            return
-
         collection = Collection.objects.filter(
             name__iexact=data.collection_name,
             network=self.network,
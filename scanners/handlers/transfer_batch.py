@@ -0,0 +1,341 @@
+from typing import TYPE_CHECKING, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models.functions import Lower
+
+from scanners.data_structures import TransferData
+from src.accounts.models import AdvUser
+from src.activity.models import ActivitySubscription, TokenHistory
+from src.store.models import (
+    Bid,
+    Collection,
+    Ownership,
+    Status,
+    Token,
+    TransactionTracker,
+)
+from src.store.signals import normalize_selling_quantity
+from src.store.utils import deferred_price_refresh, refresh_collection_aggregates
+from src.utilities import RedisClient
+
+if TYPE_CHECKING:
+    from scanners.handlers import HandlerTransferBurn
+
+
+class TransferBatch:
+    """
+    In-memory state of a list of transfer events of one collection.
+
+    Users, tokens, ownerships and history are loaded with a few set-based
+    queries, events are applied in memory with the same rules as
+    HandlerTransferBurn.save_event and the result is written by flush()
+    with bulk operations.
+    """
+
+    def __init__(
+        self,
+        handler: "HandlerTransferBurn",
+        collection: Collection,
+        data_list: List[TransferData],
+    ) -> None:
+        self.handler = handler
+        self.logger = handler.logger
+        self.collection = collection
+        self.empty_address = handler.scanner.EMPTY_ADDRESS.lower()
+
+        tx_hashes = {data.tx_hash for data in data_list}
+        token_ids = {int(data.token_id) for data in data_list}
+        addresses = {data.new_owner for data in data_list} | {
+            data.old_owner for data in data_list
+        }
+        addresses.discard(self.empty_address)
+
+        self.users = handler.get_owners(addresses)
+
+        self.tokens = {}
+        for token in Token.objects.filter(
+            collection=collection, internal_id__in=token_ids
+        ).order_by("id"):
+            self.tokens.setdefault(int(token.internal_id), token)
+
+        # imported mints already saved, as in the handler
+        self.history_token_tx_hashes = {
+            (tx_hash, int(internal_id))
+            for tx_hash, internal_id in TokenHistory.objects.filter(
+                tx_hash__in=tx_hashes
+            ).values_list("tx_hash", "token__internal_id")
+        }
+        # same keys as TokenHistory.objects.get_or_create of the handler
+        self.history_keys = set()
+        for internal_id, *key in TokenHistory.objects.filter(
+            tx_hash__in=tx_hashes,
+            token__collection=collection,
+            price__isnull=True,
+        ).values_list(
+            "token__internal_id",
+            "tx_hash",
+            "method",
+            "new_owner_id",
+            "old_owner_id",
+            "amount",
+        ):
+            self.history_keys.add((int(internal_id), *key))
+        self.minted_ids = {
+            int(internal_id)
+            for internal_id in TokenHistory.objects.filter(
+                token__collection=collection,
+                token__internal_id__in=token_ids,
+                method="Mint",
+            ).values_list("token__internal_id", flat=True)
+        }
+
+        tokens_by_id = {token.id: token for token in self.tokens.values()}
+        self.ownerships = {}
+        for ownership in Ownership.objects.filter(
+            token__in=tokens_by_id.keys(),
+            owner__in=self.users.values(),
+        ):
+            ownership.token = tokens_by_id[ownership.token_id]
+            self.ownerships[
+                (ownership.owner_id, int(ownership.token.internal_id))
+            ] = ownership
+        self.trackers = {}
+        for ownership_id, tx_hash in TransactionTracker.objects.filter(
+            ownership__in=self.ownerships.values()
+        ).values_list("ownership_id", "tx_hash"):
+            self.trackers.setdefault(ownership_id, set()).add((tx_hash or "").lower())
+
+        self.new_tokens = []
+        self.new_histories = []
+        self.new_ownerships = []
+        self.changed_tokens = {}
+        self.changed_ownerships = {}
+        self.deleted_ownerships = {}
+        self.tracker_tx_hashes = set()
+        self.burned_token_ids = set()
+        self.unlisted_token_ids = set()
+        self.next_mint_id = None
+
+    def get_owner(self, address: str) -> AdvUser:
+        if address not in self.users:
+            self.users[address] = self.handler.get_owner(address)
+        return self.users[address]
+
+    def apply(self, data: TransferData) -> None:
+        collection = self.collection
+        token_id = int(data.token_id)
+        token = self.tokens.get(token_id)
+        if token is None and not collection.is_imported:
+            self.logger.warning("Token not found")
+            return
+
+        if data.old_owner == self.empty_address and collection.is_imported:
+            if (data.tx_hash, token_id) in self.history_token_tx_hashes:
+                self.logger.warning("already imported")
+                return
+            self.logger.debug(f"New mint (imported) event: {data}")
+            self.imported_mint_event(data, self.get_owner(data.new_owner))
+        elif data.old_owner == self.empty_address:
+            self.logger.debug(
+                f"New mint event in TransferHandler, ignoring: {data.tx_hash}"
+            )
+            return
+        elif token is None:
+            self.logger.warning(f"Token not found for {data}, skipping")
+            return
+        elif data.new_owner == self.empty_address:
+            self.logger.debug(f"New burn event: {data}")
+            old_owner = self.get_owner(data.old_owner)
+            self.burn_event(token, data, old_owner)
+            self.ownership_quantity_update(token, old_owner, None, data.amount)
+        else:
+            self.logger.debug(f"New transfer event: {data}")
+            new_owner = self.get_owner(data.new_owner)
+            old_owner = self.get_owner(data.old_owner)
+            self.add_history(token, data, "Transfer", new_owner, old_owner)
+            self.delete_trackers(data.tx_hash)
+            self.ownership_quantity_update(token, old_owner, new_owner, data.amount)
+
+    def add_history(
+        self,
+        token: Token,
+        data: TransferData,
+        method: str,
+        new_owner: Optional[AdvUser],
+        old_owner: Optional[AdvUser],
+    ) -> None:
+        # same as TokenHistory.objects.get_or_create
+        token_id = int(token.internal_id)
+        key = (
+            token_id,
+            data.tx_hash,
+            method,
+            new_owner.id if new_owner else None,
+            old_owner.id if old_owner else None,
+            data.amount,
+        )
+        if key in self.history_keys:
+            return
+        self.history_keys.add(key)
+        self.history_token_tx_hashes.add((data.tx_hash, token_id))
+        self.new_histories.append(
+            TokenHistory(
+                token=token,
+                tx_hash=data.tx_hash,
+                method=method,
+                new_owner=new_owner,
+                old_owner=old_owner,
+                price=None,
+                amount=data.amount,
+            )
+        )
+
+    def delete_trackers(self, tx_hash: str) -> None:
+        tx_hash = tx_hash.lower()
+        self.tracker_tx_hashes.add(tx_hash)
+        for tracker_tx_hashes in self.trackers.values():
+            tracker_tx_hashes.discard(tx_hash)
+
+    def burn_event(self, token: Token, data: TransferData, old_owner: AdvUser) -> None:
+        token.total_supply = max(int(token.total_supply) - int(data.amount), 0)
+        if token.total_supply == 0:
+            token.status = Status.BURNED
+            self.burned_token_ids.add(token.id)
+        # new tokens are saved with their current state by flush()
+        if token.id:
+            self.changed_tokens[token.id] = token
+        self.add_history(token, data, "Burn", None, old_owner)
+        self.delete_trackers(data.tx_hash)
+
+    def ownership_quantity_update(
+        self,
+        token: Token,
+        old_owner: Optional[AdvUser],
+        new_owner: Optional[AdvUser],
+        amount: int,
+    ) -> None:
+        token_id = int(token.internal_id)
+        if old_owner is not None:
+            ownership = self.ownerships.get((old_owner.id, token_id))
+            if ownership is None:
+                self.logger.warning(
+                    f"Ownership is not found: owner {old_owner}, token {token}"
+                )
+                return
+            ownership.quantity = max(int(ownership.quantity) - int(amount), 0)
+            self.save_ownership(ownership)
+
+        if new_owner is not None:
+            ownership = self.ownerships.get((new_owner.id, token_id))
+            if ownership is None:
+                ownership = Ownership(owner=new_owner, token=token, quantity=amount)
+                self.ownerships[(new_owner.id, token_id)] = ownership
+            else:
+                ownership.quantity += amount
+            self.save_ownership(ownership)
+
+    def save_ownership(self, ownership: Ownership) -> None:
+        """Apply Ownership post_save signal rules in memory"""
+        has_tracker = bool(self.trackers.get(ownership.id))
+        normalize_selling_quantity(ownership, has_tracker)
+        if ownership.selling_quantity == 0 and self.collection.is_single:
+            self.unlisted_token_ids.add(ownership.token.id)
+
+        if ownership.quantity <= 0:
+            del self.ownerships[(ownership.owner_id, int(ownership.token.internal_id))]
+            if ownership.id:
+                self.deleted_ownerships[ownership.id] = ownership
+                self.changed_ownerships.pop(ownership.id, None)
+            else:
+                self.new_ownerships.remove(ownership)
+        elif ownership.id:
+            self.changed_ownerships[ownership.id] = ownership
+        elif ownership not in self.new_ownerships:
+            self.new_ownerships.append(ownership)
+
+    def imported_mint_event(self, data: TransferData, owner: AdvUser) -> None:
+        token_id = int(data.token_id)
+        if token_id in self.minted_ids:
+            self.logger.warning(f"already minted: {self.collection} #{token_id}")
+            return
+        if self.next_mint_id is None:
+            last_token = self.collection.tokens.order_by("mint_id").last()
+            self.next_mint_id = last_token.mint_id + 1 if last_token else 0
+        token = Token(
+            collection=self.collection,
+            internal_id=token_id,
+            status=Status.IMPORTING,
+            creator=owner,
+            name=f"{self.collection.name}#{token_id}",
+            total_supply=data.amount,
+            mint_id=self.next_mint_id,
+        )
+        self.next_mint_id += 1
+        self.minted_ids.add(token_id)
+        self.tokens[token_id] = token
+        self.new_tokens.append(token)
+
+        ownership = Ownership(owner=owner, token=token, quantity=data.amount)
+        self.ownerships[(owner.id, token_id)] = ownership
+        self.save_ownership(ownership)
+        self.add_history(token, data, "Mint", None, owner)
+
+    def validate_new_tokens(self) -> None:
+        """Same as unique_name_for_network_validator for the whole batch"""
+        names = [token.name for token in self.new_tokens]
+        if len(names) != len(set(names)) or (
+            Token.objects.filter(
+                name__in=names,
+                collection__network_id=self.collection.network_id,
+            ).exists()
+        ):
+            raise ValidationError("Name is occupied")
+
+    def flush(self) -> None:
+        # bulk_update skips signals, new ownerships are never on sale
+        with deferred_price_refresh() as token_ids:
+            self.write()
+            token_ids.update(
+                ownership.token_id for ownership in self.changed_ownerships.values()
+            )
+            # minted, burned and moved tokens change counters of the collection
+            refresh_collection_aggregates([self.collection.id])
+
+    def write(self) -> None:
+        if self.new_tokens:
+            self.validate_new_tokens()
+            Token.objects.bulk_create(self.new_tokens)
+        if self.changed_tokens:
+            Token.objects.bulk_update(
+                self.changed_tokens.values(), ["total_supply", "status"]
+            )
+            if any(
+                token.status == Status.COMMITTED
+                for token in self.changed_tokens.values()
+            ):
+                connection = RedisClient().connection
+                connection.set(f"queue_calculate_rarity{self.collection.id}", 1)
+
+        if self.tracker_tx_hashes:
+            TransactionTracker.objects.annotate(tx_hash_lower=Lower("tx_hash")).filter(
+                tx_hash_lower__in=self.tracker_tx_hashes
+            ).delete()
+
+        bids_token_ids = self.burned_token_ids | self.unlisted_token_ids
+        bids_token_ids.discard(None)
+        if bids_token_ids:
+            Bid.objects.filter(token_id__in=bids_token_ids).delete()
+
+        if self.deleted_ownerships:
+            Ownership.objects.filter(id__in=self.deleted_ownerships.keys()).delete()
+        if self.changed_ownerships:
+            Ownership.objects.bulk_update(
+                self.changed_ownerships.values(),
+                ["quantity", "selling_quantity", "selling", "price", "currency"],
+            )
+        if self.new_ownerships:
+            Ownership.objects.bulk_create(self.new_ownerships)
+
+        if self.new_histories:
+            histories = TokenHistory.objects.bulk_create(self.new_histories)
+            ActivitySubscription.bulk_create_subscriptions(TokenHistory, histories)
@@ -1,6 +1,10 @@
+from collections import OrderedDict
+
 from django.db import transaction
+from django.db.models import Exists
 
 from scanners.base import HandlerABC
+from scanners.handlers.transfer_batch import TransferBatch
 from src.accounts.models import AdvUser
 from src.activity.models import TokenHistory
 from src.games.import_limits import increment_import_requests
@@ -9,46 +13,101 @@ from src.store.models import Collection, Ownership, Status, Token, TransactionTr
 
 class HandlerTransferBurn(HandlerABC):
     TYPE = "transfer"
+    REVERTIBLE_METHODS = ("Mint", "Transfer", "Burn")
+
+    EXCHANGE_TX_CACHE_SIZE = 10000
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.exchange_transactions = OrderedDict()
+
+    def is_exchange_transaction(self, tx_hash: str) -> bool:
+        if self.scanner.exchange_tx_hashes is not None:
+            return tx_hash in self.scanner.exchange_tx_hashes
+
+        # Trade events are unknown, ask the node once per transaction
+        if tx_hash in self.exchange_transactions:
+            self.exchange_transactions.move_to_end(tx_hash)
+            return self.exchange_transactions[tx_hash]
+        increment_import_requests(self.network)
+        network_tx = self.network.web3.eth.get_transaction(tx_hash)
+        is_exchange = bool(
+            network_tx.get("to")
+            and network_tx["to"].lower() == self.network.exchange_address.lower()
+        )
+        self.exchange_transactions[tx_hash] = is_exchange
+        if len(self.exchange_transactions) > self.EXCHANGE_TX_CACHE_SIZE:
+            self.exchange_transactions.popitem(last=False)
+        return is_exchange
+
+    def get_applied_tx_hashes(self, tx_hashes):
+        # processed logs are cleared after a while, replays of older ranges
+        # are still skipped by history, imported mints are checked per token
+        not_imported = Collection.objects.filter(
+            network=self.network,
+            address__iexact=self.contract.address,
+            is_imported=False,
+        )
+        return set(
+            TokenHistory.objects.filter(tx_hash__in=tx_hashes)
+            .filter(Exists(not_imported))
+            .values_list("tx_hash", flat=True)
+        )
+
+    @transaction.atomic
+    def save_events(self, event_list):
+        data_list = [self.scanner.parse_data_transfer(event) for event in event_list]
+        if not data_list:
+            return
+
+        # buy transfers are processed by HandlerBuy
+        exchange_tx_hashes = {
+            tx_hash
+            for tx_hash in {data.tx_hash for data in data_list}
+            if self.is_exchange_transaction(tx_hash)
+        }
+        collection_address = self.contract.address
+        collection = Collection.objects.filter(
+            network=self.network,
+            address__iexact=collection_address,
+        ).first()
+        if not collection:
+            self.logger.warning(
+                f"Collection not found. Network: {self.network}, address: {collection_address}"
+            )
+            return
+
+        batch = TransferBatch(self, collection, data_list)
+        for data in data_list:
+            if data.tx_hash in exchange_tx_hashes:
+                self.logger.debug(
+                    f"New buy event in TransferHandler, ignoring: {data.tx_hash}"
+                )
+                continue
+            batch.apply(data)
+        batch.flush()
 
     @transaction.atomic
     def save_event(self, event_data):
         data = self.scanner.parse_data_transfer(event_data)
         # check if already processed or is mint
-        network_tx = self.network.web3.eth.get_transaction(data.tx_hash)
-        if (
-            network_tx.get("to")
-            and network_tx["to"].lower() == self.network.exchange_address.lower()
-        ):
+        if self.is_exchange_transaction(data.tx_hash):
             self.logger.debug(
                 f"New buy event in TransferHandler, ignoring: {data.tx_hash}"
             )
             return
 
-        increment_import_requests(self.network)
-
         # get collection and token
         collection_address = self.contract.address
         collection = Collection.objects.filter(
             network=self.network,
             address__iexact=collection_address,
         ).first()
-        if (
-            TokenHistory.objects.filter(tx_hash=data.tx_hash).exists()
-            and not collection.is_imported
-        ):
-            self.logger.debug(f"History with tx hash {data.tx_hash} exists")
-            return
         if not collection:
             self.logger.warning(
                 f"Collection not found. Network: {self.network}, address: {collection_address}"
             )
             return
-        if (
-            TokenHistory.objects.filter(tx_hash=data.tx_hash).exists()
-            and not collection.is_imported
-        ):
-            self.logger.debug(f"History with tx hash {data.tx_hash} exists")
-            return
         token_id = data.token_id
         token = self.get_buyable_token(
             token_id=token_id,
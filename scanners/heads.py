@@ -0,0 +1,84 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import websockets
+
+from src.networks.models import Network
+
+
+class HeadWatcher(threading.Thread):
+    """
+    Process-wide newHeads websocket subscription of one network.
+
+    The last head number is kept in memory and every scanner of the
+    network sleeping in wait() is woken up as soon as a new block arrives.
+    While the websocket is disconnected the head is None and scanners
+    fall back to polling the cached block number.
+    """
+
+    RECONNECT_TIMEOUT = 10
+
+    _watchers: Dict[int, "HeadWatcher"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, network: Network) -> None:
+        super().__init__(name=f"heads_{network.name}", daemon=True)
+        self.network = network
+        self.endpoint = network.ws_endpoint
+        self.head = None
+        self.condition = threading.Condition()
+
+    @classmethod
+    def get(cls, network: Network) -> Optional["HeadWatcher"]:
+        """Return running watcher of the network, None for HTTP-only networks"""
+        if not network.ws_endpoint:
+            return None
+        watcher = cls._watchers.get(network.id)
+        if watcher is None:
+            with cls._lock:
+                watcher = cls._watchers.get(network.id)
+                if watcher is None:
+                    watcher = cls(network)
+                    watcher.start()
+                    cls._watchers[network.id] = watcher
+        return watcher
+
+    def set_head(self, head: Optional[int]) -> None:
+        with self.condition:
+            self.head = head
+            self.condition.notify_all()
+
+    def wait(self, known_head: Optional[int], timeout: float) -> None:
+        """Sleep until the head differs from `known_head` or timeout"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.head != known_head, timeout)
+
+    async def listen(self) -> None:
+        async with websockets.connect(self.endpoint) as websocket:
+            await websocket.send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["newHeads"],
+                    }
+                )
+            )
+            async for message in websocket:
+                result = json.loads(message).get("params", {}).get("result")
+                if result and result.get("number"):
+                    self.set_head(int(result["number"], 16))
+
+    def run(self) -> None:
+        while True:
+            try:
+                asyncio.run(self.listen())
+            except Exception as e:
+                logging.warning(f"newHeads subscription of {self.network}: {repr(e)}")
+            self.set_head(None)
+            time.sleep(self.RECONNECT_TIMEOUT)
@@ -0,0 +1,170 @@
+import re
+import threading
+from collections import Counter
+from itertools import count
+from typing import Any, Dict, List, Optional
+
+from eth_abi import encode_abi
+from eth_utils import encode_hex, event_abi_to_log_topic, keccak
+from web3.providers.base import BaseProvider
+
+EMPTY_ADDRESS = "0x0000000000000000000000000000000000000000"
+ARRAY_TYPE = re.compile(r"^(.*)\[(\d*)\]$")
+
+
+def get_default(abi_type: str) -> Any:
+    """Zero value of an ABI type for event arguments left unset"""
+    array = ARRAY_TYPE.match(abi_type)
+    if array:
+        item_type, size = array.groups()
+        return [get_default(item_type)] * int(size or 0)
+    if abi_type == "address":
+        return EMPTY_ADDRESS
+    if abi_type == "bool":
+        return False
+    if abi_type == "string":
+        return ""
+    if abi_type.startswith("bytes"):
+        return b"" if abi_type == "bytes" else b"\0" * int(abi_type[5:])
+    return 0
+
+
+class LocalChain(BaseProvider):
+    """
+    In-process stand-in for a node of one network.
+
+    Logs are added with add_log() as encoded by the contract ABIs,
+    blocks are produced by mine(). The provider answers the requests
+    made by scanners: eth_blockNumber, eth_getLogs and the log filter
+    methods, eth_getBlockByNumber and eth_getTransactionByHash.
+    Served requests are counted by method in `requests`.
+    """
+
+    def __init__(self, chain_id: int = 1) -> None:
+        super().__init__()
+        self.chain_id = chain_id
+        self.head = 0
+        self.logs: List[dict] = []
+        self.transactions: Dict[str, dict] = {}
+        self.filters: Dict[str, dict] = {}
+        self.requests = Counter()
+        self.tx_counter = count(1)
+        self.filter_counter = count(1)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_block_hash(number: int) -> str:
+        return encode_hex(keccak(number.to_bytes(32, "big")))
+
+    def mine(self, blocks: int = 1) -> int:
+        self.head += blocks
+        return self.head
+
+    def add_log(
+        self,
+        event: object,
+        args: Dict[str, Any],
+        tx_to: Optional[str] = None,
+        tx_hash: Optional[str] = None,
+    ) -> str:
+        """
+        Add a log of a contract event to the next block,
+        return transaction hash. Arguments missing in `args` are zero.
+        """
+        abi = event._get_event_abi()
+        values = {
+            argument["name"]: args.get(argument["name"], get_default(argument["type"]))
+            for argument in abi["inputs"]
+        }
+        indexed = [argument for argument in abi["inputs"] if argument["indexed"]]
+        data = [argument for argument in abi["inputs"] if not argument["indexed"]]
+        topics = [encode_hex(event_abi_to_log_topic(abi))] + [
+            encode_hex(encode_abi([argument["type"]], [values[argument["name"]]]))
+            for argument in indexed
+        ]
+        if tx_hash is None:
+            tx_hash = encode_hex(next(self.tx_counter).to_bytes(32, "big"))
+        number = self.head + 1
+        with self.lock:
+            self.logs.append(
+                {
+                    "address": event.address,
+                    "topics": topics,
+                    "data": encode_hex(
+                        encode_abi(
+                            [argument["type"] for argument in data],
+                            [values[argument["name"]] for argument in data],
+                        )
+                    ),
+                    "blockNumber": hex(number),
+                    "blockHash": self.get_block_hash(number),
+                    "transactionHash": tx_hash,
+                    "transactionIndex": "0x0",
+                    "logIndex": hex(len(self.logs)),
+                    "removed": False,
+                }
+            )
+            self.transactions[tx_hash] = {
+                "hash": tx_hash,
+                "to": tx_to or event.address,
+                "blockNumber": hex(number),
+            }
+        return tx_hash
+
+    def get_block_number(self, block: Any) -> int:
+        if block in (None, "latest", "pending"):
+            return self.head
+        if block == "earliest":
+            return 0
+        return block if isinstance(block, int) else int(block, 16)
+
+    def get_logs(self, params: dict) -> List[dict]:
+        from_block = self.get_block_number(params.get("fromBlock", "earliest"))
+        to_block = self.get_block_number(params.get("toBlock"))
+        addresses = params.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        if addresses:
+            addresses = {address.lower() for address in addresses}
+        topics = (params.get("topics") or [None])[0]
+        if isinstance(topics, str):
+            topics = [topics]
+        if topics:
+            topics = {topic.lower() for topic in topics}
+        with self.lock:
+            return [
+                log
+                for log in self.logs
+                if from_block <= int(log["blockNumber"], 16) <= to_block
+                and (not addresses or log["address"].lower() in addresses)
+                and (not topics or log["topics"][0] in topics)
+            ]
+
+    def get_result(self, method: str, params: list) -> Any:
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_getLogs":
+            return self.get_logs(params[0])
+        if method == "eth_newFilter":
+            filter_id = hex(next(self.filter_counter))
+            self.filters[filter_id] = params[0]
+            return filter_id
+        if method == "eth_getFilterLogs":
+            return self.get_logs(self.filters[params[0]])
+        if method == "eth_uninstallFilter":
+            return self.filters.pop(params[0], None) is not None
+        if method == "eth_getBlockByNumber":
+            number = self.get_block_number(params[0])
+            return {"number": hex(number), "hash": self.get_block_hash(number)}
+        if method == "eth_getTransactionByHash":
+            return self.transactions.get(params[0])
+        raise NotImplementedError(f"{method} is not served by the local chain")
+
+    def make_request(self, method: str, params: list) -> dict:
+        self.requests[method] += 1
+        return {"jsonrpc": "2.0", "id": 1, "result": self.get_result(method, params)}
+
+    def isConnected(self) -> bool:
+        return True
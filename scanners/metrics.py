@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from typing import Dict, Optional
+
+from src.networks.metrics import LATENCY_BUCKETS, METRICS_KEY
+from src.utilities import RedisClient
+
+
+class ScannerMetrics:
+    """
+    Lag and throughput counters of the scanners of one thread.
+
+    Counters are kept in memory by scanner name (block name of a handler
+    or a multiplexed subscription) and flushed at most every
+    FLUSH_INTERVAL seconds into the Redis hash of the network,
+    which is rendered for scraping by src.networks.metrics.render_metrics().
+    """
+
+    FLUSH_INTERVAL = 10
+
+    def __init__(self, network_name: str) -> None:
+        self.key = METRICS_KEY.format(network=network_name)
+        self.lock = threading.Lock()
+        self.scanners: Dict[str, dict] = {}
+        self.flushed_at = time.monotonic()
+
+    def get(self, name: str) -> dict:
+        if name not in self.scanners:
+            self.scanners[name] = {
+                "blocks_total": 0,
+                "events_total": 0,
+                "handler_seconds_total": 0.0,
+                "rpc_requests_total": 0,
+                "rpc_errors_total": 0,
+                "rpc_latency_buckets": [0] * len(LATENCY_BUCKETS),
+                "rpc_latency_sum": 0.0,
+                "events_per_second": 0.0,
+                "cursor": None,
+                "head": None,
+                "lag": None,
+                "block_range": None,
+                "updated_at": None,
+            }
+        return self.scanners[name]
+
+    def observe_rpc(self, name: str, latency: float, failed: bool = False) -> None:
+        with self.lock:
+            metrics = self.get(name)
+            metrics["rpc_requests_total"] += 1
+            metrics["rpc_latency_sum"] += latency
+            if failed:
+                metrics["rpc_errors_total"] += 1
+            for i, bucket in enumerate(LATENCY_BUCKETS):
+                if latency <= bucket:
+                    metrics["rpc_latency_buckets"][i] += 1
+
+    def observe_events(self, name: str, events: int, seconds: float) -> None:
+        with self.lock:
+            metrics = self.get(name)
+            metrics["events_total"] += events
+            metrics["handler_seconds_total"] += seconds
+
+    def observe_window(
+        self,
+        name: str,
+        blocks: int,
+        cursor: int,
+        head: Optional[int],
+        block_range: int,
+    ) -> None:
+        """Position of a scanner after it has processed `blocks` blocks"""
+        with self.lock:
+            metrics = self.get(name)
+            metrics["blocks_total"] += blocks
+            metrics["cursor"] = cursor
+            metrics["block_range"] = block_range
+            if head:
+                metrics["head"] = head
+                metrics["lag"] = max(head - cursor, 0)
+
+    def remove(self, name: str) -> None:
+        with self.lock:
+            self.scanners.pop(name, None)
+        RedisClient().connection.hdel(self.key, name)
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        elapsed = now - self.flushed_at
+        if not force and elapsed < self.FLUSH_INTERVAL:
+            return
+        with self.lock:
+            mapping = {}
+            for name, metrics in self.scanners.items():
+                events = metrics["events_total"] - metrics.pop("flushed_events", 0)
+                metrics["events_per_second"] = round(events / max(elapsed, 1), 3)
+                metrics["updated_at"] = int(time.time())
+                mapping[name] = json.dumps(metrics)
+                metrics["flushed_events"] = metrics["events_total"]
+            self.flushed_at = now
+        if mapping:
+            RedisClient().connection.hset(self.key, mapping=mapping)
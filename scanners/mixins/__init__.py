@@ -2,6 +2,7 @@ from scanners.base import ScannerABC
 from scanners.mixins.approval import ApprovalMixin
 from scanners.mixins.buy import BuyMixin
 from scanners.mixins.deploy import DeployMixin
+from scanners.mixins.logs import LogsMixin
 from scanners.mixins.mint import MintMixin
 from scanners.mixins.promotion import PromotionMixin
 from scanners.mixins.transfers import TransferMixin
@@ -15,5 +16,6 @@ class Scanner(
     PromotionMixin,
     MintMixin,
     ApprovalMixin,
+    LogsMixin,
 ):
     EMPTY_ADDRESS = "0x0000000000000000000000000000000000000000"
@@ -2,15 +2,21 @@ from scanners.data_structures import ApprovalData
 
 
 class ApprovalMixin:
-    def get_events_approval(self, last_checked_block, last_network_block):
+    def get_event_approval(self):
         # signature is similar
-        event = self.network.get_erc721main_contract(
+        return self.network.get_erc721main_contract(
             self.contract.address
         ).events.ApprovalForAll
-        return event.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+
+    def get_events_approval(self, last_checked_block, last_network_block):
+        return (
+            self.get_event_approval()
+            .createFilter(
+                fromBlock=last_checked_block,
+                toBlock=last_network_block,
+            )
+            .get_all_entries()
+        )
 
     def parse_data_approval(self, event) -> ApprovalData:
         account = event["args"].get("owner").lower()
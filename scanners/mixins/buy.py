@@ -2,10 +2,13 @@ from scanners.data_structures import BuyData
 
 
 class BuyMixin:
+    def get_event_buy(self):
+        return self.network.get_exchange_contract().events.Trade
+
     def get_events_buy(self, last_checked_block, last_network_block):
         return (
-            self.network.get_exchange_contract()
-            .events.Trade.createFilter(
+            self.get_event_buy()
+            .createFilter(
                 fromBlock=last_checked_block,
                 toBlock=last_network_block,
             )
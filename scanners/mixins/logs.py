@@ -0,0 +1,20 @@
+from eth_utils import encode_hex, event_abi_to_log_topic
+
+
+class LogsMixin:
+    def get_event_topic(self, event) -> str:
+        return encode_hex(event_abi_to_log_topic(event._get_event_abi()))
+
+    def get_logs(self, addresses, topics, last_checked_block, last_network_block):
+        """
+        Fetch raw logs of several contracts and event types with a single
+        eth_getLogs request.
+        """
+        return self.network.web3.eth.get_logs(
+            {
+                "fromBlock": last_checked_block,
+                "toBlock": last_network_block,
+                "address": addresses,
+                "topics": [topics],
+            }
+        )
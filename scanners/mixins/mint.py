@@ -2,8 +2,8 @@ from scanners.data_structures import MintData
 
 
 class MintMixin:
-    def get_events_mint(self, last_checked_block, last_network_block):
-        event = {
+    def get_event_mint(self):
+        return {
             "ERC721": self.network.get_erc721main_contract(
                 self.contract.address
             ).events.Mint,
@@ -11,10 +11,16 @@ class MintMixin:
                 self.contract.address
             ).events.Mint,
         }[self.contract_type]
-        return event.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+
+    def get_events_mint(self, last_checked_block, last_network_block):
+        return (
+            self.get_event_mint()
+            .createFilter(
+                fromBlock=last_checked_block,
+                toBlock=last_network_block,
+            )
+            .get_all_entries()
+        )
 
     def parse_data_mint(self, event) -> MintData:
         # 721 and 1155 contracts have different args of event and 721 returns id+1
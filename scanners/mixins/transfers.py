@@ -2,8 +2,8 @@ from scanners.data_structures import TransferData
 
 
 class TransferMixin:
-    def get_events_transfer(self, last_checked_block, last_network_block):
-        event = {
+    def get_event_transfer(self):
+        return {
             "ERC721": self.network.get_erc721main_contract(
                 self.contract.address
             ).events.Transfer,
@@ -11,10 +11,16 @@ class TransferMixin:
                 self.contract.address
             ).events.TransferSingle,
         }[self.contract_type]
-        return event.createFilter(
-            fromBlock=last_checked_block,
-            toBlock=last_network_block,
-        ).get_all_entries()
+
+    def get_events_transfer(self, last_checked_block, last_network_block):
+        return (
+            self.get_event_transfer()
+            .createFilter(
+                fromBlock=last_checked_block,
+                toBlock=last_network_block,
+            )
+            .get_all_entries()
+        )
 
     def parse_data_transfer(self, event) -> TransferData:
         # 721 and 1155 contracts have different args of event
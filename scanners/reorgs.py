@@ -0,0 +1,202 @@
+import logging
+from typing import Iterable, Optional
+
+from django.db import transaction
+from web3.exceptions import BlockNotFound
+
+from src.accounts.models import AdvUser
+from src.activity.models import TokenHistory
+from src.networks.models import Network, ProcessedLog, ScannedBlock
+from src.store.models import Ownership, Status, Token
+
+# blocks deeper than that are never reorganized in practice
+FINAL_DEPTH = 5
+
+
+def get_confirmation_depth(network: Network, handler) -> int:
+    """Handlers which cannot roll back their changes wait for final blocks"""
+    if handler.REVERTIBLE_METHODS:
+        return network.confirmation_depth
+    return max(network.confirmation_depth, FINAL_DEPTH)
+
+
+class ReorgGuard:
+    """
+    Reorg protection of one scanner which follows the head closer
+    than FINAL_DEPTH blocks (Network.confirmation_depth below it).
+
+    Hashes and transactions of processed non-final blocks are stored
+    as ScannedBlock rows. Before every poll the latest stored hashes
+    are compared with the node, transactions of orphaned blocks are
+    rolled back and the caller moves its cursors to the fork block.
+    """
+
+    KEEP_BLOCKS = 128
+
+    def __init__(self, network: Network, name: str) -> None:
+        self.network = network
+        self.name = name
+
+    @property
+    def enabled(self) -> bool:
+        return self.network.confirmation_depth < FINAL_DEPTH
+
+    def get_block_hash(self, number: int) -> Optional[str]:
+        try:
+            return self.network.web3.eth.get_block(number)["hash"].hex()
+        except BlockNotFound:
+            return None
+
+    def record(self, to_block: int, last_network_block: int, logs: list) -> None:
+        """Store non-final blocks of a processed range ending with `to_block`"""
+        final_block = last_network_block - FINAL_DEPTH
+        blocks = {}
+        for log in logs:
+            if log["blockNumber"] <= final_block:
+                continue
+            block_hash, tx_hashes = blocks.setdefault(
+                log["blockNumber"], (log["blockHash"].hex(), set())
+            )
+            tx_hashes.add(log["transactionHash"].hex())
+        # empty blocks may get transactions after a reorg too
+        if to_block > final_block and to_block not in blocks:
+            block_hash = self.get_block_hash(to_block)
+            if block_hash:
+                blocks[to_block] = (block_hash, set())
+        if not blocks:
+            return
+
+        scanned_blocks = self.get_scanned_blocks()
+        with transaction.atomic():
+            existing = {
+                scanned_block.number: scanned_block
+                for scanned_block in scanned_blocks.filter(number__in=blocks)
+            }
+            new_blocks = []
+            for number, (block_hash, tx_hashes) in blocks.items():
+                scanned_block = existing.get(number)
+                if scanned_block is None:
+                    new_blocks.append(
+                        ScannedBlock(
+                            network=self.network,
+                            scanner=self.name,
+                            number=number,
+                            hash=block_hash,
+                            tx_hashes=sorted(tx_hashes),
+                        )
+                    )
+                    continue
+                scanned_block.hash = block_hash
+                scanned_block.tx_hashes = sorted(
+                    set(scanned_block.tx_hashes) | tx_hashes
+                )
+            ScannedBlock.objects.bulk_create(new_blocks)
+            ScannedBlock.objects.bulk_update(existing.values(), ["hash", "tx_hashes"])
+            scanned_blocks.filter(
+                number__lt=last_network_block - self.KEEP_BLOCKS
+            ).delete()
+
+    def get_scanned_blocks(self):
+        return ScannedBlock.objects.filter(network=self.network, scanner=self.name)
+
+    def find_fork(self) -> Optional[int]:
+        """Return the first orphaned block, None if stored blocks are canonical"""
+        fork = None
+        for number, block_hash in (
+            self.get_scanned_blocks().order_by("-number").values_list("number", "hash")
+        ):
+            if self.get_block_hash(number) == block_hash:
+                break
+            fork = number
+        return fork
+
+    @transaction.atomic
+    def rollback(self, fork: int, handlers: Iterable) -> None:
+        """Roll back history of `handlers` written in orphaned blocks"""
+        orphaned_blocks = self.get_scanned_blocks().filter(number__gte=fork)
+        tx_hashes = set()
+        for scanned_block in orphaned_blocks:
+            tx_hashes.update(scanned_block.tx_hashes)
+        handlers = [handler for handler in handlers if handler.REVERTIBLE_METHODS]
+        methods = {
+            method for handler in handlers for method in handler.REVERTIBLE_METHODS
+        }
+        revert_token_history(self.network, tx_hashes, methods)
+        # logs of the reverted transactions may be included again in other
+        # blocks, logs of other handlers stay applied and claimed
+        ProcessedLog.objects.filter(
+            network=self.network,
+            handler__in={handler.TYPE for handler in handlers},
+            tx_hash__in=tx_hashes,
+        ).delete()
+        orphaned_blocks.delete()
+        logging.warning(
+            f"Reorg in {self.network} from block {fork}, "
+            f"{len(tx_hashes)} transactions of {self.name} rolled back"
+        )
+
+    def check(self, handlers: Iterable) -> Optional[int]:
+        """
+        Roll back history of revertible `handlers` in orphaned blocks,
+        return the block to rescan from.
+        """
+        if not self.enabled:
+            return None
+        fork = self.find_fork()
+        if fork is not None:
+            self.rollback(fork, handlers)
+        return fork
+
+
+def move_ownership(
+    token: Token,
+    old_owner: Optional[AdvUser],
+    new_owner: Optional[AdvUser],
+    amount: int,
+) -> None:
+    if old_owner is not None:
+        ownership = Ownership.objects.filter(owner=old_owner, token=token).first()
+        if ownership:
+            ownership.quantity = max(int(ownership.quantity) - amount, 0)
+            ownership.save()
+    if new_owner is not None:
+        ownership, created = Ownership.objects.get_or_create(
+            owner=new_owner,
+            token=token,
+            defaults={"quantity": amount},
+        )
+        if not created:
+            ownership.quantity += amount
+            ownership.save()
+
+
+def revert_token_history(
+    network: Network, tx_hashes: Iterable[str], methods: Iterable[str]
+) -> None:
+    """Undo ownership and supply changes of history rows, newest first"""
+    histories = (
+        TokenHistory.objects.filter(
+            tx_hash__in=list(tx_hashes),
+            method__in=list(methods),
+            token__collection__network=network,
+        )
+        .select_related("token__collection", "old_owner", "new_owner")
+        .order_by("-id")
+    )
+    for history in histories:
+        token = history.token
+        amount = int(history.amount or 1)
+        if history.method == "Mint":
+            # tokens of imported collections are created by their mint transfer
+            if token.collection.is_imported:
+                token.delete()
+                continue
+        elif history.method == "Burn":
+            token.total_supply = int(token.total_supply) + amount
+            if token.status == Status.BURNED:
+                token.status = Status.COMMITTED
+            token.save()
+            move_ownership(token, None, history.old_owner, amount)
+        else:
+            move_ownership(token, history.new_owner, history.old_owner, amount)
+        history.delete()
@@ -1,9 +1,21 @@
 import logging
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
+import requests
+from django.db import transaction
+
+from scanners.archive import LogArchive
+from scanners.block_range import BlockRangeController
+from scanners.data_structures import Subscription
+from scanners.metrics import ScannerMetrics
+from scanners.reorgs import ReorgGuard, get_confirmation_depth
 from scanners.utils import get_scanner, never_fall
 from src.games.import_limits import (
     get_import_requests_exceeded,
+    get_import_requests_left,
     increment_import_requests,
 )
 from src.networks.models import Network
@@ -33,7 +45,10 @@ class ScannerAbsolute(threading.Thread):
         self.handler = handler(
             self.network, self.scanner, self.contract, standard=self.contract_type
         )
-        self.block_range = 5000
+        self.block_range = BlockRangeController(self.block_name)
+        self.reorg_guard = ReorgGuard(self.network, self.block_name)
+        self.archive = LogArchive.from_config()
+        self.metrics = ScannerMetrics(self.network.name)
 
     def run(self):
         self.start_polling()
@@ -49,6 +64,11 @@ class ScannerAbsolute(threading.Thread):
         name += f"_{self.contract_type}" if self.contract_type else ""
         return name
 
+    @property
+    def follows_head(self) -> bool:
+        """Revertible handlers scan non-final blocks when reorgs are tracked"""
+        return bool(self.handler.REVERTIBLE_METHODS) and self.reorg_guard.enabled
+
     @never_fall
     def start_polling(self) -> None:
         while True:
@@ -58,44 +78,72 @@ class ScannerAbsolute(threading.Thread):
                 self.scanner.sleep()
                 continue
 
+            if self.follows_head:
+                fork = self.reorg_guard.check([self.handler])
+                if fork is not None:
+                    self.scanner.save_last_block(self.block_name, fork - 1)
+
             last_checked_block = self.scanner.get_last_block(self.block_name)
-            last_network_block = self.scanner.get_last_cached_block()
+            head = self.scanner.get_last_cached_block()
 
-            if not last_checked_block or not last_network_block:
+            if not last_checked_block or not head:
                 self.scanner.sleep()
                 continue
 
-            last_network_block -= 5
+            last_network_block = head - get_confirmation_depth(
+                self.network, self.handler
+            )
 
             if last_network_block - last_checked_block < 5:
                 self.scanner.try_change_synced_status()
-                self.scanner.sleep()
-                continue
-            # filter cannot support more than 5000 blocks at one query
-            if last_network_block - last_checked_block > self.block_range:
-                last_network_block = last_checked_block + self.block_range - 1
+                # following the head closely, scan every new block
+                if not self.follows_head or last_network_block < last_checked_block:
+                    self.scanner.sleep()
+                    continue
+            if last_network_block - last_checked_block >= self.block_range.value:
+                last_network_block = last_checked_block + self.block_range.value - 1
+            blocks = last_network_block - last_checked_block + 1
 
+            started_at = time.monotonic()
             try:
                 event_list = getattr(self.scanner, f"get_events_{self.handler.TYPE}")(
                     last_checked_block,
                     last_network_block,
                 )
-            except ValueError as e:
+            except (ValueError, requests.exceptions.Timeout) as e:
                 logging.error(f"Exception: {repr(e)}")
-                args = e.args
-                if (
-                    args
-                    and args[0]
-                    and isinstance(args[0], dict)
-                    and args[0].get("code") == -32005
-                ):
-                    self.block_range = int(self.block_range / 2)
-                    print(f"reduced to {self.block_range}")
+                self.metrics.observe_rpc(
+                    self.block_name, time.monotonic() - started_at, failed=True
+                )
+                self.block_range.on_error(e, blocks)
                 continue
-            self.block_range = 5000
+            latency = time.monotonic() - started_at
+            self.metrics.observe_rpc(self.block_name, latency)
+            self.block_range.on_success(blocks, len(event_list), latency)
+
+            if self.archive and event_list:
+                self.archive.append(self.network.name, self.handler.TYPE, event_list)
 
-            if event_list:
-                list(map(self.handler.save_event, event_list))
+            # events and the cursor after them are committed together
+            started_at = time.monotonic()
+            with transaction.atomic():
+                event_list = self.handler.claim_events(event_list)
+                if event_list:
+                    self.handler.save_events(event_list)
+                if self.follows_head:
+                    self.reorg_guard.record(last_network_block, head, event_list)
+                self.scanner.save_last_block(self.block_name, last_network_block)
+            self.metrics.observe_events(
+                self.block_name, len(event_list), time.monotonic() - started_at
+            )
+            self.metrics.observe_window(
+                self.block_name,
+                blocks,
+                last_network_block,
+                head,
+                self.block_range.value,
+            )
+            self.metrics.flush()
 
             if not self.scanner.synced:
                 increment_import_requests(self.network)
@@ -104,5 +152,473 @@ class ScannerAbsolute(threading.Thread):
                 self.handler.mark_synced()
                 self.scanner.synced_status_changed = False
 
-            self.scanner.save_last_block(self.block_name, last_network_block)
             self.scanner.sleep(self.handler.TIMEOUT)
+
+
+class ScannerMultiplexed(threading.Thread):
+    """
+    ScannerMultiplexed serves every collection subscription of one network
+    with a single thread: logs of all tracked contracts and event types
+    are requested by one eth_getLogs call per block range and routed
+    to the subscribed handlers by contract address and event topic.
+    """
+
+    NAME = "multiplexed"
+    ADDRESS_CHUNK_SIZE = 1000
+
+    def __init__(self, network: Network) -> None:
+        super().__init__(name=f"{self.NAME}_{network.name}")
+        self.network = network
+        self.scanner = get_scanner(self.network)
+        self.exchange_address = self.network.wrap_in_checksum(
+            self.network.exchange_address
+        )
+        self.trade_topic = self.scanner.get_event_topic(self.scanner.get_event_buy())
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+        self.block_ranges: Dict[str, BlockRangeController] = {}
+        self.reorg_guard = ReorgGuard(self.network, f"multiplexed_{network.name}")
+        self.archive = LogArchive.from_config()
+        self.metrics = ScannerMetrics(network.name)
+        # head of the current poll, set only by scanners following it
+        self.last_network_block = None
+
+    def run(self):
+        self.start_polling()
+
+    def subscribe(
+        self,
+        handler: object,
+        contract_type: str,
+        contract: object,
+        synced: bool = None,
+    ) -> Subscription:
+        scanner = get_scanner(self.network, contract_type, contract, synced=synced)
+        event = getattr(scanner, f"get_event_{handler.TYPE}")()
+        subscription = Subscription(
+            handler=handler(self.network, scanner, contract, standard=contract_type),
+            scanner=scanner,
+            event=event,
+            address=contract.address.lower(),
+            topic=scanner.get_event_topic(event),
+        )
+        with self.lock:
+            self.subscriptions.setdefault(subscription.block_name, subscription)
+        return subscription
+
+    def get_block_range(self, subscription: Subscription) -> BlockRangeController:
+        """
+        Block range is kept per contract, its subscriptions share windows.
+        Ranges of the contracts of a window are tuned by the logs of all
+        of them, so merged windows stay within provider limits.
+        """
+        if subscription.address not in self.block_ranges:
+            self.block_ranges[subscription.address] = BlockRangeController(
+                f"{self.network.name}_{subscription.scanner.contract.address}"
+            )
+        return self.block_ranges[subscription.address]
+
+    def unsubscribe(self, block_name: str) -> None:
+        with self.lock:
+            subscription = self.subscriptions.pop(block_name, None)
+        if subscription is not None:
+            self.metrics.remove(block_name)
+
+    def get_active_subscriptions(self) -> List[Subscription]:
+        with self.lock:
+            subscriptions = list(self.subscriptions.values())
+        if get_import_requests_exceeded(self.network):
+            subscriptions = [s for s in subscriptions if s.synced is not False]
+        for subscription in subscriptions:
+            if subscription.cursor is None:
+                subscription.cursor = subscription.scanner.get_last_block(
+                    subscription.block_name
+                )
+        return [s for s in subscriptions if s.cursor]
+
+    def follows_head(self, subscription: Subscription) -> bool:
+        return (
+            bool(subscription.handler.REVERTIBLE_METHODS) and self.reorg_guard.enabled
+        )
+
+    def get_windows(self, head: int) -> List[Tuple[int, int, list]]:
+        """
+        Group subscriptions by their block cursors, so subscriptions
+        which are close to each other share one eth_getLogs call.
+        """
+        windows = []
+        subscriptions = sorted(self.get_active_subscriptions(), key=lambda s: s.cursor)
+        for subscription in subscriptions:
+            last_network_block = head - get_confirmation_depth(
+                self.network, subscription.handler
+            )
+            if last_network_block - subscription.cursor < 5:
+                subscription.scanner.try_change_synced_status()
+                self.mark_synced(subscription)
+                # following the head closely, scan every new block
+                if (
+                    not self.follows_head(subscription)
+                    or last_network_block < subscription.cursor
+                ):
+                    continue
+            to_block = min(
+                subscription.cursor + self.get_block_range(subscription).value - 1,
+                last_network_block,
+            )
+            if windows and subscription.cursor <= windows[-1][1]:
+                # window must fit block ranges of all its contracts
+                from_block, window_to_block, window_subscriptions = windows[-1]
+                window_subscriptions.append(subscription)
+                windows[-1] = (
+                    from_block,
+                    min(window_to_block, to_block),
+                    window_subscriptions,
+                )
+                continue
+            windows.append((subscription.cursor, to_block, [subscription]))
+        return windows
+
+    def get_logs(self, from_block: int, to_block: int, subscriptions: list) -> list:
+        addresses = list({s.scanner.contract.address for s in subscriptions})
+        topics = list({s.topic for s in subscriptions})
+        # exchange Trade events tell buy transfers from the others
+        if any(s.handler.TYPE == "transfer" for s in subscriptions):
+            addresses.insert(0, self.exchange_address)
+            topics.append(self.trade_topic)
+        logs = []
+        for start in range(0, len(addresses), self.ADDRESS_CHUNK_SIZE):
+            end = start + self.ADDRESS_CHUNK_SIZE
+            logs += self.scanner.get_logs(
+                addresses[start:end],
+                topics,
+                from_block,
+                to_block,
+            )
+        return sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+
+    def route(self, to_block: int, logs: list, subscriptions: list) -> set:
+        """
+        Pass decoded logs to subscription handlers, one batch per subscription,
+        and move cursors of subscriptions in the transactions of their events.
+        Return block names of subscriptions whose handler failed,
+        so their cursors are not moved and the window is retried.
+        """
+        failed = set()
+        routes = {}
+        events = {}
+        for subscription in subscriptions:
+            routes.setdefault((subscription.address, subscription.topic), []).append(
+                subscription
+            )
+            events[subscription.block_name] = []
+
+        for log in logs:
+            key = (log["address"].lower(), log["topics"][0].hex().lower())
+            for subscription in routes.get(key, []):
+                # subscription joined the window later than its start
+                if log["blockNumber"] < subscription.cursor:
+                    continue
+                try:
+                    event = subscription.event().processLog(log)
+                except Exception as e:
+                    logging.warning(
+                        f"Cannot decode log {log['transactionHash'].hex()} "
+                        f"for {subscription.block_name}: {repr(e)}"
+                    )
+                    continue
+                events[subscription.block_name].append(event)
+
+        idle = []
+        for subscription in subscriptions:
+            event_list = events[subscription.block_name]
+            if not event_list:
+                idle.append(subscription.block_name)
+                continue
+            if self.archive:
+                self.archive.append(
+                    self.network.name, subscription.handler.TYPE, event_list
+                )
+            started_at = time.monotonic()
+            try:
+                with transaction.atomic():
+                    event_list = subscription.handler.claim_events(event_list)
+                    if event_list:
+                        subscription.handler.save_events(event_list)
+                    subscription.scanner.save_last_block(
+                        subscription.block_name, to_block
+                    )
+                self.metrics.observe_events(
+                    subscription.block_name,
+                    len(event_list),
+                    time.monotonic() - started_at,
+                )
+            except Exception as e:
+                logging.error(f"Handler error for {subscription.block_name}: {repr(e)}")
+                failed.add(subscription.block_name)
+        # one query for cursors of subscriptions without events
+        if idle:
+            self.scanner.save_last_blocks(idle, to_block)
+        return failed
+
+    def fetch_logs(
+        self, from_block: int, to_block: int, subscriptions: list
+    ) -> Optional[list]:
+        """
+        Fetch logs of a window and tune block ranges of its contracts,
+        return None if the request failed.
+        """
+        result = self.request_logs(from_block, to_block, subscriptions)
+        return self.tune_block_ranges(from_block, to_block, subscriptions, *result)
+
+    def request_logs(
+        self, from_block: int, to_block: int, subscriptions: list
+    ) -> Tuple[Optional[list], float, Optional[Exception]]:
+        """
+        Request logs of a window, return them with the latency and the error
+        of the request. Shares no state, so it may run in worker threads.
+        """
+        started_at = time.monotonic()
+        try:
+            logs = self.get_logs(from_block, to_block, subscriptions)
+        except (ValueError, requests.exceptions.Timeout) as e:
+            logging.error(f"Exception: {repr(e)}")
+            return None, time.monotonic() - started_at, e
+        return logs, time.monotonic() - started_at, None
+
+    def tune_block_ranges(
+        self,
+        from_block: int,
+        to_block: int,
+        subscriptions: list,
+        logs: Optional[list],
+        latency: float,
+        error: Optional[Exception],
+    ) -> Optional[list]:
+        """Tune block ranges by the result of a window request, return its logs"""
+        block_ranges = {
+            subscription.address: self.get_block_range(subscription)
+            for subscription in subscriptions
+        }
+        blocks = to_block - from_block + 1
+        self.metrics.observe_rpc(self.name, latency, failed=error is not None)
+        if error is not None:
+            for block_range in block_ranges.values():
+                block_range.on_error(error, blocks)
+            return None
+        # the window is fetched at once, its whole response counts
+        for block_range in block_ranges.values():
+            block_range.on_success(blocks, len(logs), latency)
+        return logs
+
+    def apply_logs(
+        self, from_block: int, to_block: int, subscriptions: list, logs: list
+    ) -> set:
+        """
+        Save window logs with subscription handlers and move their cursors,
+        return block names of subscriptions whose handler failed.
+        """
+        exchange_tx_hashes = {
+            log["transactionHash"].hex()
+            for log in logs
+            if log["address"].lower() == self.exchange_address.lower()
+            and log["topics"][0].hex().lower() == self.trade_topic
+        }
+        for subscription in subscriptions:
+            subscription.scanner.exchange_tx_hashes = exchange_tx_hashes
+
+        # recorded before the events, blocks are never missed by a rollback
+        if self.last_network_block and self.reorg_guard.enabled:
+            self.record_blocks(to_block, subscriptions, logs)
+        failed = self.route(to_block, logs, subscriptions)
+
+        if any(s.synced is False for s in subscriptions):
+            increment_import_requests(self.network)
+
+        for subscription in subscriptions:
+            if subscription.block_name not in failed:
+                subscription.cursor = to_block + 1
+                self.metrics.observe_window(
+                    subscription.block_name,
+                    to_block - from_block + 1,
+                    to_block,
+                    self.scanner.last_head,
+                    self.get_block_range(subscription).value,
+                )
+        return failed
+
+    def record_blocks(self, to_block: int, subscriptions: list, logs: list) -> None:
+        """Store non-final blocks with logs of revertible handlers"""
+        routes = {
+            (subscription.address, subscription.topic)
+            for subscription in subscriptions
+            if self.follows_head(subscription)
+        }
+        if not routes:
+            return
+        self.reorg_guard.record(
+            to_block,
+            self.last_network_block,
+            [
+                log
+                for log in logs
+                if (log["address"].lower(), log["topics"][0].hex().lower()) in routes
+            ],
+        )
+
+    def rollback_reorg(self) -> None:
+        """Roll back orphaned blocks and move cursors of revertible handlers"""
+        with self.lock:
+            subscriptions = [
+                s for s in self.subscriptions.values() if self.follows_head(s)
+            ]
+        fork = self.reorg_guard.check(
+            [subscription.handler for subscription in subscriptions]
+        )
+        if fork is None:
+            return
+        for subscription in subscriptions:
+            cursor = subscription.cursor or subscription.scanner.get_last_block(
+                subscription.block_name
+            )
+            if cursor and cursor > fork:
+                subscription.scanner.save_last_block(subscription.block_name, fork - 1)
+                subscription.cursor = fork
+
+    def scan_window(self, from_block: int, to_block: int, subscriptions: list) -> None:
+        logs = self.fetch_logs(from_block, to_block, subscriptions)
+        if logs is not None:
+            self.apply_logs(from_block, to_block, subscriptions, logs)
+
+    def mark_synced(self, subscription: Subscription) -> None:
+        if subscription.scanner.synced_status_changed:
+            subscription.handler.mark_synced()
+            subscription.scanner.synced_status_changed = False
+
+    @never_fall
+    def start_polling(self) -> None:
+        while True:
+            head = self.scanner.get_last_cached_block()
+            if not head:
+                self.scanner.sleep()
+                continue
+
+            if self.reorg_guard.enabled:
+                self.rollback_reorg()
+            self.last_network_block = head
+
+            for from_block, to_block, subscriptions in self.get_windows(head):
+                self.scan_window(from_block, to_block, subscriptions)
+
+            self.metrics.flush()
+            self.scanner.sleep()
+
+
+class ScannerBackfill(ScannerMultiplexed):
+    """
+    ScannerBackfill imports history of IMPORTING collections of one network.
+
+    The range from subscription cursors to the network head is split
+    into chunks whose logs are fetched concurrently by a worker pool,
+    no more chunks per round than left in the daily_import_requests budget.
+    Chunks are applied in block order and every applied chunk moves
+    the Redis cursor, so an interrupted backfill resumes from the last
+    applied chunk. Subscriptions which reached the head are marked synced
+    and handed off to the live ScannerMultiplexed of the network.
+    """
+
+    NAME = "backfill"
+    WORKERS = 4
+    CHUNKS_PER_WORKER = 2
+
+    def __init__(self, network: Network, live_scanner: ScannerMultiplexed) -> None:
+        super().__init__(network)
+        self.live_scanner = live_scanner
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.WORKERS,
+            thread_name_prefix=f"backfill_{network.name}",
+        )
+
+    def get_chunks(
+        self, subscriptions: list, last_network_block: int, limit: int
+    ) -> List[Tuple[int, int, list]]:
+        """Split blocks from the lowest cursor to the head into chunks"""
+        chunk_size = min(self.get_block_range(s).value for s in subscriptions)
+        from_block = min(s.cursor for s in subscriptions)
+        chunks = []
+        while from_block <= last_network_block and len(chunks) < limit:
+            to_block = min(from_block + chunk_size - 1, last_network_block)
+            chunk_subscriptions = [s for s in subscriptions if s.cursor <= to_block]
+            chunks.append((from_block, to_block, chunk_subscriptions))
+            from_block = to_block + 1
+        return chunks
+
+    def hand_off(self, subscription: Subscription) -> None:
+        subscription.scanner.try_change_synced_status()
+        self.mark_synced(subscription)
+        self.unsubscribe(subscription.block_name)
+        self.live_scanner.subscribe(
+            handler=type(subscription.handler),
+            contract_type=subscription.scanner.contract_type,
+            contract=subscription.scanner.contract,
+            synced=True,
+        )
+        logging.info(f"{subscription.block_name} is synced, handed off")
+
+    def backfill(self, subscriptions: list, last_network_block: int) -> bool:
+        """Run one round of chunks, return whether all of them were applied"""
+        budget = get_import_requests_left(self.network)
+        limit = self.WORKERS * self.CHUNKS_PER_WORKER
+        if budget is not None:
+            limit = min(limit, budget)
+        if not limit:
+            return False
+
+        chunks = []
+        for from_block, to_block, chunk_subscriptions in self.get_chunks(
+            subscriptions, last_network_block, limit
+        ):
+            future = self.executor.submit(
+                self.request_logs, from_block, to_block, chunk_subscriptions
+            )
+            chunks.append((from_block, to_block, chunk_subscriptions, future))
+
+        failed = set()
+        for from_block, to_block, chunk_subscriptions, future in chunks:
+            # block ranges are tuned by this thread only
+            logs = self.tune_block_ranges(
+                from_block, to_block, chunk_subscriptions, *future.result()
+            )
+            # later chunks cannot be applied before this one,
+            # cancelling finished futures has no effect
+            if logs is None:
+                for *_, pending in chunks:
+                    pending.cancel()
+                return False
+            chunk_subscriptions = [
+                s for s in chunk_subscriptions if s.block_name not in failed
+            ]
+            failed |= self.apply_logs(from_block, to_block, chunk_subscriptions, logs)
+        return not failed
+
+    @never_fall
+    def start_polling(self) -> None:
+        while True:
+            last_network_block = self.scanner.get_last_cached_block()
+            if not last_network_block:
+                self.scanner.sleep()
+                continue
+
+            last_network_block -= 5
+
+            subscriptions = []
+            for subscription in self.get_active_subscriptions():
+                if last_network_block - subscription.cursor < 5:
+                    self.hand_off(subscription)
+                else:
+                    subscriptions.append(subscription)
+
+            if not subscriptions or not self.backfill(
+                subscriptions, last_network_block
+            ):
+                self.scanner.sleep()
+            self.metrics.flush()
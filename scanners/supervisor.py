@@ -0,0 +1,238 @@
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from scanners.handlers import HandlerApproval, HandlerMint, HandlerTransferBurn
+from scanners.scanners import ScannerBackfill, ScannerMultiplexed
+from src.networks.models import Network
+from src.store.models import Collection, Status
+from src.store.utils import SCANNER_COLLECTIONS_CHANNEL
+from src.utilities import RedisClient
+
+
+class ScannerSupervisor:
+    """
+    ScannerSupervisor keeps collection subscriptions of the multiplexed
+    and backfill scanners in line with the database.
+
+    Collection saves and deletes are published to the
+    SCANNER_COLLECTIONS_CHANNEL Redis channel (see notify_scanners),
+    the supervisor re-reads such collections and adds or removes their
+    subscriptions. A full reconciliation every RECONCILE_INTERVAL seconds
+    catches changes made with queryset updates, restarts dead scanner
+    threads and stores running subscriptions with their lag
+    in the scanner_status_<network> Redis hash.
+    """
+
+    RECONCILE_INTERVAL = 300
+    STATUS_KEY = "scanner_status_{network}"
+
+    def __init__(self, networks: List[Network]) -> None:
+        self.live_scanners: Dict[int, ScannerMultiplexed] = {}
+        self.backfill_scanners: Dict[int, ScannerBackfill] = {}
+        for network in networks:
+            self.add_network(network)
+        # collection id -> (network id, is_imported, subscription block names)
+        self.collections: Dict[int, tuple] = {}
+        self.reconciled_at = 0
+
+    def add_network(self, network: Network) -> None:
+        live_scanner = ScannerMultiplexed(network=network)
+        self.live_scanners[network.id] = live_scanner
+        self.backfill_scanners[network.id] = ScannerBackfill(
+            network=network,
+            live_scanner=live_scanner,
+        )
+
+    def get_collections(self):
+        return (
+            Collection.objects.scannerable()
+            .exclude(network__network_type="tron")
+            .select_related("network")
+        )
+
+    def subscribe(self, collection: Collection) -> List[str]:
+        """Subscribe collection handlers, return their block names"""
+        live_scanner = self.live_scanners[collection.network_id]
+        contract = collection.get_contract()
+        subscriptions = []
+        # history of importing collections is loaded by the backfill scanner,
+        # which hands them off to the live one at the head
+        if collection.status == Status.IMPORTING:
+            subscriptions.append(
+                self.backfill_scanners[collection.network_id].subscribe(
+                    handler=HandlerTransferBurn,
+                    contract_type=collection.standard,
+                    contract=contract,
+                    synced=False,
+                )
+            )
+        else:
+            subscriptions.append(
+                live_scanner.subscribe(
+                    handler=HandlerTransferBurn,
+                    contract_type=collection.standard,
+                    contract=contract,
+                    synced=True,
+                )
+            )
+        if not collection.is_imported:
+            subscriptions.append(
+                live_scanner.subscribe(
+                    handler=HandlerMint,
+                    contract_type=collection.standard,
+                    contract=contract,
+                )
+            )
+        subscriptions.append(
+            live_scanner.subscribe(
+                handler=HandlerApproval,
+                contract_type=collection.standard,
+                contract=contract,
+            )
+        )
+        return [subscription.block_name for subscription in subscriptions]
+
+    def unsubscribe(self, collection_id: int) -> None:
+        network_id, _, block_names = self.collections.pop(collection_id)
+        for block_name in block_names:
+            # subscription may have been handed off by the backfill scanner
+            self.live_scanners[network_id].unsubscribe(block_name)
+            self.backfill_scanners[network_id].unsubscribe(block_name)
+        logging.info(f"Collection {collection_id} unsubscribed")
+
+    def sync_collection(
+        self, collection_id: int, collection: Optional[Collection] = None
+    ) -> None:
+        if collection is None:
+            collection = self.get_collections().filter(id=collection_id).first()
+        if collection is None or collection.network_id not in self.live_scanners:
+            if collection_id in self.collections:
+                self.unsubscribe(collection_id)
+            return
+        if collection_id in self.collections:
+            network_id, is_imported, _ = self.collections[collection_id]
+            # importing collections are handed off by the backfill scanner
+            if (network_id, is_imported) == (
+                collection.network_id,
+                collection.is_imported,
+            ):
+                return
+            self.unsubscribe(collection_id)
+        self.collections[collection_id] = (
+            collection.network_id,
+            collection.is_imported,
+            self.subscribe(collection),
+        )
+
+    def reconcile(self) -> None:
+        collections = {
+            collection.id: collection for collection in self.get_collections()
+        }
+        for collection_id in set(self.collections) - set(collections):
+            self.unsubscribe(collection_id)
+        for collection_id, collection in collections.items():
+            self.sync_collection(collection_id, collection)
+        self.restart_dead_scanners()
+        self.report()
+        self.reconciled_at = time.monotonic()
+
+    def restart_dead_scanners(self) -> None:
+        """Threads cannot be restarted, new ones take over the subscriptions"""
+        for network_id, live_scanner in list(self.live_scanners.items()):
+            backfill_scanner = self.backfill_scanners[network_id]
+            if not live_scanner.is_alive():
+                logging.error(f"Live scanner of {live_scanner.network} died")
+                new_live_scanner = ScannerMultiplexed(network=live_scanner.network)
+                new_live_scanner.subscriptions = live_scanner.subscriptions
+                new_live_scanner.block_ranges = live_scanner.block_ranges
+                backfill_scanner.live_scanner = new_live_scanner
+                self.live_scanners[network_id] = new_live_scanner
+                new_live_scanner.start()
+            if not backfill_scanner.is_alive():
+                logging.error(f"Backfill scanner of {live_scanner.network} died")
+                new_backfill_scanner = ScannerBackfill(
+                    network=live_scanner.network,
+                    live_scanner=self.live_scanners[network_id],
+                )
+                new_backfill_scanner.subscriptions = backfill_scanner.subscriptions
+                new_backfill_scanner.block_ranges = backfill_scanner.block_ranges
+                self.backfill_scanners[network_id] = new_backfill_scanner
+                new_backfill_scanner.start()
+
+    def get_status(self, network_id: int) -> Dict[str, dict]:
+        """Running subscriptions of a network with their lag in blocks"""
+        live_scanner = self.live_scanners[network_id]
+        last_network_block = live_scanner.scanner.get_last_cached_block()
+        subscriptions = {}
+        for scanner in (live_scanner, self.backfill_scanners[network_id]):
+            with scanner.lock:
+                for subscription in scanner.subscriptions.values():
+                    subscriptions[subscription.block_name] = subscription
+        status = {}
+        for collection_id, collection_subscriptions in self.collections.items():
+            collection_network_id, _, block_names = collection_subscriptions
+            if collection_network_id != network_id:
+                continue
+            for block_name in block_names:
+                subscription = subscriptions.get(block_name)
+                if subscription is None:
+                    continue
+                lag = None
+                if subscription.cursor and last_network_block:
+                    lag = last_network_block - subscription.cursor
+                status[block_name] = {
+                    "collection_id": collection_id,
+                    "synced": subscription.synced,
+                    "cursor": subscription.cursor,
+                    "lag": lag,
+                }
+        return status
+
+    def report(self) -> None:
+        connection = RedisClient().connection
+        for network_id, live_scanner in self.live_scanners.items():
+            key = self.STATUS_KEY.format(network=live_scanner.network.name)
+            status = self.get_status(network_id)
+            pipeline = connection.pipeline()
+            pipeline.delete(key)
+            if status:
+                pipeline.hset(
+                    key,
+                    mapping={
+                        block_name: json.dumps(value)
+                        for block_name, value in status.items()
+                    },
+                )
+            pipeline.execute()
+
+    def start(self) -> None:
+        started_at = time.monotonic()
+        for collection in self.get_collections():
+            self.sync_collection(collection.id, collection)
+        for network_id in self.live_scanners:
+            self.live_scanners[network_id].start()
+            self.backfill_scanners[network_id].start()
+        self.reconciled_at = time.monotonic()
+        logging.info(
+            f"{len(self.collections)} collections subscribed "
+            f"in {self.reconciled_at - started_at:.1f}s"
+        )
+        threading.Thread(target=self.listen, name="scanner_supervisor").start()
+
+    def listen(self) -> None:
+        while True:
+            try:
+                pubsub = RedisClient().connection.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(SCANNER_COLLECTIONS_CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=1)
+                    if message:
+                        self.sync_collection(int(message["data"]))
+                    if time.monotonic() - self.reconciled_at > self.RECONCILE_INTERVAL:
+                        self.reconcile()
+            except Exception as e:
+                logging.error(f"Scanner supervisor error: {repr(e)}")
+                time.sleep(5)
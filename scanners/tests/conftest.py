@@ -0,0 +1,28 @@
+import pytest
+from mixer.backend.django import mixer as _mixer
+
+from scanners.users import user_resolver
+
+
+@pytest.fixture
+def mixer():
+    return _mixer
+
+
+@pytest.fixture(autouse=True)
+def logs_dir(tmp_path, monkeypatch):
+    # scanner handlers write their logs into ./logs
+    (tmp_path / "logs").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture(autouse=True)
+def clear_user_resolver():
+    # cached user ids do not survive test transactions
+    yield
+    user_resolver.clear()
+
+
+@pytest.fixture
+def network(mixer):
+    return mixer.blend("networks.Network", name="ethereum", network_type="ethereum")
@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from src.networks.models import Address
+from src.store.models import Bid, Ownership, Status
+
+EXCHANGE_ADDRESS = "0x" + "e" * 40
+
+
+def get_handler(network, collection):
+    from scanners.handlers import HandlerApproval
+    from scanners.mixins import Scanner
+
+    contract = Address(collection.address)
+    scanner = Scanner(network, collection.standard, contract=contract)
+    return HandlerApproval(network, scanner, contract, standard=collection.standard)
+
+
+def get_event(account, approved):
+    return {
+        "args": {"owner": account, "operator": EXCHANGE_ADDRESS, "approved": approved}
+    }
+
+
+@pytest.mark.django_db
+def test_revoked_approval_removes_tokens_from_sale(mixer, network):
+    network.exchange_address = EXCHANGE_ADDRESS
+    network.save()
+    seller, bidder = mixer.cycle(2).blend("accounts.AdvUser")
+    collection = mixer.blend(
+        "store.Collection",
+        network=network,
+        address="0x" + "1" * 40,
+        standard="ERC721",
+        deleted=False,
+    )
+    tokens = mixer.cycle(50).blend(
+        "store.Token", collection=collection, status=Status.COMMITTED, deleted=False
+    )
+    for token in tokens:
+        Ownership.objects.create(
+            token=token, owner=seller, quantity=1, selling=True, selling_quantity=1
+        )
+        mixer.blend("store.Bid", token=token, user=bidder)
+    other = mixer.blend(
+        "store.Token", collection__network=network, status=Status.COMMITTED
+    )
+    Ownership.objects.create(
+        token=other, owner=seller, quantity=1, selling=True, selling_quantity=1
+    )
+    handler = get_handler(network, collection)
+
+    handler.save_event(get_event(seller.username, approved=True))
+    assert Ownership.objects.filter(owner=seller, selling=True).count() == 51
+
+    with CaptureQueriesContext(connection) as queries:
+        handler.save_event(get_event(seller.username, approved=False))
+
+    assert list(Ownership.objects.filter(owner=seller, selling=True)) == [
+        Ownership.objects.get(token=other)
+    ]
+    assert not Ownership.objects.filter(
+        token__collection=collection, selling_quantity__gt=0
+    ).exists()
+    assert not Bid.objects.filter(token__collection=collection).exists()
+    assert len(queries) < 20
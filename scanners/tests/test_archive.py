@@ -0,0 +1,45 @@
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from scanners.archive import LogArchive
+
+
+def get_event(number, log_index, address="0xAbC"):
+    return AttributeDict(
+        {
+            "address": address,
+            "blockNumber": number,
+            "blockHash": HexBytes(f"{number:064x}"),
+            "transactionHash": HexBytes(f"{number:064x}"),
+            "logIndex": log_index,
+            "event": "Transfer",
+            "args": AttributeDict({"from": "0x01", "to": "0x02", "tokenId": 1}),
+        }
+    )
+
+
+def test_read_returns_unique_events_in_chain_order(tmp_path):
+    archive = LogArchive(str(tmp_path))
+    archive.append("ethereum", "transfer", [get_event(200000, 1), get_event(5, 0)])
+    # replayed window is archived again
+    archive.append("ethereum", "transfer", [get_event(5, 0), get_event(5, 1)])
+
+    events = list(archive.read("ethereum", "transfer", "0xabc"))
+
+    assert [(e.blockNumber, e.logIndex) for e in events] == [
+        (5, 0),
+        (5, 1),
+        (200000, 1),
+    ]
+    assert events[0].transactionHash == HexBytes(f"{5:064x}")
+    assert events[0].args.tokenId == 1
+    assert archive.get_addresses("ethereum", "transfer") == ["0xabc"]
+
+
+def test_read_block_range(tmp_path):
+    archive = LogArchive(str(tmp_path))
+    archive.append("ethereum", "transfer", [get_event(n, 0) for n in range(10)])
+
+    events = archive.read("ethereum", "transfer", "0xabc", from_block=3, to_block=5)
+
+    assert [e.blockNumber for e in events] == [3, 4, 5]
@@ -0,0 +1,255 @@
+"""
+End-to-end scanner benchmarks against an in-process chain stand-in.
+
+Synthetic logs are encoded with the contract ABIs, served by LocalChain
+and go through the real scanner path: eth_getLogs or log filters,
+decoding, routing and handler persistence. Each benchmark prints
+events per second, DB queries and RPC requests per event and fails when
+the query count per event regresses. Run with -s to see the numbers,
+SCANNER_BENCHMARK_EVENTS sets the traffic volume.
+"""
+import os
+import random
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from web3 import Web3
+
+from scanners.local_chain import EMPTY_ADDRESS, LocalChain
+from src.activity.models import TokenHistory
+from src.networks.clients import Web3Registry
+from src.store.models import Ownership, Status
+
+BENCHMARK_EVENTS = int(os.environ.get("SCANNER_BENCHMARK_EVENTS", 200))
+EVENTS_PER_BLOCK = 10
+
+
+def get_address(number):
+    return Web3.toChecksumAddress("0x" + f"{number:040x}")
+
+
+def report(name, chain, events_count, seconds, queries):
+    print(
+        f"\n{name}: {events_count} events in {seconds:.2f}s, "
+        f"{events_count / seconds:.0f} events/s, "
+        f"{len(queries) / events_count:.2f} queries/event, "
+        f"{sum(chain.requests.values())} RPC requests"
+    )
+
+
+@pytest.fixture
+def chain(network):
+    network.exchange_address = get_address(0xE0)
+    network.save()
+    local_chain = LocalChain()
+    Web3Registry.install(network, local_chain)
+    yield local_chain
+    Web3Registry.invalidate(network.id)
+
+
+@pytest.fixture
+def users(mixer):
+    return [
+        mixer.blend("accounts.AdvUser", username=get_address(number + 1).lower())
+        for number in range(10)
+    ]
+
+
+def create_collection(mixer, network, users, tokens_count, status=Status.COMMITTED):
+    collection = mixer.blend(
+        "store.Collection",
+        network=network,
+        address=get_address(0xC0),
+        standard="ERC721",
+        status=Status.COMMITTED,
+        is_imported=False,
+        deleted=False,
+    )
+    for internal_id in range(tokens_count):
+        token = mixer.blend(
+            "store.Token",
+            collection=collection,
+            internal_id=internal_id if status == Status.COMMITTED else None,
+            mint_id=internal_id,
+            total_supply=1,
+            status=status,
+            deleted=False,
+            creator=users[0],
+        )
+        Ownership.objects.create(
+            token=token, owner=users[internal_id % len(users)], quantity=1
+        )
+    return collection
+
+
+def add_logs(chain, logs):
+    """Add (event, args, tx_to) logs, EVENTS_PER_BLOCK per block"""
+    for number, (event, args, tx_to) in enumerate(logs):
+        chain.add_log(event, args, tx_to=tx_to)
+        if number % EVENTS_PER_BLOCK == EVENTS_PER_BLOCK - 1:
+            chain.mine()
+    chain.mine()
+
+
+def scan_multiplexed(network, chain, handler, collection):
+    from scanners.scanners import ScannerMultiplexed
+
+    live_scanner = ScannerMultiplexed(network)
+    subscription = live_scanner.subscribe(
+        handler=handler,
+        contract_type=collection.standard,
+        contract=collection.get_contract(),
+        synced=True,
+    )
+    subscription.cursor = 1
+    chain.requests.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started_at = time.monotonic()
+        live_scanner.scan_window(1, chain.head, [subscription])
+        seconds = time.monotonic() - started_at
+    return seconds, queries
+
+
+@pytest.mark.django_db
+def test_transfer_benchmark(mixer, network, chain, users):
+    from scanners.handlers import HandlerTransferBurn
+
+    tokens_count = max(BENCHMARK_EVENTS // 10, 1)
+    collection = create_collection(mixer, network, users, tokens_count)
+    event = collection.get_contract().events.Transfer
+    rand = random.Random(42)
+    owners = {
+        internal_id: users[internal_id % len(users)].username
+        for internal_id in range(tokens_count)
+    }
+    logs = []
+    while len(logs) < BENCHMARK_EVENTS and owners:
+        internal_id = rand.choice(list(owners))
+        new_owner = rand.choice(users).username
+        if rand.random() < 0.02:
+            new_owner = EMPTY_ADDRESS
+        args = {"from": owners[internal_id], "to": new_owner, "tokenId": internal_id}
+        logs.append((event, args, None))
+        if new_owner == EMPTY_ADDRESS:
+            owners.pop(internal_id)
+        else:
+            owners[internal_id] = new_owner
+    add_logs(chain, logs)
+
+    seconds, queries = scan_multiplexed(network, chain, HandlerTransferBurn, collection)
+
+    report("transfer", chain, len(logs), seconds, queries)
+    history = TokenHistory.objects.filter(token__collection=collection)
+    assert history.count() == len(logs)
+    assert len(queries) < len(logs)
+
+
+@pytest.mark.django_db
+def test_mint_benchmark(mixer, network, chain, users):
+    from scanners.handlers import HandlerMint
+
+    collection = create_collection(
+        mixer, network, users, BENCHMARK_EVENTS, status=Status.PENDING
+    )
+    event = collection.get_contract().events.Mint
+    add_logs(
+        chain,
+        [
+            (
+                event,
+                {"tokenID": mint_id, "mintID": mint_id, "sender": users[0].username},
+                None,
+            )
+            for mint_id in range(BENCHMARK_EVENTS)
+        ],
+    )
+
+    seconds, queries = scan_multiplexed(network, chain, HandlerMint, collection)
+
+    report("mint", chain, BENCHMARK_EVENTS, seconds, queries)
+    assert collection.tokens.filter(status=Status.COMMITTED).count() == BENCHMARK_EVENTS
+    assert len(queries) < BENCHMARK_EVENTS * 15
+
+
+@pytest.mark.django_db
+def test_buy_benchmark(mixer, network, chain, users):
+    from scanners.handlers import HandlerBuy
+    from scanners.utils import get_scanner
+
+    collection = create_collection(mixer, network, users, BENCHMARK_EVENTS)
+    currency = mixer.blend(
+        "rates.UsdRate", network=network, address=get_address(0xC1), decimal=18
+    )
+    event = network.get_exchange_contract().events.Trade
+    add_logs(
+        chain,
+        [
+            (
+                event,
+                {
+                    "fromTo": [
+                        users[internal_id % len(users)].username,
+                        users[(internal_id + 1) % len(users)].username,
+                    ],
+                    "nftAndToken": [collection.address, currency.address],
+                    "idAndAmount": [internal_id, 1],
+                },
+                network.exchange_address,
+            )
+            for internal_id in range(BENCHMARK_EVENTS)
+        ],
+    )
+
+    # the path of ScannerAbsolute: log filter, claim and save
+    scanner = get_scanner(network, synced=True)
+    handler = HandlerBuy(network, scanner)
+    chain.requests.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started_at = time.monotonic()
+        event_list = scanner.get_events_buy(1, chain.head)
+        handler.save_events(handler.claim_events(event_list))
+        seconds = time.monotonic() - started_at
+
+    report("buy", chain, BENCHMARK_EVENTS, seconds, queries)
+    assert TokenHistory.objects.filter(method="Buy").count() == BENCHMARK_EVENTS
+    assert len(queries) < BENCHMARK_EVENTS * 25
+
+
+@pytest.mark.django_db
+def test_approval_benchmark(mixer, network, chain, users):
+    from scanners.handlers import HandlerApproval
+
+    collection = create_collection(mixer, network, users, BENCHMARK_EVENTS)
+    Ownership.objects.filter(token__collection=collection).update(
+        selling=True, selling_quantity=1
+    )
+    event = collection.get_contract().events.ApprovalForAll
+    rand = random.Random(42)
+    logs = [
+        (
+            event,
+            {
+                "owner": rand.choice(users).username,
+                "operator": network.exchange_address,
+                "approved": rand.random() < 0.5,
+            },
+            None,
+        )
+        for _ in range(BENCHMARK_EVENTS)
+    ]
+    add_logs(chain, logs)
+
+    seconds, queries = scan_multiplexed(network, chain, HandlerApproval, collection)
+
+    report("approval", chain, len(logs), seconds, queries)
+    revoked = {args["owner"] for _, args, _ in logs if not args["approved"]}
+    selling = Ownership.objects.filter(token__collection=collection, selling=True)
+    assert not selling.filter(owner__username__in=revoked).exists()
+    assert selling.count() == sum(
+        1
+        for internal_id in range(BENCHMARK_EVENTS)
+        if users[internal_id % len(users)].username not in revoked
+    )
+    assert len(queries) < len(logs) * 10
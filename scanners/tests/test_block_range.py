@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+from web3 import Web3
+
+from scanners.block_range import BlockRangeController
+from src.utilities import RedisClient
+
+
+@pytest.fixture
+def block_range():
+    controller = BlockRangeController("test_network_0xcontract")
+    RedisClient().connection.delete(controller.key)
+    controller.value = controller.DEFAULT_RANGE
+    yield controller
+    RedisClient().connection.delete(controller.key)
+
+
+def test_grows_on_small_fast_responses(block_range):
+    block_range.on_success(block_range.value, 10, 0.1)
+    assert block_range.value == BlockRangeController.DEFAULT_RANGE * 2
+    # partial windows near the head do not grow the range
+    block_range.on_success(100, 0, 0.1)
+    assert block_range.value == BlockRangeController.DEFAULT_RANGE * 2
+
+
+def test_shrinks_by_logs_and_latency(block_range):
+    block_range.on_success(5000, 20000, 1)
+    assert block_range.value == 1250
+    block_range.on_success(1000, 10, 20)
+    assert block_range.value == 250
+    # instant responses are sized by their logs
+    block_range.on_success(250, 10000, 0)
+    assert block_range.value == 125
+
+
+def test_error_uses_suggested_range(block_range):
+    error = ValueError(
+        {
+            "code": -32005,
+            "message": "query returned more than 10000 results. "
+            "Try with this block range [0x10, 0x41].",
+        }
+    )
+    assert block_range.on_error(error, 5000)
+    assert block_range.value == 50
+
+    assert block_range.on_error(requests.exceptions.Timeout(), 50)
+    assert block_range.value == 25
+
+    assert not block_range.on_error(ValueError({"code": -32000}), 25)
+    assert block_range.value == 25
+
+
+def test_range_is_persisted(block_range):
+    block_range.on_success(block_range.value, 0, 0.1)
+    assert BlockRangeController("test_network_0xcontract").value == block_range.value
+
+
+@pytest.mark.django_db
+def test_shared_window_is_sized_by_all_logs(network, monkeypatch):
+    from scanners.scanners import ScannerMultiplexed
+
+    network.exchange_address = Web3.toChecksumAddress("0x" + "e0" * 20)
+    scanner = ScannerMultiplexed(network)
+    addresses = [Web3.toChecksumAddress(f"0x{number:040x}") for number in (1, 2)]
+    subscriptions = [
+        SimpleNamespace(
+            address=address.lower(),
+            scanner=SimpleNamespace(contract=SimpleNamespace(address=address)),
+        )
+        for address in addresses
+    ]
+    block_ranges = [scanner.get_block_range(s) for s in subscriptions]
+    for block_range in block_ranges:
+        RedisClient().connection.delete(block_range.key)
+        block_range.value = BlockRangeController.DEFAULT_RANGE
+    # 6000 logs per contract, 12000 in the response of the window
+    logs = [{"address": address} for address in addresses for _ in range(6000)]
+    monkeypatch.setattr(scanner, "get_logs", lambda *args: logs)
+
+    assert scanner.fetch_logs(1, 5000, subscriptions) == logs
+    assert [block_range.value for block_range in block_ranges] == [2083, 2083]
+    for block_range in block_ranges:
+        RedisClient().connection.delete(block_range.key)
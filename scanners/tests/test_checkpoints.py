@@ -0,0 +1,73 @@
+import pytest
+from hexbytes import HexBytes
+
+from src.networks.models import Address, ProcessedLog, ScannerCursor
+
+
+def get_handler(network):
+    from scanners.handlers import HandlerTransferBurn
+    from scanners.mixins import Scanner
+
+    contract = Address("0x" + "1" * 40)
+    scanner = Scanner(network, "ERC721", contract=contract)
+    return HandlerTransferBurn(network, scanner, contract, standard="ERC721")
+
+
+def get_event(tx_number, log_index):
+    return {"transactionHash": HexBytes(f"{tx_number:064x}"), "logIndex": log_index}
+
+
+@pytest.mark.django_db
+def test_replayed_events_are_skipped(network):
+    handler = get_handler(network)
+    events = [get_event(1, 0), get_event(1, 1), get_event(2, 0)]
+
+    assert handler.claim_events(events) == events
+    assert handler.claim_events(events + [get_event(3, 0)]) == [get_event(3, 0)]
+
+
+@pytest.mark.django_db
+def test_cursor_is_saved_in_database(network):
+    handler = get_handler(network)
+
+    handler.scanner.save_last_blocks(["first", "second"], 100)
+    handler.scanner.save_last_block("first", 110)
+
+    assert handler.scanner.get_last_block("first") == 111
+    assert handler.scanner.get_last_block("second") == 101
+    assert ScannerCursor.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_buy_with_history_is_skipped(mixer, network):
+    from scanners.handlers import HandlerBuy
+    from scanners.utils import get_scanner
+
+    applied, new = get_event(1, 0), get_event(2, 0)
+    # the trade of end_auction_executer, its log was never claimed
+    mixer.blend(
+        "activity.TokenHistory",
+        tx_hash=applied["transactionHash"].hex(),
+        method="AuctionWin",
+    )
+    handler = HandlerBuy(network, get_scanner(network, synced=True))
+
+    assert handler.claim_events([applied, new]) == [new]
+    assert not ProcessedLog.objects.filter(
+        tx_hash=applied["transactionHash"].hex()
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_logs_claimed_by_another_scanner_are_skipped(network):
+    handler = get_handler(network)
+    events = [get_event(1, 0), get_event(1, 0), get_event(2, 0)]
+    ProcessedLog.objects.create(
+        network=network,
+        handler=handler.TYPE,
+        tx_hash=events[0]["transactionHash"].hex(),
+        log_index=0,
+    )
+
+    assert handler.claim_events(events) == [get_event(2, 0)]
+    assert ProcessedLog.objects.count() == 2
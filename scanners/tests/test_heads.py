@@ -0,0 +1,33 @@
+import threading
+import time
+
+import pytest
+
+from scanners.heads import HeadWatcher
+from src.networks.models import Network
+
+
+@pytest.fixture
+def watcher():
+    # not started, heads are set by the test
+    return HeadWatcher(Network(name="ethereum", ws_endpoint="ws://localhost:8546"))
+
+
+def test_wait_wakes_up_on_new_head(watcher):
+    watcher.set_head(100)
+
+    timer = threading.Timer(0.1, watcher.set_head, args=(101,))
+    timer.start()
+    started_at = time.monotonic()
+    watcher.wait(100, timeout=5)
+
+    assert watcher.head == 101
+    assert time.monotonic() - started_at < 1
+
+
+def test_wait_returns_at_once_for_unseen_head(watcher):
+    watcher.set_head(101)
+
+    started_at = time.monotonic()
+    watcher.wait(100, timeout=5)
+    assert time.monotonic() - started_at < 0.1
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from scanners.metrics import ScannerMetrics
+from src.networks.metrics import get_lag, get_metrics, render_metrics
+from src.networks.views import ScannerMetricsView
+from src.utilities import RedisClient
+
+
+@pytest.fixture
+def metrics():
+    scanner_metrics = ScannerMetrics("test_network")
+    RedisClient().connection.delete(scanner_metrics.key)
+    yield scanner_metrics
+    RedisClient().connection.delete(scanner_metrics.key)
+
+
+def test_flush_and_render(metrics):
+    metrics.observe_rpc("multiplexed_test_network", 0.2)
+    metrics.observe_rpc("multiplexed_test_network", 60, failed=True)
+    metrics.observe_events("transfer_a", 10, 0.5)
+    metrics.observe_window("transfer_a", 100, 900, 1000, 5000)
+    metrics.observe_events("transfer_b", 5, 0.1)
+    metrics.observe_window("transfer_b", 100, 990, 1000, 5000)
+    metrics.flush(force=True)
+
+    assert get_metrics("test_network")["transfer_a"]["events_total"] == 10
+    assert get_lag("test_network", "transfer_a") == 100
+
+    text = render_metrics(["test_network"])
+    assert 'scanner_lag{network="test_network",scanner="transfer_b"} 10' in text
+    assert 'scanner_network_events_total{network="test_network"} 15' in text
+    assert 'scanner_network_max_lag{network="test_network"} 100' in text
+    assert (
+        'scanner_rpc_latency_seconds_bucket{network="test_network",'
+        'scanner="multiplexed_test_network",le="0.25"} 1'
+    ) in text
+    assert 'scanner_network_rpc_latency_seconds_count{network="test_network"} 2' in text
+
+
+def test_outdated_lag_is_ignored(metrics, monkeypatch):
+    metrics.observe_window("transfer_a", 100, 900, 1000, 5000)
+    metrics.flush(force=True)
+    assert get_lag("test_network", "transfer_a") == 100
+
+    # the scanner stalled a long time ago
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 3600)
+    assert get_lag("test_network", "transfer_a") is None
+
+
+def test_flush_is_throttled(metrics):
+    metrics.observe_events("transfer_a", 1, 0.1)
+    metrics.flush()
+    assert get_metrics("test_network") == {}
+
+    metrics.remove("transfer_a")
+    metrics.flush(force=True)
+    assert get_metrics("test_network") == {}
+
+
+@pytest.mark.django_db
+def test_polled_head_is_reported(network, metrics):
+    from scanners.mixins import Scanner
+
+    # networks without ws_endpoint have no head watcher
+    network.ws_endpoint = None
+    scanner = Scanner(network, "ERC721")
+    RedisClient().connection.set(network.name, 1000, ex=10)
+
+    assert scanner.get_last_cached_block() == 1000
+    metrics.observe_window("transfer_a", 100, 900, scanner.last_head, 5000)
+    metrics.flush(force=True)
+    assert get_lag("test_network", "transfer_a") == 100
+
+
+@pytest.mark.django_db
+def test_metrics_view_is_internal(mixer, monkeypatch):
+    from src.settings import config
+
+    monkeypatch.setattr(config, "SCANNER_METRICS_TOKEN", "secret")
+    view = ScannerMetricsView.as_view()
+    factory = APIRequestFactory()
+
+    assert view(factory.get("/")).status_code in (401, 403)
+    request = factory.get("/", HTTP_AUTHORIZATION="Bearer wrong")
+    assert view(request).status_code in (401, 403)
+    request = factory.get("/", HTTP_AUTHORIZATION="Bearer secret")
+    assert view(request).status_code == 200
+
+    request = factory.get("/")
+    force_authenticate(request, user=mixer.blend("accounts.AdvUser", is_staff=True))
+    assert view(request).status_code == 200
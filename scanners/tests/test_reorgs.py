@@ -0,0 +1,111 @@
+import pytest
+from hexbytes import HexBytes
+
+from scanners.reorgs import ReorgGuard, revert_token_history
+from src.activity.models import TokenHistory
+from src.networks.models import ProcessedLog
+from src.store.models import Ownership, Status
+
+
+class TransferHandler:
+    TYPE = "transfer"
+    REVERTIBLE_METHODS = ("Mint", "Transfer", "Burn")
+
+
+class ApprovalHandler:
+    TYPE = "approval"
+    REVERTIBLE_METHODS = ()
+
+
+def get_log(number, tx_hash):
+    return {
+        "blockNumber": number,
+        "blockHash": HexBytes(f"{number:064x}"),
+        "transactionHash": HexBytes(tx_hash),
+    }
+
+
+@pytest.fixture
+def chain(network, monkeypatch):
+    """Block hashes of the node, canonical blocks hash to their number"""
+    hashes = {}
+
+    def get_block_hash(self, number):
+        return hashes.get(number, HexBytes(f"{number:064x}").hex())
+
+    monkeypatch.setattr(ReorgGuard, "get_block_hash", get_block_hash)
+    network.confirmation_depth = 1
+    return hashes
+
+
+@pytest.mark.django_db
+def test_find_fork(network, chain):
+    guard = ReorgGuard(network, "test")
+    guard.record(100, 101, [get_log(99, "0x01"), get_log(100, "0x02")])
+    guard.record(101, 101, [])
+    assert guard.find_fork() is None
+
+    chain[100] = HexBytes("0xff" * 32).hex()
+    chain[101] = HexBytes("0xee" * 32).hex()
+    assert guard.find_fork() == 100
+
+    guard.rollback(100, [TransferHandler])
+    assert list(guard.get_scanned_blocks().values_list("number", flat=True)) == [99]
+
+
+@pytest.mark.django_db
+def test_rollback_unclaims_only_reverted_handlers(network, chain):
+    guard = ReorgGuard(network, "test")
+    guard.record(100, 100, [get_log(100, "0x02")])
+    for handler in ("transfer", "approval"):
+        ProcessedLog.objects.create(
+            network=network, handler=handler, tx_hash="0x02", log_index=0
+        )
+
+    chain[100] = HexBytes("0xff" * 32).hex()
+    guard.rollback(guard.find_fork(), [TransferHandler, ApprovalHandler])
+
+    assert list(ProcessedLog.objects.values_list("handler", flat=True)) == ["approval"]
+
+
+@pytest.mark.django_db
+def test_final_blocks_are_not_recorded(network, chain):
+    guard = ReorgGuard(network, "test")
+    guard.record(100, 110, [get_log(100, "0x01")])
+    assert not guard.get_scanned_blocks().exists()
+
+
+@pytest.mark.django_db
+def test_revert_transfer_and_burn(mixer, network):
+    collection = mixer.blend(
+        "store.Collection", network=network, is_imported=False, deleted=False
+    )
+    seller, buyer = mixer.cycle(2).blend("accounts.AdvUser")
+    token = mixer.blend(
+        "store.Token",
+        collection=collection,
+        total_supply=0,
+        status=Status.BURNED,
+        deleted=False,
+        creator=seller,
+    )
+    TokenHistory.objects.create(
+        token=token,
+        tx_hash="0x01",
+        method="Transfer",
+        old_owner=seller,
+        new_owner=buyer,
+        amount=1,
+    )
+    TokenHistory.objects.create(
+        token=token, tx_hash="0x02", method="Burn", old_owner=buyer, amount=1
+    )
+
+    revert_token_history(network, ["0x01", "0x02"], ["Transfer", "Burn"])
+
+    token.refresh_from_db()
+    assert (token.total_supply, token.status) == (1, Status.COMMITTED)
+    assert list(
+        Ownership.objects.filter(token=token).values_list("owner", "quantity")
+    ) == [(seller.id, 1)]
+    assert not TokenHistory.objects.filter(token=token).exists()
@@ -0,0 +1,176 @@
+import random
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from hexbytes import HexBytes
+
+from src.activity.models import TokenHistory
+from src.networks.models import Address
+from src.store.models import Ownership, Status, Token
+
+EMPTY_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def get_address(number):
+    return "0x" + f"{number:040x}"
+
+
+def get_handler(network, collection, monkeypatch):
+    from scanners.handlers import HandlerTransferBurn
+    from scanners.mixins import Scanner
+
+    monkeypatch.setattr(
+        HandlerTransferBurn, "is_exchange_transaction", lambda self, tx_hash: False
+    )
+    contract = Address(collection.address)
+    scanner = Scanner(network, collection.standard, contract=contract)
+    return HandlerTransferBurn(network, scanner, contract, standard=collection.standard)
+
+
+def create_collection(mixer, network, name, address, tokens_count, users):
+    collection = mixer.blend(
+        "store.Collection",
+        name=name,
+        network=network,
+        address=address,
+        standard="ERC721",
+        status=Status.COMMITTED,
+        is_imported=False,
+        deleted=False,
+    )
+    for internal_id in range(tokens_count):
+        token = mixer.blend(
+            "store.Token",
+            name=f"{name} #{internal_id}",
+            collection=collection,
+            internal_id=internal_id,
+            total_supply=1,
+            status=Status.COMMITTED,
+            deleted=False,
+            creator=users[0],
+        )
+        Ownership.objects.create(
+            token=token, owner=users[internal_id % len(users)], quantity=1
+        )
+    return collection
+
+
+def generate_events(tokens_count, users, events_count, tx_prefix, seed=42):
+    """Valid random chain of transfers and burns of ERC721 tokens"""
+    rand = random.Random(seed)
+    owners = {
+        internal_id: users[internal_id % len(users)].username
+        for internal_id in range(tokens_count)
+    }
+    events = []
+    for number in range(events_count):
+        internal_id = rand.choice(list(owners))
+        old_owner = owners[internal_id]
+        if rand.random() < 0.05:
+            new_owner = EMPTY_ADDRESS
+            owners.pop(internal_id)
+        else:
+            new_owner = rand.choice(users).username
+            owners[internal_id] = new_owner
+        events.append(
+            {
+                "args": {"from": old_owner, "to": new_owner, "tokenId": internal_id},
+                "transactionHash": HexBytes(f"{tx_prefix:08x}{number + 1:056x}"),
+            }
+        )
+        if not owners:
+            break
+    return events
+
+
+def snapshot(collection):
+    ownerships = sorted(
+        Ownership.objects.filter(token__collection=collection).values_list(
+            "token__internal_id", "owner__username", "quantity", "selling_quantity"
+        )
+    )
+    tokens = sorted(
+        Token.objects.filter(collection=collection).values_list(
+            "internal_id", "total_supply", "status"
+        )
+    )
+    history = list(
+        TokenHistory.objects.filter(token__collection=collection)
+        .order_by("id")
+        .values_list(
+            "token__internal_id",
+            "method",
+            "old_owner__username",
+            "new_owner__username",
+            "amount",
+        )
+    )
+    return ownerships, tokens, history
+
+
+@pytest.fixture
+def users(mixer):
+    return [
+        mixer.blend("accounts.AdvUser", username=get_address(number + 1))
+        for number in range(10)
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_matches_per_event_path(mixer, network, users, monkeypatch):
+    tokens_count = 20
+    single = create_collection(
+        mixer, network, "single", get_address(1001), tokens_count, users
+    )
+    batch = create_collection(
+        mixer, network, "batch", get_address(1002), tokens_count, users
+    )
+
+    handler = get_handler(network, single, monkeypatch)
+    for event in generate_events(tokens_count, users, 200, tx_prefix=1):
+        handler.save_event(event)
+
+    handler = get_handler(network, batch, monkeypatch)
+    handler.save_events(generate_events(tokens_count, users, 200, tx_prefix=2))
+
+    assert snapshot(single) == snapshot(batch)
+
+
+@pytest.mark.django_db
+def test_batch_benchmark(mixer, network, users, monkeypatch):
+    """
+    Compare per-event and batch persistence of the same event list.
+    Run with -s to see the numbers.
+    """
+    tokens_count = 100
+    events_count = 1000
+    single = create_collection(
+        mixer, network, "single", get_address(1001), tokens_count, users
+    )
+    batch = create_collection(
+        mixer, network, "batch", get_address(1002), tokens_count, users
+    )
+    events = generate_events(tokens_count, users, events_count, tx_prefix=1)
+
+    handler = get_handler(network, single, monkeypatch)
+    with CaptureQueriesContext(connection) as single_queries:
+        started_at = time.monotonic()
+        for event in events:
+            handler.save_event(event)
+        single_time = time.monotonic() - started_at
+
+    events = generate_events(tokens_count, users, events_count, tx_prefix=2)
+    handler = get_handler(network, batch, monkeypatch)
+    with CaptureQueriesContext(connection) as batch_queries:
+        started_at = time.monotonic()
+        handler.save_events(events)
+        batch_time = time.monotonic() - started_at
+
+    print(
+        f"\n{len(events)} transfers: "
+        f"per-event {single_time:.2f}s / {len(single_queries)} queries, "
+        f"batch {batch_time:.2f}s / {len(batch_queries)} queries"
+    )
+    assert len(batch_queries) * 5 < len(single_queries)
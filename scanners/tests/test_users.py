@@ -0,0 +1,43 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from scanners.users import UserResolver
+from src.accounts.models import AdvUser
+
+
+@pytest.mark.django_db
+def test_resolve_existing_and_new_addresses(mixer):
+    user = mixer.blend("accounts.AdvUser", username="0xAbC")
+    resolver = UserResolver()
+
+    users = resolver.get_users(["0xabc", "0xDEF", "0x123"])
+
+    assert users["0xabc"].id == user.id
+    assert users["0xabc"].username == "0xAbC"
+    assert set(users) == {"0xabc", "0xdef", "0x123"}
+    assert AdvUser.objects.filter(username__in=["0xdef", "0x123"]).count() == 2
+
+
+@pytest.mark.django_db
+def test_cached_addresses_do_not_query(mixer):
+    mixer.blend("accounts.AdvUser", username="0xabc")
+    resolver = UserResolver()
+    user = resolver.get_user("0xABC")
+
+    with CaptureQueriesContext(connection) as queries:
+        assert resolver.get_user("0xabc").id == user.id
+    assert not queries
+
+
+@pytest.mark.django_db
+def test_created_users_are_not_cached_after_rollback():
+    resolver = UserResolver()
+
+    with pytest.raises(ValueError):
+        with transaction.atomic():
+            resolver.get_user("0xdef")
+            raise ValueError
+
+    assert "0xdef" not in resolver.cache
+    assert resolver.get_user("0xdef").id
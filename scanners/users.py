@@ -0,0 +1,98 @@
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Set, Tuple
+
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from src.accounts.models import AdvUser, DefaultAvatar
+
+
+class UserResolver:
+    """
+    Wallet address to user resolution shared by scanner handlers.
+
+    Resolved (id, username) pairs are kept in a bounded LRU cache,
+    misses are loaded with one query over the lowercase username index
+    and unknown addresses are created with a single bulk insert, cached
+    once the transaction creating them is committed.
+    Users are returned as deferred AdvUser instances: their other
+    fields are loaded on access, save() writes only loaded fields.
+    """
+
+    CACHE_SIZE = 100000
+
+    def __init__(self) -> None:
+        self.cache: Dict[str, Tuple[int, str]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.cache.clear()
+
+    def fetch(self, addresses: Set[str]) -> Dict[str, Tuple[int, str]]:
+        users = (
+            AdvUser.objects.annotate(username_lower=Lower("username"))
+            .filter(username_lower__in=addresses)
+            .values_list("username_lower", "id", "username")
+        )
+        return {address: (user_id, username) for address, user_id, username in users}
+
+    def create(self, addresses: Set[str]) -> None:
+        # bulk_create skips post_save, set the default avatar here
+        default_avatars = list(DefaultAvatar.objects.values_list("image", flat=True))
+        AdvUser.objects.bulk_create(
+            [
+                AdvUser(
+                    username=address,
+                    avatar_ipfs=random.choice(default_avatars)
+                    if default_avatars
+                    else None,
+                )
+                for address in addresses
+            ],
+            ignore_conflicts=True,
+        )
+
+    def resolve(self, addresses: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        """Return (id, username) by lowercase address, create unknown users"""
+        addresses = {address.lower() for address in addresses}
+        resolved = {}
+        with self.lock:
+            for address in addresses:
+                if address in self.cache:
+                    self.cache.move_to_end(address)
+                    resolved[address] = self.cache[address]
+        missing = addresses - resolved.keys()
+        if not missing:
+            return resolved
+
+        fetched = self.fetch(missing)
+        resolved.update(fetched)
+        self.remember(fetched)
+        if len(fetched) < len(missing):
+            self.create(missing - fetched.keys())
+            created = self.fetch(missing - fetched.keys())
+            resolved.update(created)
+            # ids of created users are gone if the transaction rolls back
+            transaction.on_commit(lambda: self.remember(created))
+        return resolved
+
+    def remember(self, users: Dict[str, Tuple[int, str]]) -> None:
+        with self.lock:
+            self.cache.update(users)
+            while len(self.cache) > self.CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+    def get_users(self, addresses: Iterable[str]) -> Dict[str, AdvUser]:
+        return {
+            address: AdvUser.from_db("default", ["id", "username"], [user_id, username])
+            for address, (user_id, username) in self.resolve(addresses).items()
+        }
+
+    def get_user(self, address: str) -> AdvUser:
+        return self.get_users([address])[address.lower()]
+
+
+user_resolver = UserResolver()
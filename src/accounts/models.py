@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Lower
 
 from src.settings import config
 from src.utilities import get_media_from_ipfs
@@ -50,6 +51,12 @@ class AdvUser(AbstractUser):
 
     objects = AdvUserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # scanners look users up by lowercase wallet address
+            models.Index(Lower("username"), name="advuser_username_lower"),
+        ]
+
     def get_name(self) -> str:
         return self.display_name or self.username
 
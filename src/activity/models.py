@@ -1,7 +1,8 @@
 import re
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from django.db import models
+from django.db.models.signals import post_save
 
 from src.accounts.models import AdvUser
 from src.activity.services.subscriptor import Subscriptor
@@ -232,14 +233,14 @@ class ActivitySubscription(models.Model):
         return valid_for_following_notification or valid_for_self_notification
 
     @classmethod
-    def _create_subscription(
+    def _build_subscription(
         cls,
         model: "models.Model",
         instance: Union["UserAction", "BidsHistory", "TokenHistory"],
         receiver: "AdvUser",
         view_type: str,
         source: Optional["AdvUser"] = None,
-    ) -> None:
+    ) -> "ActivitySubscription":
         method = instance.method
         sub_instance = cls(
             receiver=receiver,
@@ -251,7 +252,18 @@ class ActivitySubscription(models.Model):
         # get snake_case field name from camelModelName
         field_name = pattern.sub("_", model.__name__).lower()
         setattr(sub_instance, field_name, instance)
-        sub_instance.save()
+        return sub_instance
+
+    @classmethod
+    def _create_subscription(
+        cls,
+        model: "models.Model",
+        instance: Union["UserAction", "BidsHistory", "TokenHistory"],
+        receiver: "AdvUser",
+        view_type: str,
+        source: Optional["AdvUser"] = None,
+    ) -> None:
+        cls._build_subscription(model, instance, receiver, view_type, source).save()
 
     @classmethod
     def create_subscriptions(
@@ -283,6 +295,60 @@ class ActivitySubscription(models.Model):
             # add subscription for main user
             cls._create_subscription(model, instance, receiver, receivers[receiver])
 
+    @classmethod
+    def bulk_create_subscriptions(
+        cls,
+        model: "models.Model",
+        instances: List[Union["UserAction", "BidsHistory", "TokenHistory"]],
+    ) -> None:
+        """
+        create_subscriptions for many activities at once: followers are
+        fetched with one query and subscriptions are saved with bulk_create.
+        post_save is sent manually to keep websocket notifications.
+        """
+        instance_receivers = [
+            (instance, instance.get_receivers()) for instance in instances
+        ]
+        followed = {
+            receiver
+            for _, receivers in instance_receivers
+            for receiver, view_type in receivers.items()
+            if receiver is not None and view_type in ["follow", "both"]
+        }
+        subscriptors = Subscriptor().add_subscriptors_bulk(followed)
+
+        subscriptions = []
+        for instance, receivers in instance_receivers:
+            processed_receivers = []
+            for receiver in receivers.keys():
+                if receiver is None:
+                    continue
+                if receivers[receiver] in ["follow", "both"]:
+                    additional_receivers = subscriptors.get(receiver, {})
+                    for additional_receiver in additional_receivers.keys():
+                        if (
+                            additional_receiver not in receivers
+                            and additional_receiver not in processed_receivers
+                        ):
+                            processed_receivers.append(additional_receiver)
+                            subscriptions.append(
+                                cls._build_subscription(
+                                    model,
+                                    instance,
+                                    additional_receiver,
+                                    additional_receivers[additional_receiver],
+                                    receiver,
+                                )
+                            )
+                subscriptions.append(
+                    cls._build_subscription(
+                        model, instance, receiver, receivers[receiver]
+                    )
+                )
+
+        for subscription in cls.objects.bulk_create(subscriptions):
+            post_save.send(sender=cls, instance=subscription, created=True)
+
     class Meta:
         # prevent setting multiple or none activity links on db setting
         constraints = [
@@ -349,3 +415,35 @@ class CollectionStat(models.Model):
 
     def __str__(self):
         return f"{self.collection} {self.date}"
+
+
+class CollectionRanking(models.Model):
+    """
+    CollectionStat of a committed collection rolled up over the last
+    `period` days, 0 for all time, with the rank of the collection by
+    amount in the period, overall and in its network
+    """
+
+    collection = models.ForeignKey(
+        "store.Collection", on_delete=models.CASCADE, related_name="rankings"
+    )
+    period = models.PositiveIntegerField(help_text="number of days, 0 for all time")
+    amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    number_of_trades = models.IntegerField(default=0)
+    rank = models.PositiveIntegerField()
+    # rank among collections of the same network
+    network_rank = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "collection"], name="unique_collection_ranking"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["period", "rank"]),
+            models.Index(fields=["period", "network_rank"]),
+        ]
+
+    def __str__(self):
+        return f"{self.collection} {self.period} #{self.rank}"
@@ -1,4 +1,6 @@
-from typing import Dict
+from typing import Dict, Iterable
+
+from django.apps import apps
 
 from src.accounts.models import AdvUser
 from src.settings import config
@@ -17,3 +19,23 @@ class Subscriptor:
                 "follow",
             )
         return additional_receivers
+
+    @classmethod
+    def add_subscriptors_bulk(
+        cls, receivers: Iterable["AdvUser"]
+    ) -> Dict["AdvUser", Dict["AdvUser", str]]:
+        # same as add_subscriptors, but for many receivers with one query
+        additional_receivers = {receiver: {} for receiver in receivers}
+        if cls.enable_following_notifications and additional_receivers:
+            receivers_by_id = {
+                receiver.id: receiver for receiver in additional_receivers
+            }
+            follows = (
+                apps.get_model("activity", "UserAction")
+                .objects.filter(whom_follow__in=receivers_by_id.keys())
+                .select_related("user")
+            )
+            for follow in follows:
+                receiver = receivers_by_id[follow.whom_follow_id]
+                additional_receivers[receiver][follow.user] = "follow"
+        return additional_receivers
@@ -1,19 +1,24 @@
 import json
+from collections import defaultdict
 from datetime import date, timedelta
 
+from django.db import transaction
 from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import Coalesce
 
-from src.activity.models import CollectionStat, TokenHistory
+from src.activity.models import CollectionRanking, CollectionStat, TokenHistory
 from src.activity.serializers import (
     CollectionStatsSerializer,
     CollectionTradeDataSerializer,
 )
 from src.settings import config
-from src.store.models import Collection
-from src.store.serializers import TopCollectionsSerializer
+from src.store.models import Collection, Status
 from src.support.models import Config
 from src.utilities import RedisClient
 
+# days of precomputed top collections periods, 0 for all time
+RANKING_PERIODS = (1, 7, 30, 0)
+
 
 def update_collection_stat():
     filter_day = date.today()
@@ -48,46 +53,88 @@ def update_collection_stat():
         collection_stat.average_price = data.get("average_price")
         collection_stat.number_of_trades = data.get("trade_count")
         collection_stat.save()
+    update_collection_rankings()
 
     # delete all cached values after data update
     redis = RedisClient()
-    for redis_key_filter in ["top_collection__*", "chart__*", "trade_data__*"]:
+    for redis_key_filter in ["chart__*", "trade_data__*"]:
         keys = redis.connection.keys(redis_key_filter)
         for key in keys:
             redis.connection.delete(key)
 
 
-def get_top_collections(network):
-    start_date, period = Config.get_top_collections_period()
-    end_date = date.today()
-
-    # try to get cached value if exists
-    redis = RedisClient()
-    redis_key = f"top_collection__{period}__{end_date}"
-    redis_key += f"__{network}" if network else ""
+def get_ranking_period(period) -> int:
+    """Days of a top collections period, 0 for all time"""
+    return 0 if period == "all" else int(period)
+
+
+def update_collection_rankings(periods=None):
+    """
+    Roll CollectionStat up into CollectionRanking rows of every period,
+    with one grouped query per period and a bulk insert of its ranking.
+    """
+    if periods is None:
+        _, period = Config.get_top_collections_period()
+        periods = set(RANKING_PERIODS) | {get_ranking_period(period)}
+    today = date.today()
+    for period in periods:
+        stats = CollectionStat.objects.filter(
+            collection__is_default=False,
+            collection__deleted=False,
+            collection__status=Status.COMMITTED,
+            amount__gt=0,
+        )
+        if period:
+            stats = stats.filter(date__gte=today - timedelta(days=period))
+        rollups = (
+            stats.values("collection", "collection__network")
+            .annotate(
+                total=Sum("amount"),
+                trades=Coalesce(Sum("number_of_trades"), 0),
+            )
+            .order_by("-total", "collection")
+        )
+        rankings = []
+        network_ranks = defaultdict(int)
+        for rank, rollup in enumerate(rollups, start=1):
+            network_ranks[rollup["collection__network"]] += 1
+            rankings.append(
+                CollectionRanking(
+                    collection_id=rollup["collection"],
+                    period=period,
+                    amount=rollup["total"],
+                    number_of_trades=rollup["trades"],
+                    rank=rank,
+                    network_rank=network_ranks[rollup["collection__network"]],
+                )
+            )
+        with transaction.atomic():
+            CollectionRanking.objects.filter(period=period).delete()
+            CollectionRanking.objects.bulk_create(rankings)
 
-    data = redis.connection.get(redis_key)
-    if data:
-        return json.loads(data)
 
-    # get sorted list of all collection stats and serialize
-    collections = (
-        Collection.objects.committed().network(network).filter(is_default=False)
-    )
-    data = TopCollectionsSerializer(
-        collections, many=True, context={"start_date": start_date, "end_date": end_date}
-    ).data
-    data = sorted(data, key=lambda x: x.get("amount") or 0, reverse=True)
-
-    # cache result
-    redis.connection.set(
-        redis_key,
-        json.dumps(data, ensure_ascii=False, default=str),
-        ex=config.REDIS_EXPIRATION_TIME,
+def get_top_collections(network):
+    """
+    Committed collections ranked by amount traded in the configured period,
+    as a queryset ordered by the precomputed rank to be paginated.
+    """
+    _, period = Config.get_top_collections_period()
+    period = get_ranking_period(period)
+    if not CollectionRanking.objects.filter(period=period).exists():
+        # the period has been configured after the last rollup
+        update_collection_rankings([period])
+    # ranks of collections in their network if the list is of one network
+    rank = "rankings__rank"
+    if network and network != "undefined":
+        rank = "rankings__network_rank"
+    return (
+        Collection.objects.committed()
+        .network(network)
+        .filter(rankings__period=period)
+        .annotate(period_amount=F("rankings__amount"), rank=F(rank))
+        .order_by("rank")
     )
 
-    return data
-
 
 def get_collection_charts(collection, days):
     # try to get cached value if exists
@@ -1,45 +1,83 @@
 import json
+from collections import defaultdict
+from decimal import Decimal
 
-from django.db.models import Sum
+from django.db import transaction
+from django.db.models import Max, Sum
 
-from src.accounts.models import AdvUser
 from src.activity.models import TokenHistory, UserStat
 from src.activity.serializers import UserStatSerializer
 from src.settings import config
 from src.support.models import Config
 from src.utilities import RedisClient
 
+# id of the last TokenHistory folded into UserStat, for incremental updates
+LAST_HISTORY_KEY = "users_stat__last_history_id"
 
-def update_users_stat(network):
+
+def update_users_stat(incremental=False):
     """
-    Get all users with active sells at given period.
-    Calculate sum of their "Selling" histories in USD
+    Sum "Selling" histories in USD of users for every network and overall
+    (network = None) with one grouped query, and apply the sums in bulk.
+    Full update recomputes the period and deletes stats of users without
+    sales in it, incremental one adds only histories created since the
+    last update.
     """
     start_time, _ = Config.get_top_users_period()
+    redis = RedisClient()
+    histories = TokenHistory.objects.filter(
+        token__deleted=False,
+        date__gte=start_time,
+        method__in=["Buy", "AuctionWin"],
+    )
+    last_history_id = redis.connection.get(LAST_HISTORY_KEY)
+    if incremental and last_history_id is None:
+        incremental = False
+    if incremental:
+        histories = histories.filter(id__gt=int(last_history_id))
+    # read before summing, histories created meanwhile go to the next update
+    max_history_id = TokenHistory.objects.aggregate(max_id=Max("id"))["max_id"]
+    if max_history_id is not None:
+        histories = histories.filter(id__lte=max_history_id)
 
-    users = AdvUser.objects.filter(
-        old_owner__method__in=["Buy", "AuctionWin"], old_owner__date__gte=start_time
-    ).distinct()
-    for user in users:
-        user_stat, _ = UserStat.objects.get_or_create(network=network, user=user)
-        filter_data = {
-            "token__deleted": False,
-            "date__gte": start_time,
-            "method__in": ["Buy", "AuctionWin"],
-            "old_owner": user,
-        }
-        if network:
-            filter_data["currency__network"] = network
-        user_stat.amount = TokenHistory.objects.filter(**filter_data).aggregate(
-            sum_price=Sum("USD_price")
-        )["sum_price"]
-        user_stat.save()
+    amounts = defaultdict(Decimal)
+    for user_id, network_id, amount in (
+        histories.values("old_owner", "currency__network")
+        .annotate(amount=Sum("USD_price"))
+        .values_list("old_owner", "currency__network", "amount")
+        .order_by()
+    ):
+        if user_id is None:
+            continue
+        amount = amount or Decimal(0)
+        amounts[(user_id, None)] += amount
+        if network_id is not None:
+            amounts[(user_id, network_id)] += amount
 
-    # Delete rows for users, which was not picked up in first filter
-    UserStat.objects.exclude(user__in=users).delete()
+    with transaction.atomic():
+        stats = UserStat.objects.all()
+        if incremental:
+            stats = stats.filter(user_id__in={user_id for user_id, _ in amounts})
+        existing = {(stat.user_id, stat.network_id): stat for stat in stats}
+        for key, stat in existing.items():
+            if incremental:
+                stat.amount = (stat.amount or 0) + amounts.pop(key, 0)
+            else:
+                stat.amount = amounts.pop(key, None)
+        if not incremental:
+            # delete rows for users without sales in the period
+            stale = [key for key, stat in existing.items() if stat.amount is None]
+            UserStat.objects.filter(
+                id__in=[existing.pop(key).id for key in stale]
+            ).delete()
+        UserStat.objects.bulk_update(existing.values(), ["amount"])
+        UserStat.objects.bulk_create(
+            UserStat(user_id=user_id, network_id=network_id, amount=amount)
+            for (user_id, network_id), amount in amounts.items()
+        )
+    redis.connection.set(LAST_HISTORY_KEY, max_history_id or 0)
 
     # delete all cached values after data update
-    redis = RedisClient()
     redis_key_filter = "top_users__*"
     keys = redis.connection.keys(redis_key_filter)
     for key in keys:
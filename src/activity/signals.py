@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from src.activity.models import (
@@ -8,6 +8,7 @@ from src.activity.models import (
     UserAction,
 )
 from src.rates.api import calculate_amount
+from src.store.models import CollectionAggregate, Token
 
 
 @receiver(post_save, sender=TokenHistory)
@@ -17,6 +18,10 @@ def token_history_post_save_dispatcher(sender, instance, created, *args, **kwarg
     if created:
         receivers = instance.get_receivers()
         ActivitySubscription.create_subscriptions(sender, instance, receivers)
+        if instance.method == "Buy" and instance.USD_price:
+            CollectionAggregate.objects.add(
+                instance.token.collection_id, volume=instance.USD_price
+            )
 
 
 @receiver(post_save, sender=UserAction)
@@ -25,6 +30,22 @@ def user_action_post_save_dispatcher(sender, instance, created, *args, **kwargs)
     if created:
         receivers = instance.get_receivers()
         ActivitySubscription.create_subscriptions(sender, instance, receivers)
+        if instance.token_id:
+            CollectionAggregate.objects.add(instance.token.collection_id, likes_count=1)
+
+
+@receiver(post_delete, sender=UserAction)
+def user_action_post_delete_dispatcher(sender, instance, *args, **kwargs):
+    if not instance.token_id:
+        return
+    # the token may be deleted in the same cascade
+    collection_id = (
+        Token.objects.filter(id=instance.token_id)
+        .values_list("collection_id", flat=True)
+        .first()
+    )
+    if collection_id:
+        CollectionAggregate.objects.add(collection_id, likes_count=-1)
 
 
 @receiver(post_save, sender=BidsHistory)
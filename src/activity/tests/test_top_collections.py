@@ -1,11 +1,16 @@
-import json
+from datetime import date
 from decimal import Decimal
 
 import pytest
 
-from src.activity.models import CollectionStat
-from src.activity.services.top_collections import get_top_collections
+from src.activity.models import CollectionRanking, CollectionStat
+from src.activity.services.top_collections import (
+    RANKING_PERIODS,
+    get_top_collections,
+    update_collection_rankings,
+)
 from src.activity.tasks import update_collection_stat_info
+from src.store.models import Status
 
 
 @pytest.mark.django_db
@@ -46,10 +51,11 @@ def test_top_colections(
 
     # check sorting
     top_collections = get_top_collections(None)
-    assert top_collections[0]["url"] == second_token.collection.url
-    assert top_collections[0]["amount"] == Decimal(200000.00)
-    assert top_collections[1]["url"] == token.collection.url
-    assert top_collections[1]["amount"] == Decimal(100000.00)
+    assert top_collections[0].url == second_token.collection.url
+    assert top_collections[0].period_amount == Decimal(200000.00)
+    assert top_collections[1].url == token.collection.url
+    assert top_collections[1].period_amount == Decimal(100000.00)
+    assert [collection.rank for collection in top_collections] == [1, 2]
 
     # add auction which reverts top order and recheck all
     mixer.blend(
@@ -80,14 +86,44 @@ def test_top_colections(
 
     # check sorting
     top_collections = get_top_collections(None)
-    assert top_collections[0]["url"] == token.collection.url
-    assert top_collections[0]["amount"] == Decimal(600000.00)
-    assert top_collections[1]["url"] == second_token.collection.url
-    assert top_collections[1]["amount"] == Decimal(200000.00)
+    assert top_collections[0].url == token.collection.url
+    assert top_collections[0].period_amount == Decimal(600000.00)
+    assert top_collections[1].url == second_token.collection.url
+    assert top_collections[1].period_amount == Decimal(200000.00)
 
-    # check caching
-    stat = CollectionStat.objects.get(collection__id=top_collections[0]["url"])
-    stat.amount *= 2
-    stat.save()
-    top_collections_cached = get_top_collections(None)
-    assert top_collections_cached[0]["amount"] == str(top_collections[0]["amount"])
+    # check rollups of every period
+    for period in RANKING_PERIODS:
+        assert list(
+            CollectionRanking.objects.filter(period=period)
+            .order_by("rank")
+            .values_list("collection", flat=True)
+        ) == [token.collection.id, second_token.collection.id]
+
+
+@pytest.mark.django_db
+def test_top_collections_ranks_in_network(mixer):
+    networks = mixer.cycle(2).blend("networks.Network", name=(n for n in "ab"))
+    collections = mixer.cycle(4).blend(
+        "store.Collection",
+        network=(networks[n % 2] for n in range(4)),
+        status=(s for s in [Status.COMMITTED] * 3 + [Status.PENDING]),
+        deleted=False,
+        is_default=False,
+    )
+    mixer.cycle(4).blend(
+        "activity.CollectionStat",
+        collection=(collection for collection in collections),
+        date=date.today(),
+        amount=(amount for amount in [400, 300, 200, 100]),
+    )
+    update_collection_rankings()
+
+    # the pending collection is not ranked, ranks of a network have no gaps
+    assert [(c.id, c.rank) for c in get_top_collections(None)] == [
+        (collections[0].id, 1),
+        (collections[1].id, 2),
+        (collections[2].id, 3),
+    ]
+    assert [(c.id, c.rank) for c in get_top_collections("b")] == [
+        (collections[1].id, 1)
+    ]
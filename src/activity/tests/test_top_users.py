@@ -4,7 +4,7 @@ import pytest
 
 from src.activity.models import UserStat
 from src.activity.services.top_users import get_top_users
-from src.activity.tasks import update_top_users_info
+from src.activity.tasks import update_top_users_increment, update_top_users_info
 
 
 @pytest.mark.django_db
@@ -80,3 +80,40 @@ def test_top_users(
     stat.save()
     top_users_cached = get_top_users(None)
     assert top_users_cached[0]["amount"] == str(top_users[0]["amount"])
+
+
+@pytest.mark.django_db
+def test_top_users_increment(mixer, active_user, second_user, follower, currency):
+    mixer.blend(
+        "activity.TokenHistory",
+        method="Buy",
+        old_owner=active_user,
+        new_owner=follower,
+        price=100,
+        currency=currency,
+    )
+    update_top_users_info()
+    network = currency.network
+    assert UserStat.objects.get(user=active_user, network=network).amount == Decimal(
+        100000.00
+    )
+
+    mixer.cycle(2).blend(
+        "activity.TokenHistory",
+        method="Buy",
+        old_owner=(seller for seller in [active_user, second_user]),
+        new_owner=follower,
+        price=(price for price in [100, 200]),
+        currency=currency,
+    )
+    update_top_users_increment()
+    # histories are added once, for the network and overall
+    update_top_users_increment()
+    for network in [network, None]:
+        assert UserStat.objects.get(
+            user=active_user, network=network
+        ).amount == Decimal(200000.00)
+        assert UserStat.objects.get(
+            user=second_user, network=network
+        ).amount == Decimal(200000.00)
+    assert not UserStat.objects.filter(user=follower).exists()
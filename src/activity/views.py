@@ -16,7 +16,10 @@ from src.activity.services.top_users import get_top_users
 from src.networks.models import Network
 from src.responses import error_response
 from src.settings import config
-from src.store.serializers import PaginateTopCollectionsSerializer
+from src.store.serializers import (
+    PaginateTopCollectionsSerializer,
+    TopCollectionsSerializer,
+)
 from src.store.utils import get_collection_by_short_url
 from src.utilities import PaginateMixin
 
@@ -292,7 +295,10 @@ class GetTopCollectionsView(APIView, PaginateMixin):
     def get(self, request):
         network = request.query_params.get("network")
         collections = get_top_collections(network)
-        return Response(self.paginate(request, collections), status=status.HTTP_200_OK)
+        return Response(
+            self.paginate(request, collections, TopCollectionsSerializer),
+            status=status.HTTP_200_OK,
+        )
 
 
 class GetTopUsersView(APIView):
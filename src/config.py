@@ -48,6 +48,8 @@ class Config:
     IPFS_DOMAIN: str
     IPFS_PORT: int
     SCANNER_SLEEP: int
+    SCANNER_ARCHIVE_DIR: Optional[str]
+    SCANNER_METRICS_TOKEN: Optional[str]
 
     @dataclass
     class SortStatus:
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from src.networks.models import Network
 from src.utilities import RedisClient
 
@@ -19,3 +21,13 @@ def get_import_requests_exceeded(network: Network):
         return True
     else:
         return False
+
+
+def get_import_requests_left(network: Network) -> Optional[int]:
+    """Return requests left in the daily budget, None if it is unlimited"""
+    if not network.daily_import_requests:
+        return None
+    redis = RedisClient()
+    redis_key = f"import_requests__{network.name}"
+    current_value = redis.connection.get(redis_key) or 0
+    return max(network.daily_import_requests - int(current_value), 0)
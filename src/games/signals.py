@@ -5,6 +5,7 @@ from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import Signal, receiver
 
 from src.store.models import Collection, Status
+from src.store.utils import notify_scanners
 from src.support.models import EmailTemplate
 from src.support.tasks import send_email_notification
 
@@ -30,9 +31,11 @@ def game_category_post_save_dispatcher(sender, instance, *args, **kwargs):
     start importing all collections after game is approved (via scanner)
     """
     if instance.is_approved:
-        Collection.objects.filter(
-            game_subcategory__category__id=instance.id, status=Status.PENDING
-        ).update(status=Status.IMPORTING)
+        start_importing(
+            Collection.objects.filter(
+                game_subcategory__category__id=instance.id, status=Status.PENDING
+            )
+        )
         GameSubCategory.objects.filter(category=instance).exclude(
             is_approved=True
         ).update(is_approved=True)
@@ -44,9 +47,18 @@ def game_subcategory_post_save_dispatcher(sender, instance, *args, **kwargs):
     start importing all collections after game is approved (via scanner)
     """
     if instance.is_approved:
-        Collection.objects.filter(
-            game_subcategory__id=instance.id, status=Status.PENDING
-        ).update(status=Status.IMPORTING)
+        start_importing(
+            Collection.objects.filter(
+                game_subcategory__id=instance.id, status=Status.PENDING
+            )
+        )
+
+
+def start_importing(collections) -> None:
+    """Move pending collections to importing and let scanners pick them up"""
+    collection_ids = list(collections.values_list("id", flat=True))
+    collections.update(status=Status.IMPORTING)
+    notify_scanners(collection_ids)
 
 
 game_created = Signal(providing_args=["instance"])
@@ -64,9 +76,11 @@ def game_approved_dispatcher(sender, instance, *args, **kwargs):
     start importing all collections after game is approved (via scanner)
     """
     if kwargs.get("approved"):
-        Collection.objects.filter(
-            game_subcategory__category__game__id=instance.id, status=Status.PENDING
-        ).update(status=Status.IMPORTING)
+        start_importing(
+            Collection.objects.filter(
+                game_subcategory__category__game__id=instance.id, status=Status.PENDING
+            )
+        )
         GameCategory.objects.filter(game__id=instance.id).exclude(
             is_approved=True
         ).update(is_approved=True)
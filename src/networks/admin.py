@@ -1,5 +1,7 @@
 from django import forms
 from django.contrib import admin
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 from django_admin_inline_paginator.admin import TabularInlinePaginated
 
 from src.networks.models import Network, Provider
@@ -47,10 +49,46 @@ class NetworkAdmin(admin.ModelAdmin):
                     "deadline",
                     "auction_timeout",
                     "daily_import_requests",
+                    "provider_strategy",
+                    "ws_endpoint",
+                    "confirmation_depth",
                 ),
             },
         ),
+        (
+            "Providers health",
+            {
+                "fields": ("providers_health_table",),
+            },
+        ),
     )
+    readonly_fields = ("providers_health_table",)
+
+    def providers_health_table(self, obj):
+        if not obj.id:
+            return "-"
+        rows = [
+            format_html(
+                "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td>"
+                "<td>{}</td><td>{}</td><td>{}</td></tr>",
+                health["endpoint"],
+                health["requests"],
+                health["errors"],
+                health["rate_limited"],
+                health["in_flight"],
+                health["latency"],
+                health["cooldown"],
+            )
+            for health in obj.providers_health
+        ]
+        return format_html(
+            "<table><tr><th>endpoint</th><th>requests</th><th>errors</th>"
+            "<th>rate limited</th><th>in flight</th><th>latency, s</th>"
+            "<th>cooldown, s</th></tr>{}</table>",
+            mark_safe("".join(rows)),
+        )
+
+    providers_health_table.short_description = "Providers health"
 
 
 admin.site.register(Network, NetworkAdmin)
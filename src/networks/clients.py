@@ -0,0 +1,114 @@
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from web3 import Web3
+
+from src.networks.providers import ProviderPool
+from src.utilities import RedisClient
+
+if TYPE_CHECKING:
+    from web3.contract import Contract
+    from web3.providers.base import BaseProvider
+    from web3.types import ABI
+
+    from src.networks.models import Network
+
+
+@lru_cache(maxsize=100000)
+def to_checksum_address(address: str) -> str:
+    """Pure checksum computation, no web3 client needed"""
+    return Web3.toChecksumAddress(address)
+
+
+class Web3Client:
+    def __init__(
+        self,
+        network: "Network",
+        version: Optional[str],
+        provider: Optional["BaseProvider"] = None,
+    ) -> None:
+        self.version = version
+        self.checked_at = time.monotonic()
+        if provider is None:
+            self.endpoints = list(
+                network.providers.values_list("endpoint", "max_concurrency")
+            )
+            provider = ProviderPool(
+                network.name, self.endpoints, network.provider_strategy
+            )
+        else:
+            self.endpoints = []
+        self.provider = provider
+        self.web3 = Web3(self.provider)
+        self.contracts = {}
+
+
+class Web3Registry:
+    """
+    Process-level registry of web3 clients, one per network id.
+
+    Clients keep their provider pool (and its keep-alive HTTP sessions),
+    provider endpoints and contract objects between calls. Saving or
+    deleting a Network or Provider bumps a version in Redis, so
+    clients of all processes are rebuilt after CHECK_INTERVAL seconds.
+    """
+
+    CHECK_INTERVAL = 30
+    VERSION_KEY = "web3_clients_version"
+
+    _clients = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_version(cls) -> Optional[str]:
+        return RedisClient().connection.get(cls.VERSION_KEY)
+
+    @classmethod
+    def get_client(cls, network: "Network") -> Web3Client:
+        client = cls._clients.get(network.id)
+        if client and time.monotonic() - client.checked_at > cls.CHECK_INTERVAL:
+            if client.version != cls.get_version():
+                client = None
+            else:
+                client.checked_at = time.monotonic()
+        if client is None:
+            with cls._lock:
+                client = Web3Client(network, cls.get_version())
+                cls._clients[network.id] = client
+        return client
+
+    @classmethod
+    def install(cls, network: "Network", provider: "BaseProvider") -> Web3Client:
+        """Serve the network by a custom provider, e.g. a local chain stand-in"""
+        with cls._lock:
+            client = Web3Client(network, cls.get_version(), provider=provider)
+            cls._clients[network.id] = client
+        return client
+
+    @classmethod
+    def get_web3(cls, network: "Network") -> Web3:
+        return cls.get_client(network).web3
+
+    @classmethod
+    def get_contract(
+        cls, network: "Network", abi: "ABI", address: str = None
+    ) -> "Contract":
+        client = cls.get_client(network)
+        # ABIs are module level constants, so identity is a stable key
+        key = (id(abi), address)
+        contract = client.contracts.get(key)
+        if contract is None:
+            contract = client.web3.eth.contract(address=address, abi=abi)
+            client.contracts[key] = contract
+        return contract
+
+    @classmethod
+    def invalidate(cls, network_id: int = None) -> None:
+        with cls._lock:
+            if network_id is None:
+                cls._clients.clear()
+            else:
+                cls._clients.pop(network_id, None)
+        RedisClient().connection.incr(cls.VERSION_KEY)
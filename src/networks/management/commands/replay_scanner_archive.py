@@ -0,0 +1,129 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from scanners.archive import LogArchive
+from scanners.handlers import (
+    HandlerApproval,
+    HandlerBuy,
+    HandlerDeploy,
+    HandlerMint,
+    HandlerPromotion,
+    HandlerTransferBurn,
+)
+from scanners.utils import get_scanner
+from src.networks.models import Network
+from src.store.models import Collection
+
+HANDLERS = {
+    handler.TYPE: handler
+    for handler in (
+        HandlerApproval,
+        HandlerBuy,
+        HandlerDeploy,
+        HandlerMint,
+        HandlerPromotion,
+        HandlerTransferBurn,
+    )
+}
+
+
+class Command(BaseCommand):
+    """
+    Replay archived scanner events through the handlers without the node:
+    'manage.py replay_scanner_archive --network <name> --handler transfer'
+    """
+
+    help = "Replay archived scanner events through their handlers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--network", required=True)
+        parser.add_argument("--handler", required=True, choices=sorted(HANDLERS))
+        parser.add_argument("--contract", help="replay only this contract address")
+        parser.add_argument("--from-block", type=int, default=0)
+        parser.add_argument("--to-block", type=int)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="save events already processed by scanners again",
+        )
+
+    def handle(self, *args, **options):
+        archive = LogArchive.from_config()
+        if archive is None:
+            raise CommandError("SCANNER_ARCHIVE_DIR is not configured")
+        network = Network.objects.filter(name=options["network"]).first()
+        if network is None:
+            raise CommandError(f"Network {options['network']} not found")
+
+        handler_type = options["handler"]
+        addresses = (
+            [options["contract"].lower()]
+            if options["contract"]
+            else archive.get_addresses(network.name, handler_type)
+        )
+        for address in addresses:
+            handler = self.get_handler(network, handler_type, address)
+            if handler is None:
+                self.stderr.write(f"Skip {address}: collection not found")
+                continue
+            if handler_type == HandlerTransferBurn.TYPE:
+                # transfers of trades are saved by the buy handler
+                handler.scanner.exchange_tx_hashes = {
+                    event["transactionHash"].hex()
+                    for event in archive.read(
+                        network.name,
+                        HandlerBuy.TYPE,
+                        network.exchange_address,
+                        options["from_block"],
+                        options["to_block"],
+                    )
+                }
+            events = archive.read(
+                network.name,
+                handler_type,
+                address,
+                options["from_block"],
+                options["to_block"],
+            )
+            saved = 0
+            batch = []
+            for event in events:
+                batch.append(event)
+                if len(batch) >= options["batch_size"]:
+                    saved += self.save_batch(handler, batch, options["force"])
+                    batch = []
+            if batch:
+                saved += self.save_batch(handler, batch, options["force"])
+            self.stdout.write(f"{handler_type} {address}: {saved} events replayed")
+
+    def get_handler(self, network, handler_type, address):
+        handler = HANDLERS[handler_type]
+        contract = None
+        standard = None
+        if handler_type in (
+            HandlerApproval.TYPE,
+            HandlerMint.TYPE,
+            HandlerTransferBurn.TYPE,
+        ):
+            collection = Collection.objects.filter(
+                network=network, address__iexact=address
+            ).first()
+            if collection is None:
+                return None
+            contract = collection.get_contract()
+            standard = collection.standard
+        elif handler_type == HandlerDeploy.TYPE:
+            standard = (
+                "ERC721" if address == network.fabric721_address.lower() else "ERC1155"
+            )
+        scanner = get_scanner(network, standard, contract, synced=True)
+        return handler(network, scanner, contract, standard=standard)
+
+    def save_batch(self, handler, batch, force) -> int:
+        with transaction.atomic():
+            if not force:
+                batch = handler.claim_events(batch)
+            if batch:
+                handler.save_events(batch)
+        return len(batch)
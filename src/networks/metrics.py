@@ -0,0 +1,104 @@
+import json
+import time
+from typing import Dict, Iterable, List, Optional
+
+from src.settings import config
+from src.utilities import RedisClient
+
+# metrics of scanners are written by scanners.metrics.ScannerMetrics
+METRICS_KEY = "scanner_metrics_{network}"
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# lag not updated for that many scan intervals is of a stalled scanner
+LAG_MAX_INTERVALS = 6
+# at least this many seconds, as metrics are flushed every 10 seconds
+LAG_MIN_AGE = 60
+
+
+def get_metrics(network_name: str) -> Dict[str, dict]:
+    key = METRICS_KEY.format(network=network_name)
+    values = RedisClient().connection.hgetall(key)
+    return {name: json.loads(value) for name, value in values.items()}
+
+
+def get_lag(network_name: str, name: str) -> Optional[int]:
+    """Lag of a running scanner, None if it is unknown or outdated"""
+    key = METRICS_KEY.format(network=network_name)
+    value = RedisClient().connection.hget(key, name)
+    if not value:
+        return None
+    metrics = json.loads(value)
+    max_age = max(config.SCANNER_SLEEP * LAG_MAX_INTERVALS, LAG_MIN_AGE)
+    if metrics["updated_at"] and time.time() - metrics["updated_at"] < max_age:
+        return metrics["lag"]
+
+
+def format_labels(**labels) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_histogram(
+    prefix: str, labels: str, buckets: list, count: int, total: float
+) -> List[str]:
+    # buckets are cumulative
+    lines = [
+        f'{prefix}_bucket{{{labels},le="{bucket}"}} {bucket_count}'
+        for bucket, bucket_count in zip(LATENCY_BUCKETS, buckets)
+    ]
+    return lines + [
+        f'{prefix}_bucket{{{labels},le="+Inf"}} {count}',
+        f"{prefix}_sum{{{labels}}} {total}",
+        f"{prefix}_count{{{labels}}} {count}",
+    ]
+
+
+def render_metrics(network_names: Iterable[str]) -> str:
+    """Scanner metrics in the Prometheus text format, per scanner and network"""
+    counters = (
+        "blocks_total",
+        "events_total",
+        "handler_seconds_total",
+        "rpc_requests_total",
+        "rpc_errors_total",
+    )
+    gauges = ("events_per_second", "lag", "block_range", "cursor", "head")
+    lines = []
+    for network_name in network_names:
+        scanners = get_metrics(network_name)
+        totals = dict.fromkeys(counters + ("events_per_second", "rpc_latency_sum"), 0)
+        buckets = [0] * len(LATENCY_BUCKETS)
+        max_lag = 0
+        for name, metrics in sorted(scanners.items()):
+            labels = format_labels(network=network_name, scanner=name)
+            for metric in counters + gauges:
+                if metrics.get(metric) is not None:
+                    lines.append(f"scanner_{metric}{{{labels}}} {metrics[metric]}")
+            if metrics["rpc_requests_total"]:
+                lines += render_histogram(
+                    "scanner_rpc_latency_seconds",
+                    labels,
+                    metrics["rpc_latency_buckets"],
+                    metrics["rpc_requests_total"],
+                    metrics["rpc_latency_sum"],
+                )
+            for metric in totals:
+                totals[metric] += metrics[metric]
+            buckets = [
+                total + count
+                for total, count in zip(buckets, metrics["rpc_latency_buckets"])
+            ]
+            max_lag = max(max_lag, metrics["lag"] or 0)
+
+        labels = format_labels(network=network_name)
+        latency_sum = totals.pop("rpc_latency_sum")
+        for metric, value in totals.items():
+            lines.append(f"scanner_network_{metric}{{{labels}}} {value}")
+        lines.append(f"scanner_network_max_lag{{{labels}}} {max_lag}")
+        lines.append(f"scanner_network_scanners{{{labels}}} {len(scanners)}")
+        lines += render_histogram(
+            "scanner_network_rpc_latency_seconds",
+            labels,
+            buckets,
+            totals["rpc_requests_total"],
+            latency_sum,
+        )
+    return "\n".join(lines) + "\n"
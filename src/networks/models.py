@@ -14,6 +14,8 @@ from contracts import (
     PROMOTION,
     WETH_ABI,
 )
+from src.networks.clients import Web3Registry, to_checksum_address
+from src.networks.providers import ProviderPool, get_providers_health
 from src.settings import config
 from src.utilities import get_media_from_ipfs
 
@@ -26,6 +28,11 @@ class Types(models.TextChoices):
     ethereum = "ethereum"
 
 
+class ProviderStrategy(models.TextChoices):
+    ROUND_ROBIN = ProviderPool.Strategy.ROUND_ROBIN
+    LEAST_LATENCY = ProviderPool.Strategy.LEAST_LATENCY
+
+
 class Address:
     def __init__(self, address):
         self.address = address
@@ -64,6 +71,26 @@ class Network(models.Model):
     api_key = models.CharField(max_length=200)
     auction_timeout = models.DurationField(default=timedelta())
     daily_import_requests = models.IntegerField(null=True, default=None)
+    provider_strategy = models.CharField(
+        max_length=20,
+        choices=ProviderStrategy.choices,
+        default=ProviderStrategy.ROUND_ROBIN,
+        help_text="how requests are spread over network providers",
+    )
+    ws_endpoint = models.CharField(
+        max_length=256,
+        blank=True,
+        null=True,
+        default=None,
+        help_text="websocket endpoint, scanners wake up on its new heads",
+    )
+    confirmation_depth = models.PositiveIntegerField(
+        default=5,
+        help_text=(
+            "blocks behind the head scanned by transfer and buy scanners, "
+            "below 5 their blocks are checked for reorgs and rolled back"
+        ),
+    )
 
     def __str__(self):
         return self.name
@@ -74,10 +101,12 @@ class Network(models.Model):
             return get_media_from_ipfs(self.icon)
 
     @property
-    def web3(self):
-        return Web3(
-            Web3.HTTPProvider(self.providers.all().values_list("endpoint", flat=True))
-        )
+    def web3(self) -> Web3:
+        return Web3Registry.get_web3(self)
+
+    @property
+    def providers_health(self) -> list:
+        return get_providers_health(self.name)
 
     @property
     def deadline_timestamp(self) -> int:
@@ -87,8 +116,7 @@ class Network(models.Model):
     def _get_contract_by_abi(self, abi: "ABI", address: str = None) -> "Contract":
         if address:
             address = self.wrap_in_checksum(address)
-        contract = self.web3.eth.contract(address=address, abi=abi)
-        return contract
+        return Web3Registry.get_contract(self, abi, address)
 
     def get_erc721fabric_contract(self) -> "Contract":
         return self._get_contract_by_abi(ERC721_FABRIC, self.fabric721_address)
@@ -126,7 +154,7 @@ class Network(models.Model):
     def wrap_in_checksum(self, address: str) -> str:
         """Wrap address to checksum for EVM"""
         if self.network_type == Types.ethereum:
-            return self.web3.toChecksumAddress(address)
+            return to_checksum_address(address)
         return address
 
     def contract_call(self, method_type: str, **kwargs):
@@ -219,6 +247,81 @@ class Provider(models.Model):
         on_delete=models.CASCADE,
         related_name="providers",
     )
+    max_concurrency = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        default=None,
+        help_text="maximum number of parallel requests to endpoint",
+    )
 
     def __str__(self):
         return self.endpoint
+
+
+class ScannedBlock(models.Model):
+    """
+    Block processed by a scanner before it became final.
+
+    Kept only by scanners which follow the head closer than
+    the final depth, to detect reorgs and roll back transactions
+    of orphaned blocks.
+    """
+
+    network = models.ForeignKey(
+        Network,
+        on_delete=models.CASCADE,
+        related_name="scanned_blocks",
+    )
+    scanner = models.CharField(max_length=200)
+    number = models.PositiveBigIntegerField()
+    hash = models.CharField(max_length=66)
+    tx_hashes = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["network", "scanner", "number"],
+                name="unique_scanned_block",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scanner} #{self.number}"
+
+
+class ScannerCursor(models.Model):
+    """
+    Next block of a scanner, saved in the transaction of the events
+    processed before it.
+    """
+
+    name = models.CharField(max_length=200, unique=True)
+    block = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.block}"
+
+
+class ProcessedLog(models.Model):
+    """Log already saved by a scanner handler, replayed logs are skipped"""
+
+    network = models.ForeignKey(
+        Network,
+        on_delete=models.CASCADE,
+        related_name="processed_logs",
+    )
+    handler = models.CharField(max_length=20)
+    tx_hash = models.CharField(max_length=66)
+    log_index = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tx_hash", "log_index", "network", "handler"],
+                name="unique_processed_log",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.handler} {self.tx_hash}:{self.log_index}"
@@ -0,0 +1,224 @@
+import json
+import logging
+import threading
+import time
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from web3 import HTTPProvider
+from web3.providers.base import BaseProvider
+
+from src.utilities import RedisClient
+
+
+class EndpointState:
+    """Provider endpoint with its health counters"""
+
+    LATENCY_WEIGHT = 0.2
+
+    def __init__(self, endpoint: str, max_concurrency: Optional[int]) -> None:
+        self.endpoint = endpoint
+        self.provider = HTTPProvider(
+            endpoint, request_kwargs={"timeout": ProviderPool.REQUEST_TIMEOUT}
+        )
+        self.semaphore = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.latency = None
+        self.cooldown_until = 0
+
+    @property
+    def is_available(self) -> bool:
+        return self.cooldown_until <= time.monotonic()
+
+    def acquire(self, blocking: bool) -> bool:
+        if self.semaphore and not self.semaphore.acquire(blocking=blocking):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float) -> None:
+        self.in_flight -= 1
+        self.requests += 1
+        # exponentially weighted average, recent calls matter more
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.LATENCY_WEIGHT * (latency - self.latency)
+        if self.semaphore:
+            self.semaphore.release()
+
+    def cool_down(self, seconds: int) -> None:
+        self.cooldown_until = time.monotonic() + seconds
+
+    def get_health(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.endpoint,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "in_flight": self.in_flight,
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "cooldown": max(round(self.cooldown_until - time.monotonic()), 0),
+        }
+
+
+class ProviderPool(BaseProvider):
+    """
+    web3 provider which spreads requests over all network providers.
+
+    Endpoints are picked round-robin or by the lowest average latency.
+    Endpoints answering with rate-limit errors, timeouts or connection
+    errors are put on cooldown and the request is retried on the next one.
+    Health counters of endpoints are published to the Redis hash
+    provider_health_<network name>.
+    """
+
+    class Strategy:
+        ROUND_ROBIN = "round_robin"
+        LEAST_LATENCY = "least_latency"
+
+    REQUEST_TIMEOUT = 30
+    RATE_LIMIT_COOLDOWN = 60
+    ERROR_COOLDOWN = 15
+    HEALTH_INTERVAL = 10
+    # -32005 also means "too many results" for eth_getLogs: it is not
+    # a provider problem, scanners handle it by reducing block range
+    RATE_LIMIT_CODES = (-32005, -32029, 429)
+
+    def __init__(
+        self,
+        network_name: str,
+        endpoints: List[Tuple[str, Optional[int]]],
+        strategy: str = Strategy.ROUND_ROBIN,
+    ) -> None:
+        super().__init__()
+        self.network_name = network_name
+        self.strategy = strategy
+        self.endpoints = [
+            EndpointState(endpoint, max_concurrency)
+            for endpoint, max_concurrency in endpoints
+        ]
+        self.counter = count()
+        self.health_published_at = 0
+
+    def __str__(self):
+        return f"ProviderPool {self.network_name}: {len(self.endpoints)} endpoints"
+
+    @property
+    def health_key(self) -> str:
+        return f"provider_health_{self.network_name}"
+
+    def get_candidates(self) -> List[EndpointState]:
+        """Return endpoints in order of preference"""
+        available = [state for state in self.endpoints if state.is_available]
+        if not available:
+            # everything is cooling down, try the one which recovers first
+            return sorted(self.endpoints, key=lambda state: state.cooldown_until)
+        if self.strategy == self.Strategy.LEAST_LATENCY:
+            # endpoints without measurements go first to get measured
+            return sorted(
+                available,
+                key=lambda state: (state.latency is not None, state.latency or 0),
+            )
+        shift = next(self.counter) % len(available)
+        return available[shift:] + available[:shift]
+
+    def is_rate_limited(self, response: Dict[str, Any]) -> bool:
+        error = response.get("error")
+        if (
+            not isinstance(error, dict)
+            or error.get("code") not in self.RATE_LIMIT_CODES
+        ):
+            return False
+        return "result" not in str(error.get("message", "")).lower()
+
+    def make_request(self, method, params):
+        candidates = self.get_candidates()
+        if not candidates:
+            raise ValueError(f"No providers for network {self.network_name}")
+
+        response, error, busy = None, None, []
+        for state in candidates:
+            # respect endpoint concurrency caps
+            if not state.acquire(blocking=False):
+                busy.append(state)
+                continue
+            response, error = self.send(state, method, params)
+            if error is None:
+                return response
+
+        # free endpoints failed, wait for the best busy one
+        if busy:
+            busy[0].acquire(blocking=True)
+            response, error = self.send(busy[0], method, params)
+            if error is None:
+                return response
+
+        # let the caller see the provider error response
+        if response is not None:
+            return response
+        raise error
+
+    def send(self, state: EndpointState, method, params) -> Tuple[Any, Any]:
+        """
+        Return response and error,
+        error is set if the request should be retried on another endpoint.
+        """
+        started_at = time.monotonic()
+        try:
+            response = state.provider.make_request(method, params)
+        except requests.exceptions.HTTPError as e:
+            state.errors += 1
+            if e.response is not None and e.response.status_code == 429:
+                state.rate_limited += 1
+                state.cool_down(self.RATE_LIMIT_COOLDOWN)
+            else:
+                state.cool_down(self.ERROR_COOLDOWN)
+            return None, e
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            state.errors += 1
+            state.cool_down(self.ERROR_COOLDOWN)
+            return None, e
+        finally:
+            state.release(time.monotonic() - started_at)
+            self.publish_health()
+
+        if self.is_rate_limited(response):
+            logging.warning(f"{state.endpoint} is rate limited: {response['error']}")
+            state.rate_limited += 1
+            state.cool_down(self.RATE_LIMIT_COOLDOWN)
+            return response, ValueError(response["error"])
+        return response, None
+
+    def isConnected(self) -> bool:
+        return any(state.provider.isConnected() for state in self.endpoints)
+
+    def get_health(self) -> List[Dict[str, Any]]:
+        return [state.get_health() for state in self.endpoints]
+
+    def publish_health(self) -> None:
+        if time.monotonic() - self.health_published_at < self.HEALTH_INTERVAL:
+            return
+        self.health_published_at = time.monotonic()
+        try:
+            RedisClient().connection.hset(
+                self.health_key,
+                mapping={
+                    health["endpoint"]: json.dumps(health)
+                    for health in self.get_health()
+                },
+            )
+        except Exception as e:
+            logging.warning(f"Cannot publish provider health: {e}")
+
+
+def get_providers_health(network_name: str) -> List[Dict[str, Any]]:
+    """Return last published health of network endpoints"""
+    health = RedisClient().connection.hgetall(f"provider_health_{network_name}")
+    return [json.loads(value) for value in health.values()]
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from src.networks.clients import Web3Registry
+from src.networks.models import Network, Provider
+
+
+@receiver(post_save, sender=Network)
+@receiver(post_delete, sender=Network)
+def network_changed_dispatcher(sender, instance, *args, **kwargs):
+    """
+    drop cached web3 client of the network
+    """
+    Web3Registry.invalidate(instance.id)
+
+
+@receiver(post_save, sender=Provider)
+@receiver(post_delete, sender=Provider)
+def provider_changed_dispatcher(sender, instance, *args, **kwargs):
+    """
+    drop cached web3 client of the provider network
+    """
+    Web3Registry.invalidate(instance.network_id)
@@ -1,9 +1,15 @@
+from datetime import timedelta
+
 from celery import shared_task
+from django.utils import timezone
+
 from src.bot.services import send_message
-from src.networks.models import Network
+from src.networks.models import Network, ProcessedLog
 from src.settings import config
 from src.utilities import alert_bot
 
+PROCESSED_LOGS_DAYS = 7
+
 
 @shared_task(name="balance_checker")
 @alert_bot
@@ -18,3 +24,14 @@ def balance_checker():
             )
     if alerts:
         send_message(alerts, ["trade"])
+
+
+@shared_task(name="clear_processed_logs")
+def clear_processed_logs():
+    """
+    Replays of scanner ranges happen within minutes, older processed
+    logs only take space.
+    """
+    ProcessedLog.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=PROCESSED_LOGS_DAYS)
+    ).delete()
@@ -1,12 +1,13 @@
 from django.urls import path
 
-from src.networks.views import NetworksModelView
+from src.networks.views import NetworksModelView, ScannerMetricsView
 
 urlpatterns = [
     path(
         "",
         NetworksModelView.as_view({"get": "list"}),
     ),
+    path("scanner_metrics/", ScannerMetricsView.as_view()),
     path(
         "<str:name>",
         NetworksModelView.as_view({"get": "retrieve"}),
@@ -1,7 +1,14 @@
+import hmac
+
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from src.networks.metrics import render_metrics
 from src.networks.models import Network
 from src.networks.serializers import NetworkSerializer
+from src.settings import config
 
 
 class NetworksModelView(ModelViewSet):
@@ -10,3 +17,27 @@ class NetworksModelView(ModelViewSet):
     serializer_class = NetworkSerializer
     queryset = Network.objects.all()
     lookup_field = "name"
+
+
+class IsStaffOrMetricsToken(BasePermission):
+    """Staff users or scrapers with the SCANNER_METRICS_TOKEN bearer token"""
+
+    def has_permission(self, request, view):
+        token = config.SCANNER_METRICS_TOKEN
+        authorization = request.headers.get("Authorization", "")
+        if token and hmac.compare_digest(authorization, f"Bearer {token}"):
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+class ScannerMetricsView(APIView):
+    """Return scanner lag and throughput metrics in the Prometheus text format."""
+
+    swagger_schema = None
+    permission_classes = [IsStaffOrMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(
+            render_metrics(Network.objects.values_list("name", flat=True)),
+            content_type="text/plain; version=0.0.4",
+        )
@@ -7,6 +7,7 @@ import requests
 from celery import shared_task
 from src.rates.models import UsdRate
 from src.settings import config
+from src.store.models import Token
 from src.utilities import alert_bot
 
 QUERY_FSYM = "usd"
@@ -34,3 +35,4 @@ def rates_checker():
             continue
         rates = UsdRate.objects.filter(coin_node=coin_node)
         rates.update(rate=rate)
+        Token.objects.priced_in(rates).refresh_prices()
@@ -2,18 +2,19 @@ import json
 import logging
 import operator
 from abc import ABC, abstractmethod
-from datetime import datetime
 from decimal import Decimal
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Count, Exists, OuterRef, Q
+from django.db.models import Exists, F, OuterRef, Q, Subquery
 from django.utils import timezone
 
 from src.accounts.models import AdvUser
 from src.accounts.serializers import UserFollowSerializer
 from src.activity.models import TokenHistory, UserAction
-from src.store.models import Bid, Category, Collection, Ownership, Token
+from src.services.text_search import search_text
+from src.store.models import Bid, Category, Collection, Ownership, Token, ViewsTracker
 from src.store.serializers import CompositeCollectionSerializer, TokenSerializer
+from src.utilities import count_subquery
 
 
 class SearchABC(ABC):
@@ -33,16 +34,41 @@ class SearchABC(ABC):
             many=True,
         ).data
 
+    def ordered(self, queryset, field, reverse):
+        """
+        Order queryset by field with the id as tie breaker,
+        empty values sort as the smallest ones
+        """
+        if reverse:
+            return queryset.order_by(F(field).desc(nulls_last=True), "-id")
+        return queryset.order_by(F(field).asc(nulls_first=True), "id")
+
+    def order_by(self, order_by):
+        order_by = order_by[0]
+        reverse = order_by.startswith("-")
+        order_by = order_by.lstrip("-")
+        if not hasattr(self, f"order_by_{order_by}"):
+            logging.warning(f"Unknown sort method {order_by}")
+            return
+        self.items = getattr(self, f"order_by_{order_by}")(reverse)
+
+    def order_by_relevance(self, reverse):
+        if "search_rank" not in self.items.query.annotations:
+            return self.items
+        # the most relevant first, reversed for "-relevance"
+        return self.ordered(self.items, "search_rank", not reverse)
+
     def parse(self, **kwargs):
         self.initial()
         self.remove_unused_kwargs(kwargs)
 
         self.currency_symbol = kwargs.get("currency", [None])[0]
         self.user = kwargs.pop("current_user", None)
+        # text searches are ranked by relevance unless sorted explicitly
         order_by = kwargs.pop(
             "order_by",
             [
-                "-created_at",
+                "relevance" if kwargs.get("text", [None])[0] else "-created_at",
             ],
         )
 
@@ -54,7 +80,7 @@ class SearchABC(ABC):
             except Exception as e:
                 logging.error(e)
 
-        if order_by and order_by[0] and hasattr(self, "order_by"):
+        if order_by and order_by[0]:
             self.order_by(order_by)
 
         return self.items
@@ -84,9 +110,7 @@ class SearchToken(SearchABC):
 
     def text(self, words):
         if words and words[0]:
-            words = words[0].split(" ")
-            for word in words:
-                self.items = self.items.filter(name__icontains=word)
+            self.items = search_text(self.items, "name", words[0])
 
     def stats(self, stats):
         if stats and stats[0]:
@@ -149,24 +173,22 @@ class SearchToken(SearchABC):
             self.items = self.items.filter(owners__is_verificated=is_verified)
 
     def _price_filter_tokens(self, price, type_):
-        relate = operator.ge
+        relate, lookup = operator.ge, "gte"
         if type_ == "max_price":
-            relate = operator.le
+            relate, lookup = operator.le, "lte"
         price = str(price[0]).replace(".", "") if price and price[0] else ""
         if price.isdigit():
             self.on_any_sale("")
             filter_price = Decimal(price)
 
-            price_field = "usd_price" if not self.currency_symbol else "price"
-            token_ids = [
-                token.id
-                for token in self.items
-                if relate(
-                    getattr(token, price_field) if getattr(token, price_field) else 0,
-                    filter_price,
-                )
-            ]
-            self.items = Token.objects.committed().filter(id__in=token_ids)
+            price_field = "listing_usd_price"
+            if self.currency_symbol:
+                price_field = "listing_price"
+            price_filter = Q(**{f"{price_field}__{lookup}": filter_price})
+            # tokens without price compare as zero
+            if relate(0, filter_price):
+                price_filter |= Q(**{f"{price_field}__isnull": True})
+            self.items = self.items.filter(price_filter)
 
     def min_price(self, price):
         self._price_filter_tokens(price, "min_price")
@@ -346,72 +368,80 @@ class SearchToken(SearchABC):
                     collection__game_subcategory__category__game__id=game[0]
                 )
 
-    def order_by_price(self, token, reverse=False):
-        default_value = 0 if reverse else float("inf")
-        token_price = (
-            token.get_highest_bid().usd_amount
-            if token.get_highest_bid()
-            else token.usd_price
+    def order_by_likes(self, reverse):
+        likes = UserAction.objects.filter(token=OuterRef("id"), method="like")
+        return self.ordered(
+            self.items.annotate(likes_count=count_subquery(likes)),
+            "likes_count",
+            reverse,
         )
-        return token_price or default_value
-
-    def order_by_likes(self, token, reverse=False):
-        return token.likes.count()
 
-    def order_by_created_at(self, token, reverse=False):
-        return token.created_at
+    def order_by_created_at(self, reverse):
+        return self.ordered(self.items, "created_at", reverse)
 
-    def order_by_views(self, token, reverse=False):
-        return token.views.count()
+    def order_by_views(self, reverse):
+        views = ViewsTracker.objects.filter(token=OuterRef("id"))
+        return self.ordered(
+            self.items.annotate(views_count=count_subquery(views)),
+            "views_count",
+            reverse,
+        )
 
-    def order_by_sale(self, token, reverse=False):
-        history = token.history.filter(method="Buy").order_by("date").last()
-        if history and history.date:
-            return history.date
-        return timezone.make_aware(datetime.fromtimestamp(0))
+    def _last_history(self, method, field):
+        return Subquery(
+            TokenHistory.objects.filter(token=OuterRef("id"), method=method)
+            .order_by("-date")
+            .values(field)[:1]
+        )
 
-    def order_by_transfer(self, token, reverse=False):
-        history = token.history.filter(method="Transfer").order_by("date").last()
-        if history and history.date:
-            return history.date
-        return timezone.make_aware(datetime.fromtimestamp(0))
+    def order_by_sale(self, reverse):
+        return self.ordered(
+            self.items.annotate(sale_date=self._last_history("Buy", "date")),
+            "sale_date",
+            reverse,
+        )
 
-    def order_by_auction_end(self, token, reverse=False):
-        default_value = timezone.make_aware(datetime.fromtimestamp(0))
-        if token.is_timed_auc_selling:
-            return token._end_auction
-        return default_value
+    def order_by_transfer(self, reverse):
+        return self.ordered(
+            self.items.annotate(transfer_date=self._last_history("Transfer", "date")),
+            "transfer_date",
+            reverse,
+        )
 
-    def order_by_last_sale(self, token, reverse=False):
-        history = token.history.filter(method="Buy").order_by("date").last()
-        if history and history.price:
-            return history.price
-        return 0
+    def order_by_auction_end(self, reverse):
+        now_ = timezone.now()
+        # same conditions as Token.is_timed_auc_selling
+        auctions = Ownership.objects.filter(
+            token=OuterRef("id"),
+            token__collection__standard="ERC721",
+            selling=True,
+            minimal_bid__isnull=False,
+            currency__isnull=False,
+            _start_auction__lte=now_,
+            _end_auction__gte=now_,
+        ).order_by("_end_auction")
+        return self.ordered(
+            self.items.annotate(
+                auction_end=Subquery(auctions.values("_end_auction")[:1])
+            ),
+            "auction_end",
+            reverse,
+        )
 
-    def order_by(self, order_by):
-        tokens = list(self.items)
-        reverse = False
-        if order_by is not None:
-            order_by = order_by[0]
-            if order_by.startswith("-"):
-                order_by = order_by[1:]
-                reverse = True
-
-        if hasattr(self, f"order_by_{order_by}"):
-            try:
-                tokens = sorted(
-                    tokens,
-                    key=lambda token: getattr(self, f"order_by_{order_by}")(
-                        token, reverse
-                    ),
-                    reverse=reverse,
-                )
-            except AttributeError as e:
-                logging.error(e)
-        else:
-            logging.warning(f"Unknown token sort method {order_by}")
+    def order_by_last_sale(self, reverse):
+        return self.ordered(
+            self.items.annotate(last_sale=self._last_history("Buy", "price")),
+            "last_sale",
+            reverse,
+        )
 
-        self.items = tokens
+    def order_by_price(self, reverse):
+        # tokens without price go last in both directions
+        price = F("listing_usd_price")
+        return self.items.order_by(
+            price.desc(nulls_last=True) if reverse else price.asc(nulls_last=True),
+            "-id",
+        )
 
 
 class SearchCollection(SearchABC):
@@ -447,9 +477,7 @@ class SearchCollection(SearchABC):
 
     def text(self, words):
         if words and words[0]:
-            words = words[0].split(" ")
-            for word in words:
-                self.items = self.items.filter(name__icontains=word)
+            self.items = search_text(self.items, "name", words[0])
 
     def network(self, network):
         if network and network[0]:
@@ -494,33 +522,11 @@ class SearchCollection(SearchABC):
                 subcategories.remove(None)
             self.items = self.items.filter(game_subcategory__in=subcategories)
 
-    def order_by_name(self, collection, reverse=False):
-        return collection.name
-
-    def order_by(self, order_by):
-        collections = list(self.items)
-        reverse = False
-        if order_by is not None:
-            order_by = order_by[0]
-            if order_by.startswith("-"):
-                order_by = order_by[1:]
-                reverse = True
-
-        if hasattr(self, f"order_by_{order_by}"):
-            try:
-                collections = sorted(
-                    collections,
-                    key=lambda collection: getattr(self, f"order_by_{order_by}")(
-                        collection, reverse
-                    ),
-                    reverse=reverse,
-                )
-            except AttributeError as e:
-                logging.error(e)
-        else:
-            logging.warning(f"Unknown token sort method {order_by}")
+    def order_by_name(self, reverse):
+        return self.ordered(self.items, "name", reverse)
 
-        self.items = collections
+    def order_by_created_at(self, reverse):
+        return self.ordered(self.items, "created_at", reverse)
 
 
 class SearchUser(SearchABC):
@@ -530,35 +536,28 @@ class SearchUser(SearchABC):
 
     def text(self, words):
         if words and words[0]:
-            words = words[0].split(" ")
-            for word in words:
-                self.items = self.items.filter(display_name__icontains=word)
+            self.items = search_text(self.items, "display_name", words[0])
 
     def verificated(self, verificated):
         self.items = self.items.filter(is_verificated=verificated[0].lower() == "true")
 
     def order_by_created(self, reverse):
-        return self.items.order_by(f"{reverse}id")
+        return self.ordered(self.items, "id", reverse)
 
     def order_by_followers(self, reverse):
-        return self.items.annotate(follow_count=Count("following")).order_by(
-            f"{reverse}follow_count"
+        followers = UserAction.objects.filter(whom_follow=OuterRef("id"))
+        return self.ordered(
+            self.items.annotate(follow_count=count_subquery(followers)),
+            "follow_count",
+            reverse,
         )
 
     def order_by_tokens_created(self, reverse):
-        return self.items.annotate(creators=Count("token_creator")).order_by(
-            f"{reverse}creators"
+        tokens = Token.objects.filter(creator=OuterRef("id"))
+        return self.ordered(
+            self.items.annotate(creators=count_subquery(tokens)), "creators", reverse
         )
 
-    def order_by(self, order_by):
-        reverse = "-" if order_by[0] == "-" else ""
-        order_by = order_by.strip("-")
-        try:
-            users = getattr(self, f"order_by_{order_by}")(reverse)
-        except AttributeError:
-            logging.warning(f"Unknown token sort method {order_by}")
-        self.items = users
-
 
 Search = {
     "token": SearchToken(),
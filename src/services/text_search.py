@@ -0,0 +1,72 @@
+import logging
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+
+# (app label, model name, column) served by pg_trgm GIN indexes,
+# built by the build_search_indexes command
+SEARCH_INDEXES = [
+    ("store", "Token", "name"),
+    ("store", "Collection", "name"),
+    ("accounts", "AdvUser", "display_name"),
+]
+
+# minimal similarity of a value without every word of the text,
+# above pg_trgm default threshold to skip values sharing a single word
+TYPO_SIMILARITY = 0.45
+
+
+_trigram_available = None
+
+
+def trigram_available() -> bool:
+    """
+    Whether the pg_trgm extension is installed, checked once per process.
+    The extension is created by the build_search_indexes command.
+    """
+    global _trigram_available
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )
+            _trigram_available = cursor.fetchone()[0]
+        if not _trigram_available:
+            logging.warning("pg_trgm is not available, search without ranking")
+    return _trigram_available
+
+
+def search_text(queryset, field, text, prefix=False):
+    """
+    Filter queryset by the words of text in field, annotate search_rank.
+
+    Values containing every word match. Full search also matches values
+    similar to the text, to tolerate typos. Both lookups are served by
+    trigram indexes, so the cost does not grow with the table as ILIKE
+    scans do. With prefix values starting with the text rank first, as
+    presearch suggestions are typed from the beginning. Without pg_trgm
+    values are only matched by words and ranked by prefix.
+    """
+    words = text.split()
+    if not words:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+    matches = Q()
+    for word in words:
+        matches &= Q(**{f"{field}__icontains": word})
+    trigram = trigram_available()
+    if trigram:
+        rank = TrigramSimilarity(field, text)
+    else:
+        rank = Value(0.0, output_field=FloatField())
+    if trigram and not prefix:
+        matches |= Q(
+            **{f"{field}__trigram_similar": text, "search_rank__gte": TYPO_SIMILARITY}
+        )
+    if prefix:
+        rank = rank + Case(
+            When(**{f"{field}__istartswith": text}, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    return queryset.annotate(search_rank=rank).filter(matches)
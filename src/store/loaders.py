@@ -0,0 +1,185 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Count, Sum, prefetch_related_objects
+from django.utils import timezone
+
+from src.activity.models import UserAction
+from src.promotion.models import Promotion
+from src.store.models import Bid, Ownership, Token, TransactionTracker
+
+
+class TokenLoader:
+    """
+    Data for serializing a list of tokens, loaded with a fixed number of
+    queries for the whole list. Methods mirror the Token properties
+    which query the database per token.
+    """
+
+    def __init__(self, tokens: Iterable["Token"], user=None):
+        self.tokens = {token.id: token for token in tokens}
+        self.user = user if user and not user.is_anonymous else None
+        token_ids = list(self.tokens)
+        prefetch_related_objects(
+            list(self.tokens.values()),
+            "creator",
+            "category__tags",
+            "collection__network__currencies__network",
+        )
+
+        self.ownerships: Dict[int, List["Ownership"]] = defaultdict(list)
+        for ownership in (
+            Ownership.objects.filter(token_id__in=token_ids)
+            .select_related("owner", "currency__network")
+            .order_by("id")
+        ):
+            self.ownerships[ownership.token_id].append(ownership)
+
+        self.bids: Dict[int, List["Bid"]] = defaultdict(list)
+        for bid in (
+            Bid.objects.committed()
+            .filter(token_id__in=token_ids)
+            .select_related("user", "currency")
+            .order_by("id")
+        ):
+            self.bids[bid.token_id].append(bid)
+
+        self.promotions: Dict[int, List["Promotion"]] = defaultdict(list)
+        for promotion in (
+            Promotion.objects.filter(token_id__in=token_ids)
+            .select_related("owner")
+            .order_by("id")
+        ):
+            self.promotions[promotion.token_id].append(promotion)
+
+        self.tracker_amounts = dict(
+            TransactionTracker.objects.filter(ownership__token_id__in=token_ids)
+            .values("ownership")
+            .annotate(amount=Sum("amount"))
+            .values_list("ownership", "amount")
+        )
+        likes = UserAction.objects.filter(token_id__in=token_ids).order_by()
+        self.like_counts = dict(
+            likes.values("token")
+            .annotate(count=Count("id"))
+            .values_list("token", "count")
+        )
+        self.liked_ids = set()
+        if self.user:
+            self.liked_ids = set(
+                likes.filter(user=self.user).values_list("token_id", flat=True)
+            )
+
+    def is_single(self, token: "Token") -> bool:
+        return token.collection.standard == "ERC721"
+
+    def get_highest_bid(self, token: "Token") -> Optional["Bid"]:
+        bids = self.bids[token.id]
+        if bids:
+            return max(bids, key=lambda bid: bid.usd_amount)
+
+    def get_sellers(self, token: "Token") -> List["Ownership"]:
+        """Selling ownerships ordered by price, unpriced last"""
+        sellers = [o for o in self.ownerships[token.id] if o.selling]
+        return sorted(sellers, key=lambda o: (o.price is None, o.price or 0))
+
+    def get_available(self, token: "Token") -> int:
+        return sum(
+            max((o.selling_quantity or 0) - self.tracker_amounts.get(o.id, 0), 0)
+            for o in self.get_sellers(token)
+        )
+
+    def get_price_or_minimal_bid(self, ownership: "Ownership"):
+        """Ownership.price_or_minimal_bid without querying the highest bid"""
+        highest_bid = self.get_highest_bid(self.tokens[ownership.token_id])
+        if highest_bid:
+            return highest_bid.amount
+        return ownership.price or ownership.minimal_bid
+
+    def get_price_or_minimal_bid_usd(self, ownership: "Ownership"):
+        price = self.get_price_or_minimal_bid(ownership)
+        if price and ownership.currency:
+            return price * ownership.currency.rate
+
+    def get_cheapest_ownership(self, token: "Token") -> Optional["Ownership"]:
+        sellers = [o for o in self.ownerships[token.id] if o.selling]
+        if sellers:
+            return min(
+                sellers, key=lambda o: self.get_price_or_minimal_bid_usd(o) or 2 ** 256
+            )
+
+    def get_currency(self, token: "Token"):
+        ownership = self.get_cheapest_ownership(token)
+        if ownership:
+            return ownership.currency
+
+    def get_price(self, token: "Token"):
+        ownership = self.get_cheapest_ownership(token)
+        if ownership:
+            return self.get_price_or_minimal_bid(ownership)
+
+    def get_usd_price(self, token: "Token"):
+        ownership = self.get_cheapest_ownership(token)
+        if ownership:
+            return self.get_price_or_minimal_bid_usd(ownership)
+
+    def get_minimal_bid(self, token: "Token"):
+        for ownership in self.ownerships[token.id]:
+            if ownership.minimal_bid is not None:
+                return ownership.minimal_bid
+
+    def is_selling(self, token: "Token") -> bool:
+        return any(
+            o.selling and o.price is not None and o.currency_id
+            for o in self.ownerships[token.id]
+        )
+
+    def is_auc_selling(self, token: "Token") -> bool:
+        return self.is_single(token) and any(
+            o.selling
+            and o.minimal_bid is not None
+            and o.currency_id
+            and o._end_auction is None
+            for o in self.ownerships[token.id]
+        )
+
+    def is_timed_auc_selling(self, token: "Token") -> bool:
+        now_ = timezone.now()
+        return self.is_single(token) and any(
+            o.selling
+            and o.minimal_bid is not None
+            and o.currency_id
+            and o._start_auction
+            and o._end_auction
+            and o._start_auction <= now_ <= o._end_auction
+            for o in self.ownerships[token.id]
+        )
+
+    def get_end_auction(self, token: "Token"):
+        ownerships = self.ownerships[token.id]
+        if self.is_single(token) and ownerships:
+            return ownerships[0].end_auction
+
+    def is_owner(self, token: "Token") -> bool:
+        return bool(self.user) and any(
+            o.owner_id == self.user.id for o in self.ownerships[token.id]
+        )
+
+    def get_like_count(self, token: "Token") -> int:
+        return self.like_counts.get(token.id, 0)
+
+    def is_liked(self, token: "Token") -> bool:
+        return token.id in self.liked_ids
+
+    def is_on_promotion(self, token: "Token") -> bool:
+        return any(
+            promotion.status == Promotion.PromotionStatus.IN_PROGRESS
+            for promotion in self.promotions[token.id]
+        )
+
+    def get_last_promotion(self, token: "Token", user=None) -> Optional["Promotion"]:
+        promotions = self.promotions[token.id]
+        if user:
+            promotions = [p for p in promotions if p.owner.owner_id == user.id]
+        if promotions:
+            return promotions[-1]
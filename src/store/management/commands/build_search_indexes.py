@@ -0,0 +1,43 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from src.services.text_search import SEARCH_INDEXES
+
+
+class Command(BaseCommand):
+    help = "Build or refresh trigram indexes used by text search"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Reindex existing indexes, e.g. after bulk imports",
+        )
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for app_label, model_name, field_name in SEARCH_INDEXES:
+                model = apps.get_model(app_label, model_name)
+                table = model._meta.db_table
+                column = model._meta.get_field(field_name).column
+                quoted = connection.ops.quote_name(column)
+                # similarity lookups use the column, icontains and
+                # istartswith compare UPPER(column::text)
+                expressions = {
+                    f"{table}_{column}_trgm": quoted,
+                    f"{table}_{column}_upper_trgm": f"(UPPER({quoted}::text))",
+                }
+                for name, expression in expressions.items():
+                    index = connection.ops.quote_name(name)
+                    # concurrently to keep the table writable on live databases
+                    cursor.execute(
+                        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} "
+                        f"ON {connection.ops.quote_name(table)} "
+                        f"USING gin ({expression} gin_trgm_ops)"
+                    )
+                    if options["rebuild"]:
+                        cursor.execute(f"REINDEX INDEX CONCURRENTLY {index}")
+                    self.stdout.write(f"Index {index} on {table}.{column} is ready")
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
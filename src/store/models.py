@@ -1,15 +1,18 @@
 import json
 import time
 from datetime import datetime
-from typing import Optional
+from decimal import Decimal
+from typing import Iterable, Optional
 
 import requests
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Exists, OuterRef, Q
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 
 from src.consts import MAX_AMOUNT_LEN, TOKEN_MINT_GAS_LIMIT
+from src.networks.metrics import get_lag
 from src.networks.models import Network
 from src.settings import config
 from src.store.controllers import TokenController
@@ -17,7 +20,7 @@ from src.store.exchange import CollectionExchange, TokenExchange
 from src.store.validators import TokenValidator
 from src.support.models import EmailConfig
 from src.support.validators import royalty_max_value_validator
-from src.utilities import RedisClient, get_media_from_ipfs
+from src.utilities import RedisClient, count_subquery, get_media_from_ipfs, sum_subquery
 
 from .services.ipfs import get_ipfs_by_hash
 
@@ -85,6 +88,34 @@ class CollectionQuerySet(models.QuerySet):
             return self
         return self.filter(game_category__name__iexact=game_category_name)
 
+    def refresh_floors(self) -> int:
+        """
+        Recompute floor columns with one UPDATE: the committed token on sale
+        with the lowest listing price in USD.
+        """
+        tokens = (
+            Token.objects.filter(
+                collection=OuterRef("pk"),
+                deleted=False,
+                status=Status.COMMITTED,
+                listing_usd_price__isnull=False,
+            )
+            .filter(
+                Exists(
+                    Ownership.objects.filter(
+                        token=OuterRef("pk"), selling=True, currency__isnull=False
+                    )
+                )
+            )
+            .order_by("listing_usd_price", "id")
+        )
+        return self.update(
+            floor_token=Subquery(tokens.values("id")[:1]),
+            floor_price=Subquery(tokens.values("listing_price")[:1]),
+            floor_usd_price=Subquery(tokens.values("listing_usd_price")[:1]),
+            floor_currency=Subquery(tokens.values("listing_currency")[:1]),
+        )
+
 
 class CollectionManager(models.Manager):
     def get_queryset(self):
@@ -176,6 +207,37 @@ class Collection(models.Model):
     instagram = models.CharField(max_length=50, blank=True, null=True, default=None)
     medium = models.CharField(max_length=50, blank=True, null=True, default=None)
     telegram = models.CharField(max_length=50, blank=True, null=True, default=None)
+    # floor maintained by CollectionQuerySet.refresh_floors with token prices
+    floor_token = models.ForeignKey(
+        "Token",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        default=None,
+        related_name="+",
+    )
+    floor_price = models.DecimalField(
+        max_digits=MAX_AMOUNT_LEN,
+        decimal_places=18,
+        blank=True,
+        null=True,
+        default=None,
+    )
+    floor_usd_price = models.DecimalField(
+        max_digits=MAX_AMOUNT_LEN,
+        decimal_places=18,
+        blank=True,
+        null=True,
+        default=None,
+    )
+    floor_currency = models.ForeignKey(
+        "rates.UsdRate",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        default=None,
+        related_name="+",
+    )
 
     objects = CollectionManager()
 
@@ -220,6 +282,10 @@ class Collection(models.Model):
     def block_difference(self):
         if self.status not in [Status.COMMITTED, Status.IMPORTING]:
             return None
+        # reported by the running scanner without querying the node
+        lag = get_lag(self.network.name, self.transfer_block_name)
+        if lag is not None:
+            return lag
         connection = RedisClient().connection
         last_block_number = connection.get(self.network.name)
         if not last_block_number:
@@ -379,6 +445,96 @@ def validate_nonzero(value):
         )
 
 
+class CollectionAggregateManager(models.Manager):
+    def refresh(self, collection_ids: Iterable[int]) -> None:
+        """
+        Recompute aggregates of collections with one INSERT of missing rows
+        and one UPDATE, also reconciles rows changed by add() deltas.
+        """
+        from src.activity.models import TokenHistory, UserAction
+
+        # queued collections may have been deleted meanwhile
+        collection_ids = set(
+            Collection.objects.filter(id__in=set(collection_ids)).values_list(
+                "id", flat=True
+            )
+        )
+        if not collection_ids:
+            return
+        self.bulk_create(
+            [self.model(collection_id=pk) for pk in collection_ids],
+            ignore_conflicts=True,
+        )
+        # same conditions as TokenQuerySet.committed
+        committed_tokens = {
+            "token__collection": OuterRef("collection"),
+            "token__deleted": False,
+            "token__status": Status.COMMITTED,
+            "token__collection__status": Status.COMMITTED,
+        }
+        tokens = Token.objects.committed().filter(collection=OuterRef("collection"))
+        ownerships = Ownership.objects.filter(**committed_tokens)
+        likes = UserAction.objects.filter(**committed_tokens)
+        self.filter(collection_id__in=collection_ids).update(
+            tokens_count=Coalesce(count_subquery(tokens), 0),
+            owners_count=Coalesce(
+                count_subquery(ownerships, field="owner", distinct=True), 0
+            ),
+            likes_count=Coalesce(count_subquery(likes), 0),
+            volume=Coalesce(
+                sum_subquery(
+                    TokenHistory.objects.filter(
+                        token__collection=OuterRef("collection"), method="Buy"
+                    ),
+                    "USD_price",
+                    output_field=self.model._meta.get_field("volume"),
+                ),
+                Decimal(0),
+            ),
+            updated_at=timezone.now(),
+        )
+
+    def add(self, collection_id: int, **deltas) -> None:
+        """Add deltas to counters of a collection, e.g. likes_count=1"""
+        updated = self.filter(collection_id=collection_id).update(
+            **{field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()}
+        )
+        if not updated:
+            self.refresh([collection_id])
+
+
+class CollectionAggregate(models.Model):
+    """
+    Counters of a collection kept up to date by write paths: deltas for
+    likes and volume, recomputes for tokens and owners, and a periodic
+    refresh of all collections.
+    """
+
+    collection = models.OneToOneField(
+        "Collection",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="aggregate",
+    )
+    tokens_count = models.PositiveIntegerField(default=0)
+    owners_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    # usd volume of Buy history
+    volume = models.DecimalField(max_digits=MAX_AMOUNT_LEN, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CollectionAggregateManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-volume"]),
+            models.Index(fields=["-tokens_count"]),
+        ]
+
+    def __str__(self):
+        return f"{self.collection} aggregate"
+
+
 class TokenQuerySet(models.QuerySet):
     def committed(self):
         return self.filter(
@@ -406,6 +562,37 @@ class TokenQuerySet(models.QuerySet):
             return self
         return self.filter(collection__game_category__name__iexact=game_category_name)
 
+    def priced_in(self, currencies):
+        """Return tokens whose listing price depends on the currencies"""
+        return self.filter(
+            Exists(
+                Ownership.objects.filter(
+                    token=OuterRef("pk"), selling=True, currency__in=currencies
+                )
+            )
+        )
+
+    def refresh_prices(self) -> int:
+        """
+        Recompute listing price columns with one UPDATE from the cheapest
+        selling ownership in USD; bids do not list a token.
+        Floors of the token collections are refreshed after.
+        """
+        collection_ids = list(self.values_list("collection_id", flat=True).distinct())
+        ownerships = (
+            Ownership.objects.filter(token=OuterRef("pk"), selling=True)
+            .annotate(listing_price=Coalesce("price", "minimal_bid"))
+            .annotate(listing_usd_price=F("listing_price") * F("currency__rate"))
+            .order_by(F("listing_usd_price").asc(nulls_last=True))
+        )
+        updated = self.update(
+            listing_price=Subquery(ownerships.values("listing_price")[:1]),
+            listing_usd_price=Subquery(ownerships.values("listing_usd_price")[:1]),
+            listing_currency=Subquery(ownerships.values("currency")[:1]),
+        )
+        Collection.objects.filter(id__in=collection_ids).refresh_floors()
+        return updated
+
 
 class TokenManager(models.Manager):
     def get_queryset(self):
@@ -484,9 +671,39 @@ class Token(models.Model):
     digital_key = models.CharField(max_length=1000, blank=True, null=True, default=None)
     external_link = models.CharField(max_length=200, null=True, blank=True)
     mint_id = models.PositiveIntegerField(null=True, blank=True)
+    # best price maintained by TokenQuerySet.refresh_prices for SQL filters
+    listing_price = models.DecimalField(
+        max_digits=MAX_AMOUNT_LEN,
+        decimal_places=18,
+        blank=True,
+        null=True,
+        default=None,
+    )
+    listing_usd_price = models.DecimalField(
+        max_digits=MAX_AMOUNT_LEN,
+        decimal_places=18,
+        blank=True,
+        null=True,
+        default=None,
+    )
+    listing_currency = models.ForeignKey(
+        "rates.UsdRate",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        default=None,
+        related_name="+",
+    )
 
     objects = TokenManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["listing_usd_price"]),
+            models.Index(fields=["listing_price"]),
+            models.Index(fields=["collection", "listing_usd_price"]),
+        ]
+
     def __str__(self):
         return self.name
 
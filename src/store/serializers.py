@@ -1,36 +1,31 @@
 import json
 import logging
-from datetime import date
 from typing import Optional
 
-from django.db.models import Count, Q, Sum
+from django.db.models import Manager, Q, Sum, prefetch_related_objects
 from drf_yasg.utils import swagger_serializer_method
 from rest_framework import serializers
 
 from src.accounts.serializers import UserSlimSerializer
-from src.activity.models import ActivitySubscription, TokenHistory
+from src.activity.models import ActivitySubscription
 from src.activity.serializers import ActivitySerializer
 from src.games.models import GameCompany
 from src.networks.serializers import NetworkSerializer
-from src.promotion.serializers import (
-    Promotion,
-    PromotionSerializer,
-    PromotionSlimSerializer,
-)
+from src.promotion.serializers import PromotionSerializer, PromotionSlimSerializer
 from src.rates.api import calculate_amount
 from src.rates.serializers import CurrencySerializer
 from src.settings import config
+from src.store.loaders import TokenLoader
 from src.store.models import (
     Bid,
     Category,
     Collection,
+    CollectionAggregate,
     Ownership,
-    Status,
     Tags,
     Token,
     TransactionTracker,
 )
-from src.support.models import Config
 from src.utilities import PaginateSerializer, RedisClient
 
 
@@ -112,28 +107,27 @@ class OwnershipSerializer(serializers.ModelSerializer):
     def get_name(self, obj):
         return obj.owner.get_name()
 
-    def get_quantity(self, obj):
-        tracker_amount = (
+    def get_tracker_amount(self, obj) -> int:
+        loader = self.context.get("token_loader")
+        if loader is not None:
+            return loader.tracker_amounts.get(obj.id, 0)
+        return (
             TransactionTracker.objects.filter(ownership=obj)
             .aggregate(owner_amount=Sum("amount"))
             .get("owner_amount")
-        )
-        tracker_amount = tracker_amount or 0
+        ) or 0
+
+    def get_quantity(self, obj):
         quantity = obj.quantity or 0
-        return max(quantity - tracker_amount, 0)
+        return max(quantity - self.get_tracker_amount(obj), 0)
 
     def get_selling_quantity(self, obj):
-        tracker_amount = (
-            TransactionTracker.objects.filter(ownership=obj)
-            .aggregate(owner_amount=Sum("amount"))
-            .get("owner_amount")
-        ) or 0
         selling_quantity = obj.selling_quantity or 0
-        return max(selling_quantity - tracker_amount, 0)
+        return max(selling_quantity - self.get_tracker_amount(obj), 0)
 
 
 class BidSerializer(serializers.ModelSerializer):
-    currency = CurrencySerializer(source="token.currency")
+    currency = serializers.SerializerMethodField()
     user = UserSlimSerializer()
 
     class Meta:
@@ -147,6 +141,43 @@ class BidSerializer(serializers.ModelSerializer):
             "user",
         )
 
+    @swagger_serializer_method(serializer_or_field=CurrencySerializer())
+    def get_currency(self, obj):
+        """Currency of the token, as bids are made in the token's currency"""
+        loader = self.context.get("token_loader")
+        if loader is not None and obj.token_id in loader.tokens:
+            currency = loader.get_currency(loader.tokens[obj.token_id])
+        else:
+            currency = obj.token.currency
+        if currency:
+            return CurrencySerializer(currency).data
+
+
+def get_aggregate(collection) -> CollectionAggregate:
+    """Stored counters of collection, computed once if not yet stored"""
+    try:
+        return collection.aggregate
+    except CollectionAggregate.DoesNotExist:
+        CollectionAggregate.objects.refresh([collection.id])
+        return CollectionAggregate.objects.get(collection=collection)
+
+
+class CollectionListSerializer(serializers.ListSerializer):
+    """Serialize collections with networks and currencies loaded for the whole list"""
+
+    prefetch_lookups = ("floor_currency__network", "network__currencies__network")
+
+    def to_representation(self, data):
+        collections = list(data.all() if isinstance(data, Manager) else data)
+        prefetch_related_objects(collections, *self.prefetch_lookups)
+        return super().to_representation(collections)
+
+
+class CollectionAggregateListSerializer(CollectionListSerializer):
+    """Serialize collections with their aggregates loaded for the whole list"""
+
+    prefetch_lookups = CollectionListSerializer.prefetch_lookups + ("aggregate",)
+
 
 class CollectionSlimSerializer(serializers.ModelSerializer):
     """Serializer with basic information about collection"""
@@ -177,6 +208,7 @@ class CollectionSlimSerializer(serializers.ModelSerializer):
             "network",
             "block_difference",
         )
+        list_serializer_class = CollectionListSerializer
 
 
 class CollectionFloorSerializer(CollectionSlimSerializer):
@@ -190,31 +222,12 @@ class CollectionFloorSerializer(CollectionSlimSerializer):
         )
 
     def get_floor_price(self, obj) -> int:
-        token = self.get_token_with_min_price(obj)
-        if token:
-            return token.price
-        return 0
+        return obj.floor_price or 0
 
     @swagger_serializer_method(serializer_or_field=CurrencySerializer())
     def get_currency(self, obj):
-        token = self.get_token_with_min_price(obj)
-        if token:
-            return CurrencySerializer(token.currency).data
-
-    def get_token_with_min_price(self, obj) -> Optional["Token"]:
-        tokens = list(obj.tokens.committed())
-        owners = Ownership.objects.filter(token__in=tokens).filter(
-            selling=True, currency__isnull=False
-        )
-        min_price_owner = None
-        owners = [owner for owner in owners if owner.price_or_minimal_bid_usd]
-        if owners:
-            min_price_owner = sorted(
-                list(owners), key=lambda x: x.price_or_minimal_bid_usd
-            )[0]
-        if min_price_owner:
-            token = min_price_owner.token
-            return token
+        if obj.floor_currency:
+            return CurrencySerializer(obj.floor_currency).data
 
 
 class CompositeCollectionSerializer(CollectionFloorSerializer):
@@ -235,23 +248,17 @@ class CompositeCollectionSerializer(CollectionFloorSerializer):
             "likes_count",
             "volume_traded",
         )
+        list_serializer_class = CollectionAggregateListSerializer
 
     def get_tokens(self, obj) -> list:
         tokens = obj.tokens.committed().order_by(config.SORT_STATUSES.recent)[:6]
         return [token.media for token in tokens]
 
     def get_likes_count(self, obj) -> int:
-        return obj.tokens.committed().aggregate(likes_count=Count("likes"))
+        return {"likes_count": get_aggregate(obj).likes_count}
 
     def get_volume_traded(self, obj) -> float:
-        return (
-            TokenHistory.objects.filter(
-                token__collection=obj,
-                method="Buy",
-            )
-            .aggregate(usd_sum=Sum("USD_price"))
-            .get("usd_sum")
-        )
+        return get_aggregate(obj).volume
 
 
 class TrendingCollectionSerializer(CollectionFloorSerializer):
@@ -267,11 +274,20 @@ class TrendingCollectionSerializer(CollectionFloorSerializer):
         )
 
 
+class TokenListSerializer(serializers.ListSerializer):
+    """Serialize tokens with their data batch loaded for the whole list"""
+
+    def to_representation(self, data):
+        tokens = list(data.all() if isinstance(data, Manager) else data)
+        self.child.loader = TokenLoader(tokens, self.context.get("user"))
+        return super().to_representation(tokens)
+
+
 class TokenSlimSerializer(serializers.ModelSerializer):
-    is_selling = serializers.BooleanField()
-    is_auc_selling = serializers.BooleanField()
-    is_timed_auc_selling = serializers.BooleanField()
-    usd_price = serializers.FloatField()
+    is_selling = serializers.SerializerMethodField()
+    is_auc_selling = serializers.SerializerMethodField()
+    is_timed_auc_selling = serializers.SerializerMethodField()
+    usd_price = serializers.SerializerMethodField()
     has_digital_key = serializers.BooleanField()
     collection = CollectionSlimSerializer()
     network = NetworkSerializer(source="collection.network")
@@ -280,13 +296,16 @@ class TokenSlimSerializer(serializers.ModelSerializer):
     like_count = serializers.SerializerMethodField()
     available = serializers.SerializerMethodField()
     sellers = serializers.SerializerMethodField()
-    currency = CurrencySerializer()
+    currency = serializers.SerializerMethodField()
+    price = serializers.SerializerMethodField()
+    minimal_bid = serializers.SerializerMethodField()
     promotion_info = serializers.SerializerMethodField()
     on_promotion = serializers.SerializerMethodField()
     end_auction = serializers.SerializerMethodField()
 
     class Meta:
         model = Token
+        list_serializer_class = TokenListSerializer
         fields = (
             "id",
             "is_selling",
@@ -319,53 +338,79 @@ class TokenSlimSerializer(serializers.ModelSerializer):
             "end_auction",
         )
 
+    def get_loader(self, obj) -> TokenLoader:
+        """Loader of the list being serialized, or of the single token"""
+        loader = getattr(self, "loader", None)
+        if loader is None or obj.id not in loader.tokens:
+            self.loader = loader = TokenLoader([obj], self.context.get("user"))
+        return loader
+
+    @property
+    def loader_context(self) -> dict:
+        return {**self.context, "token_loader": self.loader}
+
+    def get_is_selling(self, obj) -> bool:
+        return self.get_loader(obj).is_selling(obj)
+
+    def get_is_auc_selling(self, obj) -> bool:
+        return self.get_loader(obj).is_auc_selling(obj)
+
+    def get_is_timed_auc_selling(self, obj) -> bool:
+        return self.get_loader(obj).is_timed_auc_selling(obj)
+
+    def get_usd_price(self, obj) -> Optional[float]:
+        usd_price = self.get_loader(obj).get_usd_price(obj)
+        if usd_price is not None:
+            return float(usd_price)
+
+    def get_price(self, obj) -> Optional[float]:
+        return self.get_loader(obj).get_price(obj)
+
+    def get_minimal_bid(self, obj) -> Optional[float]:
+        return self.get_loader(obj).get_minimal_bid(obj)
+
+    @swagger_serializer_method(serializer_or_field=CurrencySerializer())
+    def get_currency(self, obj):
+        currency = self.get_loader(obj).get_currency(obj)
+        if currency:
+            return CurrencySerializer(currency).data
+
     def get_on_promotion(self, obj) -> bool:
-        return obj.promotions.filter(
-            status=Promotion.PromotionStatus.IN_PROGRESS
-        ).exists()
+        return self.get_loader(obj).is_on_promotion(obj)
 
     @swagger_serializer_method(serializer_or_field=PromotionSerializer())
     def get_promotion_info(self, obj):
+        loader = self.get_loader(obj)
         user = self.context.get("user")
         show_promotion = self.context.get("show_promotion")
-        promotions = obj.promotions.all()
         if show_promotion and user and not user.is_anonymous:
-            user_promotions = promotions.filter(owner__owner=user)
-            promotion = user_promotions.last()
+            promotion = loader.get_last_promotion(obj, user=user)
             if promotion:
                 return PromotionSerializer(promotion).data
         else:
-            promotion = promotions.last()
+            promotion = loader.get_last_promotion(obj)
             if promotion:
                 return PromotionSlimSerializer(promotion).data
 
     @swagger_serializer_method(serializer_or_field=OwnershipSerializer(many=True))
     def get_sellers(self, obj) -> list:
         """List of ownerships which sell token."""
-        sellers = obj.ownerships.filter(
-            selling=True,
-        ).order_by("price")
-        return OwnershipSerializer(sellers, many=True).data
+        sellers = self.get_loader(obj).get_sellers(obj)
+        return OwnershipSerializer(sellers, many=True, context=self.loader_context).data
 
     def get_available(self, obj) -> int:
         """Count of available for buy tokens."""
-        sellers = self.get_sellers(obj)
-        amounts = [s.get("selling_quantity", 0) for s in sellers]
-        return sum(amounts)
+        return self.get_loader(obj).get_available(obj)
 
     def get_like_count(self, obj) -> int:
-        return obj.likes.count()
+        return self.get_loader(obj).get_like_count(obj)
 
     def get_is_liked(self, obj) -> bool:
         """Is currenct user like this token."""
-        user = self.context.get("user")
-        if user and not user.is_anonymous:
-            return obj.likes.filter(user=user).exists()
-        return False
+        return self.get_loader(obj).is_liked(obj)
 
     def get_end_auction(self, obj):
-        if obj.is_single:
-            return obj.ownerships.first().end_auction
+        return self.get_loader(obj).get_end_auction(obj)
 
     # def get_currency(self, obj) -> 'CurrencySerializer':
     #    return CurrencySerializer(obj.currency).data
@@ -376,7 +421,7 @@ class TokenSerializer(TokenSlimSerializer):
     owners = serializers.SerializerMethodField()
     bids = serializers.SerializerMethodField()
     digital_key = serializers.SerializerMethodField()
-    highest_bid = BidSerializer(source="get_highest_bid")
+    highest_bid = serializers.SerializerMethodField()
     network = NetworkSerializer(source="collection.network")
 
     class Meta(TokenSlimSerializer.Meta):
@@ -390,21 +435,31 @@ class TokenSerializer(TokenSlimSerializer):
 
     @swagger_serializer_method(serializer_or_field=BidSerializer(many=True))
     def get_bids(self, obj):
-        return BidSerializer(obj.bids.filter(state=Status.COMMITTED), many=True).data
+        bids = self.get_loader(obj).bids[obj.id]
+        return BidSerializer(bids, many=True, context=self.loader_context).data
+
+    @swagger_serializer_method(serializer_or_field=BidSerializer())
+    def get_highest_bid(self, obj):
+        bid = self.get_loader(obj).get_highest_bid(obj)
+        if bid:
+            return BidSerializer(bid, context=self.loader_context).data
 
     @swagger_serializer_method(serializer_or_field=OwnershipSerializer(many=True))
     def get_owners(self, obj):
         # is request sender is owner, make him first in queryset (on frontend demand)
         user = self.context.get("user")
         ownerships = sorted(
-            obj.ownerships.all(), key=lambda x: x.owner == user, reverse=True
+            self.get_loader(obj).ownerships[obj.id],
+            key=lambda x: x.owner == user,
+            reverse=True,
         )
-        return OwnershipSerializer(ownerships, many=True).data
+        return OwnershipSerializer(
+            ownerships, many=True, context=self.loader_context
+        ).data
 
     def get_digital_key(self, obj) -> Optional[str]:
         """Return digital key if currenct user is token owner."""
-        user = self.context.get("user")
-        if user in obj.owners.all():
+        if self.get_loader(obj).is_owner(obj):
             return obj.digital_key
         return None
 
@@ -435,42 +490,25 @@ class CollectionSerializer(CollectionFloorSerializer):
             "volume_traded_crypto",
             "subcategory_name",
         )
+        list_serializer_class = CollectionAggregateListSerializer
 
     def get_subcategory_name(self, obj) -> str:
         if obj.game_subcategory:
             return obj.game_subcategory.name
 
     def get_tokens_count(self, obj) -> int:
-        return obj.tokens.committed().count()
+        return get_aggregate(obj).tokens_count
 
     def get_owners_count(self, obj) -> int:
         """Return owners of collection."""
-        return (
-            obj.tokens.committed()
-            .aggregate(count=Count("ownerships__owner", distinct=True))
-            .get("count")
-        )
+        return get_aggregate(obj).owners_count
 
     def get_volume_traded(self, obj):
         """Return sum of token prices in usd."""
-        return (
-            TokenHistory.objects.filter(
-                token__collection=obj,
-                method="Buy",
-            )
-            .aggregate(usd_sum=Sum("USD_price"))
-            .get("usd_sum")
-        )
+        return get_aggregate(obj).volume
 
     def get_volume_traded_crypto(self, obj) -> float:
-        usd_sum = (
-            TokenHistory.objects.filter(
-                token__collection=obj,
-                method="Buy",
-            )
-            .aggregate(usd_sum=Sum("USD_price"))
-            .get("usd_sum")
-        ) or 0
+        usd_sum = get_aggregate(obj).volume
         amount = calculate_amount(
             usd_sum, from_currency="USD", to_currency=obj.network.native_symbol
         )
@@ -566,6 +604,9 @@ class CollectionCreatingSerializer(serializers.Serializer):
 
 
 class TopCollectionsSerializer(CollectionSlimSerializer):
+    """Collection of get_top_collections with its rank in the period"""
+
+    rank = serializers.IntegerField()
     total_items = serializers.SerializerMethodField()
     total_owners = serializers.SerializerMethodField()
     amount = serializers.SerializerMethodField()
@@ -573,37 +614,25 @@ class TopCollectionsSerializer(CollectionSlimSerializer):
 
     class Meta(CollectionSlimSerializer.Meta):
         fields = CollectionSlimSerializer.Meta.fields + (
+            "rank",
             "amount",
             "total_items",
             "total_owners",
             "volume_traded",
         )
+        list_serializer_class = CollectionAggregateListSerializer
 
     def get_amount(self, obj):
-        start_date = self.context.get("start_date")
-        end_date = self.context.get("end_date")
-        return obj.stats.filter(date__gte=start_date, date__lte=end_date).aggregate(
-            sum_amount=Sum("amount")
-        )["sum_amount"]
+        return obj.period_amount
 
     def get_total_items(self, obj):
-        return obj.tokens.committed().count()
+        return get_aggregate(obj).tokens_count
 
     def get_total_owners(self, obj):
-        return (
-            obj.tokens.committed()
-            .values("owners")
-            .distinct()
-            .aggregate(Count("owners"))
-            .get("owner__count")
-        )
+        return get_aggregate(obj).owners_count
 
     def get_volume_traded(self, obj) -> float:
-        start_date, period = Config.get_top_collections_period()
-        end_date = date.today()
-        return obj.stats.filter(date__gte=start_date, date__lte=end_date).aggregate(
-            sum_amount=Sum("amount")
-        )["sum_amount"]
+        return obj.period_amount
 
 
 class CollectionPatchSerializer(serializers.ModelSerializer):
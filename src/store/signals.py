@@ -9,6 +9,11 @@ from src.accounts.models import DefaultAvatar
 from src.games.tasks import validate_game_collection
 from src.promotion.models import Promotion
 from src.store.models import Collection, Ownership, Status, Token, TransactionTracker
+from src.store.utils import (
+    notify_scanners,
+    refresh_collection_aggregates,
+    refresh_token_prices,
+)
 from src.support.models import EmailTemplate
 from src.support.tasks import send_email_notification
 from src.utilities import RedisClient
@@ -26,10 +31,12 @@ def collection_pre_save_dispatcher(sender, instance, *args, **kwargs):
 def collection_post_save_dispatcher(sender, instance, created, *args, **kwargs):
     update_delete_status(instance)
     set_default_values(instance, created)
+    notify_scanners([instance.id])
 
 
 @receiver(post_delete, sender=Collection)
 def collection_post_delete_dispatcher(sender, instance, *args, **kwargs):
+    notify_scanners([instance.id])
     if instance.game:
         key = EmailTemplate.construct_email(
             "CONTRACT_INVALID", instance, instance.game.email
@@ -118,6 +125,30 @@ def ownership_post_delete_dispatcher(sender, instance, *args, **kwargs):
     )
 
 
+@receiver(post_save, sender=Ownership)
+@receiver(post_delete, sender=Ownership)
+def token_price_dispatcher(sender, instance, *args, **kwargs):
+    refresh_token_prices([instance.token_id])
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=Ownership)
+@receiver(post_delete, sender=Ownership)
+def collection_aggregate_dispatcher(sender, instance, *args, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if sender is Token:
+        # e.g. media saved on first read does not change counters
+        if update_fields and not {"status", "deleted"} & set(update_fields):
+            return
+        collection_ids = [instance.collection_id]
+    else:
+        collection_ids = Token.objects.filter(id=instance.token_id).values_list(
+            "collection_id", flat=True
+        )
+    refresh_collection_aggregates(collection_ids)
+
+
 def unique_name_for_network_validator(token):
     """
     Raise exception if token with same name and network exists.
@@ -157,21 +188,30 @@ def selling_quantity_validate(ownership, sender):
     If ownership not for sale selling_qantity is 0.
     Set to selling_qantity min from (quantity, selling_qantity).
     """
-    if (
+    has_tracker = (
         not ownership.selling
-        and not TransactionTracker.objects.filter(ownership=ownership).exists()
-    ):
+        and TransactionTracker.objects.filter(ownership=ownership).exists()
+    )
+    normalize_selling_quantity(ownership, has_tracker)
+    if ownership.selling_quantity == 0 and ownership.token.is_single:
+        ownership.token.bids.all().delete()
+    post_save.disconnect(ownership_post_save_dispatcher, sender=sender)
+    ownership.save(update_fields=["selling", "selling_quantity", "currency", "price"])
+    post_save.connect(ownership_post_save_dispatcher, sender=sender)
+
+
+def normalize_selling_quantity(ownership, has_tracker):
+    """
+    Apply selling quantity rules to ownership fields without saving.
+    Used by the post_save signal and by bulk scanner updates.
+    """
+    if not ownership.selling and not has_tracker:
         ownership.selling_quantity = 0
     ownership.selling_quantity = min(ownership.selling_quantity, ownership.quantity)
     if ownership.selling_quantity == 0:
         ownership.selling = False
         ownership.price = None
         ownership.currency = None
-        if ownership.token.is_single:
-            ownership.token.bids.all().delete()
-    post_save.disconnect(ownership_post_save_dispatcher, sender=sender)
-    ownership.save(update_fields=["selling", "selling_quantity", "currency", "price"])
-    post_save.connect(ownership_post_save_dispatcher, sender=sender)
 
 
 def check_quantity_exists(ownership):
@@ -5,6 +5,7 @@ from itertools import chain
 from typing import Optional
 
 from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
 from celery import shared_task
@@ -17,12 +18,14 @@ from src.store.exchange import TokenExchange
 from src.store.models import (
     Bid,
     Collection,
+    CollectionAggregate,
     Ownership,
     Status,
     Tags,
     Token,
     TransactionTracker,
 )
+from src.store.utils import COLLECTION_AGGREGATES_QUEUE
 from src.utilities import RedisClient, alert_bot, check_tx
 
 logger = logging.getLogger("celery")
@@ -218,3 +221,34 @@ def calculate_rarity(col_id):
         key,
         json.dumps(data, ensure_ascii=False, default=str),
     )
+
+
+@shared_task(name="refresh_token_prices")
+def refresh_token_prices():
+    """
+    Recompute listing prices of tokens on sale or priced before,
+    and floors of all collections, e.g. after tokens were deleted
+    """
+    Token.objects.filter(
+        Q(listing_price__isnull=False)
+        | Exists(Ownership.objects.filter(token=OuterRef("pk"), selling=True))
+    ).refresh_prices()
+    Collection.objects.all().refresh_floors()
+
+
+@shared_task(name="refresh_collection_aggregates")
+def refresh_collection_aggregates():
+    """Reconcile stored aggregates of all collections with their tokens"""
+    CollectionAggregate.objects.refresh(Collection.objects.values_list("id", flat=True))
+
+
+@shared_task(name="refresh_queued_collection_aggregates")
+@ignore_duplicates
+def refresh_queued_collection_aggregates():
+    """Refresh aggregates of collections queued by write paths"""
+    connection = RedisClient().connection
+    while True:
+        collection_ids = connection.spop(COLLECTION_AGGREGATES_QUEUE, 100)
+        if not collection_ids:
+            break
+        CollectionAggregate.objects.refresh(int(pk) for pk in collection_ids)
@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from src.store.models import Collection, CollectionAggregate, Status
+from src.store.serializers import CollectionSerializer
+from src.store.tasks import refresh_queued_collection_aggregates
+
+
+@pytest.mark.django_db
+def test_collection_aggregate_follows_write_paths(
+    mixer, django_capture_on_commit_callbacks
+):
+    collection = mixer.blend("store.Collection", status=Status.COMMITTED)
+    with django_capture_on_commit_callbacks(execute=True):
+        tokens = mixer.cycle(2).blend(
+            "store.Token",
+            collection=collection,
+            status=Status.COMMITTED,
+            deleted=False,
+        )
+        owner = mixer.blend("accounts.AdvUser")
+        for token in tokens:
+            mixer.blend("store.Ownership", token=token, owner=owner, quantity=1)
+    like = mixer.blend("activity.UserAction", method="like", token=tokens[0])
+    mixer.blend(
+        "activity.TokenHistory",
+        method="Buy",
+        token=tokens[1],
+        price=None,
+        currency=None,
+        USD_price=Decimal("12.5"),
+    )
+    refresh_queued_collection_aggregates()
+
+    aggregate = CollectionAggregate.objects.get(collection=collection)
+    assert aggregate.tokens_count == 2
+    assert aggregate.owners_count == 1
+    assert aggregate.likes_count == 1
+    assert aggregate.volume == Decimal("12.5")
+
+    like.delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        tokens[0].deleted = True
+        tokens[0].save(update_fields=["deleted"])
+    # token changes are applied by the queue task, like deltas at once
+    aggregate.refresh_from_db()
+    assert aggregate.tokens_count == 2
+    assert aggregate.likes_count == 0
+    refresh_queued_collection_aggregates()
+    aggregate.refresh_from_db()
+    assert aggregate.tokens_count == 1
+
+    # drift of deltas is fixed by the periodic refresh
+    CollectionAggregate.objects.filter(collection=collection).update(likes_count=5)
+    CollectionAggregate.objects.refresh([collection.id])
+    aggregate.refresh_from_db()
+    assert aggregate.likes_count == 0
+
+
+@pytest.mark.django_db
+def test_collection_serializer_reads_aggregates(mixer):
+    collections = mixer.cycle(4).blend("store.Collection", status=Status.COMMITTED)
+    for collection in collections:
+        mixer.blend(
+            "store.Token",
+            collection=collection,
+            status=Status.COMMITTED,
+            deleted=False,
+        )
+    collections = Collection.objects.filter(id__in=[c.id for c in collections])
+
+    with CaptureQueriesContext(connection) as queries:
+        data = CollectionSerializer(collections, many=True).data
+
+    table = CollectionAggregate._meta.db_table
+    aggregate_queries = [q for q in queries if table in q["sql"]]
+    # aggregates are prefetched, counters are not computed per collection
+    assert len(aggregate_queries) == 1
+    assert not [q for q in queries if "COUNT(" in q["sql"]]
+    assert {item["tokens_count"] for item in data} == {1}
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from src.store.models import Collection, Ownership, Status, Token
+from src.store.serializers import CollectionFloorSerializer
+
+
+def list_token(mixer, collection, currency, price):
+    token = mixer.blend(
+        "store.Token", collection=collection, status=Status.COMMITTED, deleted=False
+    )
+    return Ownership.objects.create(
+        token=token,
+        owner=mixer.blend("accounts.AdvUser"),
+        quantity=1,
+        selling=True,
+        selling_quantity=1,
+        currency=currency,
+        price=price,
+    )
+
+
+@pytest.mark.django_db
+def test_collection_floor_follows_listings_and_rates(mixer):
+    collection = mixer.blend("store.Collection", status=Status.PENDING)
+    eth = mixer.blend("rates.UsdRate", rate=Decimal("2"), symbol="eth")
+    usdt = mixer.blend("rates.UsdRate", rate=Decimal("1"), symbol="usdt")
+    cheap = list_token(mixer, collection, eth, Decimal("3"))
+    list_token(mixer, collection, usdt, Decimal("7"))
+
+    collection.refresh_from_db()
+    assert collection.floor_token_id == cheap.token_id
+    assert collection.floor_price == Decimal("3")
+    assert collection.floor_usd_price == Decimal("6")
+    assert collection.floor_currency == eth
+
+    eth.rate = Decimal("4")
+    eth.save()
+    Token.objects.priced_in([eth]).refresh_prices()
+    collection.refresh_from_db()
+    assert collection.floor_currency == usdt
+    assert collection.floor_price == Decimal("7")
+
+    for ownership in Ownership.objects.filter(token__collection=collection):
+        ownership.selling = False
+        ownership.save()
+    collection.refresh_from_db()
+    assert collection.floor_token is None
+    assert collection.floor_price is None
+
+
+@pytest.mark.django_db
+def test_collection_floor_serializer_queries_do_not_grow(mixer):
+    currency = mixer.blend("rates.UsdRate", rate=Decimal("1"))
+    collections = mixer.cycle(5).blend("store.Collection", status=Status.PENDING)
+    for collection in collections:
+        list_token(mixer, collection, currency, Decimal("2"))
+
+    collections = Collection.objects.filter(id__in=[c.id for c in collections])
+
+    with CaptureQueriesContext(connection) as queries:
+        data = CollectionFloorSerializer(collections, many=True).data
+
+    # collections, floor currencies and networks with their currencies
+    assert len(queries) <= 6
+    assert {item["floor_price"] for item in data} == {Decimal("2")}
+    assert {item["currency"]["symbol"] for item in data} == {currency.symbol}
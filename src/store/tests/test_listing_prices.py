@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+import pytest
+
+from src.services.search import SearchToken
+from src.store.models import Ownership, Status, Token
+
+
+def create_token(mixer, currency, price=None):
+    token = mixer.blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        deleted=False,
+        collection__status=Status.COMMITTED,
+    )
+    if price is not None:
+        Ownership.objects.create(
+            token=token,
+            owner=mixer.blend("accounts.AdvUser"),
+            quantity=1,
+            selling=True,
+            selling_quantity=1,
+            currency=currency,
+            price=price,
+        )
+    return token
+
+
+@pytest.mark.django_db
+def test_listing_prices_follow_ownerships(mixer):
+    currency = mixer.blend("rates.UsdRate", rate=Decimal("2"), symbol="eth")
+    token = create_token(mixer, currency, price=Decimal("5"))
+
+    token.refresh_from_db()
+    assert token.listing_price == Decimal("5")
+    assert token.listing_usd_price == Decimal("10")
+    assert token.listing_currency == currency
+
+    # a bid does not change the listing price
+    mixer.blend(
+        "store.Bid",
+        token=token,
+        amount=Decimal("30"),
+        currency=currency,
+        state=Status.COMMITTED,
+    )
+    Token.objects.filter(id=token.id).refresh_prices()
+    token.refresh_from_db()
+    assert token.listing_usd_price == Decimal("10")
+
+    currency.rate = Decimal("3")
+    currency.save()
+    Token.objects.priced_in([currency]).refresh_prices()
+    token.refresh_from_db()
+    assert token.listing_usd_price == Decimal("15")
+
+
+@pytest.mark.django_db
+def test_token_with_bid_and_no_listing_is_not_on_sale(mixer):
+    currency = mixer.blend("rates.UsdRate", rate=Decimal("1"), symbol="eth")
+    token = create_token(mixer, currency)
+    mixer.blend(
+        "store.Bid",
+        token=token,
+        amount=Decimal("3"),
+        currency=currency,
+        state=Status.COMMITTED,
+    )
+    Token.objects.filter(id=token.id).refresh_prices()
+
+    token.refresh_from_db()
+    assert token.listing_price is None
+    assert token.listing_usd_price is None
+    assert token.listing_currency is None
+    assert token not in SearchToken().parse(min_price=["1"])
+
+
+@pytest.mark.django_db
+def test_search_filters_and_orders_by_listing_price(mixer):
+    currency = mixer.blend("rates.UsdRate", rate=Decimal("1"), symbol="eth")
+    cheap = create_token(mixer, currency, price=Decimal("1"))
+    expensive = create_token(mixer, currency, price=Decimal("100"))
+    create_token(mixer, currency)
+
+    tokens = SearchToken().parse(min_price=["2"], order_by=["price"])
+    assert list(tokens) == [expensive]
+
+    tokens = SearchToken().parse(max_price=["50"], order_by=["-price"])
+    assert list(tokens) == [cheap]
+
+    tokens = SearchToken().parse(on_any_sale=[""], order_by=["price"])
+    assert list(tokens) == [cheap, expensive]
@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from src.activity.models import TokenHistory, UserAction
+from src.services.search import SearchCollection, SearchToken, SearchUser
+from src.store.models import Status
+
+
+@pytest.fixture
+def tokens(mixer):
+    return mixer.cycle(3).blend(
+        "store.Token",
+        status=Status.COMMITTED,
+        deleted=False,
+        collection__status=Status.COMMITTED,
+    )
+
+
+@pytest.mark.django_db
+def test_token_ordering_by_likes_runs_in_one_query(mixer, tokens):
+    first, second, third = tokens
+    for user in mixer.cycle(2).blend("accounts.AdvUser"):
+        UserAction.objects.create(user=user, token=second, method="like")
+    UserAction.objects.create(
+        user=mixer.blend("accounts.AdvUser"), token=third, method="like"
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        result = list(SearchToken().parse(order_by=["-likes"]))
+
+    assert result == [second, third, first]
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_token_ordering_by_sale_puts_unsold_tokens_last(mixer, tokens):
+    first, second, third = tokens
+    for token in (second, first):
+        TokenHistory.objects.create(token=token, method="Buy", tx_hash="0x1")
+
+    assert list(SearchToken().parse(order_by=["-sale"])) == [first, second, third]
+    assert list(SearchToken().parse(order_by=["sale"])) == [third, second, first]
+
+
+@pytest.mark.django_db
+def test_collection_and_user_ordering(mixer):
+    collections = mixer.cycle(2).blend(
+        "store.Collection",
+        name=(name for name in ("b", "a")),
+        status=Status.COMMITTED,
+        deleted=False,
+    )
+    assert list(SearchCollection().parse(order_by=["name"])) == collections[::-1]
+
+    popular, other = mixer.cycle(2).blend("accounts.AdvUser")
+    UserAction.objects.create(user=other, whom_follow=popular, method="follow")
+    users = list(SearchUser().parse(order_by=["-followers"]))
+    assert users.index(popular) < users.index(other)
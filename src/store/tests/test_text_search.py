@@ -0,0 +1,84 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from src.services import text_search
+from src.services.search import SearchToken
+from src.services.text_search import search_text
+from src.store.models import Status, Token
+
+
+@pytest.fixture
+def search_indexes(transactional_db, monkeypatch):
+    call_command("build_search_indexes")
+    monkeypatch.setattr(text_search, "_trigram_available", None)
+
+
+@pytest.fixture
+def tokens(mixer, search_indexes):
+    names = ["Golden dragon", "Dragon egg", "Silver sword", "Red dragonfly"]
+    return {
+        name: mixer.blend(
+            "store.Token",
+            name=name,
+            status=Status.COMMITTED,
+            deleted=False,
+            collection__status=Status.COMMITTED,
+        )
+        for name in names
+    }
+
+
+def test_search_token_text_is_ranked(tokens):
+    result = list(SearchToken().parse(text=["dragon"]))
+
+    assert set(result) == {
+        tokens["Golden dragon"],
+        tokens["Dragon egg"],
+        tokens["Red dragonfly"],
+    }
+    assert result[-1] == tokens["Red dragonfly"]
+    # "Dragon egg" is similar to the text, but does not contain "golden"
+    assert list(SearchToken().parse(text=["golden dragon"])) == [
+        tokens["Golden dragon"]
+    ]
+
+
+def test_search_text_tolerates_typos(tokens):
+    result = search_text(Token.objects.all(), "name", "silver swrod")
+
+    assert list(result) == [tokens["Silver sword"]]
+
+
+def test_presearch_ranks_prefix_matches_first(tokens):
+    result = search_text(Token.objects.all(), "name", "drag", prefix=True)
+
+    assert list(result.order_by("-search_rank", "id"))[0] == tokens["Dragon egg"]
+
+
+def test_search_text_without_trigram(tokens, monkeypatch):
+    monkeypatch.setattr(text_search, "_trigram_available", False)
+
+    result = search_text(Token.objects.all(), "name", "dragon")
+
+    assert {token.search_rank for token in result} == {0.0}
+    assert len(result) == 3
+    assert not search_text(Token.objects.all(), "name", "swrod").exists()
+
+
+def test_search_text_uses_trigram_indexes(tokens):
+    table = Token._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan TO off")
+    try:
+        contains_plan = search_text(
+            Token.objects.all(), "name", "drag", prefix=True
+        ).explain()
+        full_plan = search_text(Token.objects.all(), "name", "dragon").explain()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    assert f"{table}_name_upper_trgm" in contains_plan
+    assert f"{table}_name_upper_trgm" in full_plan
+    assert f"{table}_name_trgm" in full_plan
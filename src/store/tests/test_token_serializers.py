@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from src.activity.models import UserAction
+from src.promotion.models import Promotion
+from src.store.models import Ownership, Status, Token
+from src.store.serializers import TokenSerializer, TokenSlimSerializer
+
+
+def create_tokens(mixer, count):
+    collection = mixer.blend(
+        "store.Collection", status=Status.PENDING, standard="ERC721"
+    )
+    currency = mixer.blend("rates.UsdRate", network=collection.network, rate=2)
+    for _ in range(count):
+        token = mixer.blend(
+            "store.Token",
+            collection=collection,
+            image="image",
+            format="image",
+            status=Status.COMMITTED,
+        )
+        ownership = Ownership.objects.create(
+            token=token,
+            owner=mixer.blend("accounts.AdvUser"),
+            quantity=1,
+            selling=True,
+            selling_quantity=1,
+            currency=currency,
+            price=Decimal("3"),
+        )
+        mixer.blend(
+            "store.Bid",
+            token=token,
+            currency=currency,
+            amount=Decimal("1"),
+            state=Status.COMMITTED,
+        )
+        UserAction.objects.create(
+            user=mixer.blend("accounts.AdvUser"), token=token, method="like"
+        )
+        mixer.blend(
+            "promotion.Promotion",
+            token=token,
+            owner=ownership,
+            network=collection.network,
+            status=Promotion.PromotionStatus.IN_PROGRESS,
+        )
+    return Token.objects.filter(collection=collection)
+
+
+def count_queries(serializer, tokens, user):
+    with CaptureQueriesContext(connection) as queries:
+        data = serializer(tokens, many=True, context={"user": user}).data
+    return len(queries), data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("serializer", [TokenSlimSerializer, TokenSerializer])
+def test_token_list_queries_do_not_grow_with_page(mixer, serializer):
+    user = mixer.blend("accounts.AdvUser")
+    small_page, _ = count_queries(serializer, create_tokens(mixer, 2), user)
+    large_page, data = count_queries(serializer, create_tokens(mixer, 20), user)
+
+    assert large_page == small_page
+    assert len(data) == 20
+    assert all(token["on_promotion"] and token["like_count"] == 1 for token in data)
+    # the highest bid replaces the listing price, as Token.price does
+    assert {token["price"] for token in data} == {Decimal("1")}
+    assert {token["usd_price"] for token in data} == {2.0}
+
+
+@pytest.mark.django_db
+def test_single_token_serializer_matches_list(mixer):
+    token = create_tokens(mixer, 1).get()
+
+    single = TokenSerializer(token).data
+    listed = TokenSerializer([token], many=True).data[0]
+
+    assert single == listed
+    assert single["is_selling"] and single["available"] == 1
+    assert single["highest_bid"]["amount"] == single["bids"][0]["amount"]
@@ -1,7 +1,19 @@
-from typing import Union
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Set, Union
+
+from django.db import transaction
 
 from src.store.exceptions import CollectionNotFound, TokenNotFound
 from src.store.models import Collection, Token
+from src.utilities import RedisClient
+
+SCANNER_COLLECTIONS_CHANNEL = "scanner_collections"
+# ids of collections with changed tokens or ownerships, refreshed in batches
+# by the refresh_queued_collection_aggregates task
+COLLECTION_AGGREGATES_QUEUE = "queue_collection_aggregates"
+
+_price_refresh = threading.local()
 
 
 def get_committed_token(token_id: int) -> "Token":
@@ -16,3 +28,73 @@ def get_collection_by_short_url(short_url: Union[str, int]) -> "Collection":
         return Collection.objects.committed().get_by_short_url(short_url=short_url)
     except Collection.DoesNotExist:
         raise CollectionNotFound
+
+
+def notify_scanners(collection_ids: Iterable[int]) -> None:
+    """Tell the scanner supervisor that collections changed, after commit"""
+    collection_ids = list(collection_ids)
+    if not collection_ids:
+        return
+
+    def publish():
+        connection = RedisClient().connection
+        for collection_id in collection_ids:
+            connection.publish(SCANNER_COLLECTIONS_CHANNEL, collection_id)
+
+    transaction.on_commit(publish)
+
+
+def refresh_token_prices(token_ids: Iterable[int]) -> None:
+    """Recompute listing prices of tokens, once per deferred_price_refresh block"""
+    pending = getattr(_price_refresh, "token_ids", None)
+    if pending is not None:
+        pending.update(token_ids)
+        return
+    Token.objects.filter(id__in=list(token_ids)).refresh_prices()
+
+
+def refresh_collection_aggregates(collection_ids: Iterable[int]) -> None:
+    """
+    Queue collections for an aggregates refresh after commit, once per
+    deferred_price_refresh block. A refresh costs as much as the collection
+    is large, so writes only queue it.
+    """
+    pending = getattr(_price_refresh, "collection_ids", None)
+    if pending is not None:
+        pending.update(collection_ids)
+        return
+    collection_ids = set(collection_ids)
+    collection_ids.discard(None)
+    if not collection_ids:
+        return
+
+    def queue():
+        RedisClient().connection.sadd(COLLECTION_AGGREGATES_QUEUE, *collection_ids)
+
+    transaction.on_commit(queue)
+
+
+@contextmanager
+def deferred_price_refresh():
+    """
+    Collect tokens changed by signals or bulk operations inside the block
+    and refresh their listing prices with a single UPDATE at exit,
+    then queue the aggregates of their and other changed collections.
+    """
+    if getattr(_price_refresh, "token_ids", None) is not None:
+        yield _price_refresh.token_ids
+        return
+    token_ids: Set[int] = set()
+    collection_ids: Set[int] = set()
+    _price_refresh.token_ids = token_ids
+    _price_refresh.collection_ids = collection_ids
+    try:
+        yield token_ids
+    finally:
+        _price_refresh.token_ids = None
+        _price_refresh.collection_ids = None
+    if token_ids:
+        tokens = Token.objects.filter(id__in=token_ids)
+        tokens.refresh_prices()
+        collection_ids.update(tokens.values_list("collection_id", flat=True))
+    refresh_collection_aggregates(collection_ids)
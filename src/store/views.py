@@ -44,6 +44,7 @@ from src.responses import (
     tx_response,
 )
 from src.services.search import Search
+from src.services.text_search import search_text
 from src.settings import config
 from src.store.api import check_captcha
 from src.store.exceptions import CollectionNotFound, Forbidden, TokenNotFound
@@ -1767,12 +1768,18 @@ class FastSearchTokenView(APIView):
         responses={200: FastSearchSerializer},
     )
     def get(self, request, *args, **kwargs):
-        presearch = self.request.query_params.get("presearch")
-        tokens = Token.objects.committed().filter(name__icontains=presearch)
+        presearch = self.request.query_params.get("presearch") or ""
+        tokens = search_text(
+            Token.objects.committed(), "name", presearch, prefix=True
+        ).order_by("-search_rank", "id")
         tokens = TokenFastSearchSerializer(tokens[:8], many=True).data
-        users = AdvUser.objects.filter(display_name__icontains=presearch)
+        users = search_text(
+            AdvUser.objects.all(), "display_name", presearch, prefix=True
+        ).order_by("-search_rank", "id")
         users = UserSlimSerializer(users[:8], many=True).data
-        collections = Collection.objects.committed().filter(name__icontains=presearch)
+        collections = search_text(
+            Collection.objects.committed(), "name", presearch, prefix=True
+        ).order_by("-search_rank", "id")
         collections = CollectionFastSearchSerializer(collections[:8], many=True).data
 
         response = {"tokens": tokens, "users": users, "collections": collections}
@@ -1,5 +1,7 @@
 import pytest
+from django.db.models import F
 
+from src.accounts.models import AdvUser
 from src.utilities import PaginateMixin
 
 
@@ -54,3 +56,41 @@ def test_paginate_mixin():
     assert response["results_per_page"] == 50
     assert response["results"][0] == "item_0"
     assert response["results"][-1] == "item_49"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "ordering",
+    [
+        ["display_name"],
+        ["-display_name", "-date_joined"],
+        [F("display_name").desc(nulls_last=True)],
+        [F("display_name").asc(nulls_first=True)],
+    ],
+)
+def test_paginate_mixin_cursor(mixer, ordering):
+    class Request:
+        def __init__(self, _query_params):
+            self.query_params = _query_params
+
+    names = ["a", "b", None, "b", None, "c", "a", "d"]
+    mixer.cycle(len(names)).blend(
+        "accounts.AdvUser", display_name=(name for name in names)
+    )
+    users = AdvUser.objects.order_by(*ordering)
+
+    response = PaginateMixin().paginate(
+        Request({"cursor": "", "items_per_page": 3, "with_total": "true"}), users
+    )
+    assert response["total"] == len(names)
+    results = response["results"]
+    while response["next"]:
+        response = PaginateMixin().paginate(
+            Request({"cursor": response["next"], "items_per_page": 3}), users
+        )
+        assert len(response["results"]) <= 3
+        results += response["results"]
+
+    assert [user.id for user in results] == [
+        user.id for user in users.order_by(*ordering, "id")
+    ]
@@ -1,11 +1,17 @@
+import base64
+import json
 import logging
 import sys
 import traceback
-from datetime import timedelta
+from datetime import datetime, timedelta
 from math import ceil
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 import redis
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Func, IntegerField, Q, QuerySet, Subquery
+from django.db.models.expressions import OrderBy
+from django.db.models.query import ModelIterable
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from eth_account import Account
@@ -70,7 +76,31 @@ def to_int(value):
     return value
 
 
+def count_subquery(queryset, field="id", distinct=False):
+    """Count rows of a queryset filtered by OuterRef as a scalar subquery"""
+    extra = {"template": "%(function)s(DISTINCT %(expressions)s)"} if distinct else {}
+    counts = queryset.order_by().annotate(
+        count=Func(F(field), function="COUNT", output_field=IntegerField(), **extra)
+    )
+    return Subquery(counts.values("count"))
+
+
+def sum_subquery(queryset, field, output_field):
+    """Sum a field of a queryset filtered by OuterRef as a scalar subquery"""
+    sums = queryset.order_by().annotate(
+        total=Func(F(field), function="SUM", output_field=output_field)
+    )
+    return Subquery(sums.values("total"))
+
+
 class PaginateMixin:
+    """
+    Page number pagination, or keyset pagination when the request has
+    a `cursor` parameter (empty for the first page) and items are an
+    ordered queryset. Keyset pages cost the same at any depth, the
+    total is counted only if `with_total` is true.
+    """
+
     def _parse_request(self, request):
         try:
             self.page = abs(int(request.query_params.get("page", 1))) or 1
@@ -94,18 +124,139 @@ class PaginateMixin:
 
     def paginate(self, request, items, serializer=None, context={}):
         self._parse_request(request)
-        start, end = self.get_page_slice(len(items))
-        pages = len(items) / self.items_per_page
+        if "cursor" in request.query_params and isinstance(items, QuerySet):
+            try:
+                return self.paginate_cursor(request, items, serializer, context)
+            except ValueError as e:
+                logging.warning(f"Cursor pagination is not available: {e}")
+        total = items.count() if isinstance(items, QuerySet) else len(items)
+        start, end = self.get_page_slice(total)
         results = items[start:end]
         if serializer is not None:
             results = serializer(results, many=True, context=context).data
         return {
-            "total": len(items),
+            "total": total,
             "results_per_page": self.items_per_page,
-            "total_pages": ceil(pages),
+            "total_pages": ceil(total / self.items_per_page),
             "results": results,
         }
 
+    def paginate_cursor(self, request, items, serializer=None, context={}):
+        keys = get_keyset(items)
+        paginated = {"results_per_page": self.items_per_page, "next": None}
+        if str(request.query_params.get("with_total", "")).lower() == "true":
+            paginated["total"] = items.count()
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            try:
+                values = decode_cursor(cursor, len(keys))
+            except ValueError as e:
+                logging.error(f"Pagination cursor error {e}")
+            else:
+                items = items.filter(get_keyset_filter(keys, values))
+        cursor_keys = {
+            f"cursor_key_{index}": F(name) for index, (name, _, _) in enumerate(keys)
+        }
+        page = list(
+            items.annotate(**cursor_keys).order_by(
+                *[get_key_ordering(key) for key in keys]
+            )[: self.items_per_page + 1]
+        )
+        if len(page) > self.items_per_page:
+            page = page[: self.items_per_page]
+            paginated["next"] = encode_cursor(
+                [getattr(page[-1], key) for key in cursor_keys]
+            )
+        if serializer is not None:
+            page = serializer(page, many=True, context=context).data
+        paginated["results"] = page
+        return paginated
+
+
+def get_keyset(items: QuerySet) -> List[Tuple[str, bool, Optional[bool]]]:
+    """
+    Return ordering of a queryset as (field, descending, nulls_last) keys
+    ended by the primary key, raise ValueError if it is not a keyset
+    """
+    if items.query.is_sliced or items.query.combinator:
+        raise ValueError("sliced or combined queryset")
+    if items._iterable_class is not ModelIterable:
+        raise ValueError("queryset does not return model instances")
+    ordering = list(items.query.order_by or items.model._meta.ordering)
+    keys = []
+    for term in ordering:
+        if isinstance(term, str):
+            if term == "?":
+                raise ValueError("random ordering")
+            keys.append((term.lstrip("-"), term.startswith("-"), None))
+        elif isinstance(term, OrderBy) and isinstance(term.expression, F):
+            nulls_last = True if term.nulls_last else None
+            if term.nulls_first:
+                nulls_last = False
+            keys.append((term.expression.name, term.descending, nulls_last))
+        else:
+            raise ValueError(f"unsupported ordering {term}")
+    keys = [
+        ("pk" if name == items.model._meta.pk.name else name, descending, nulls)
+        for name, descending, nulls in keys
+    ]
+    if not any(name == "pk" for name, _, _ in keys):
+        keys.append(("pk", False, None))
+    return keys
+
+
+def get_key_ordering(key: Tuple[str, bool, Optional[bool]]) -> OrderBy:
+    name, descending, nulls_last = key
+    if nulls_last is None:
+        # postgres default, nulls are the largest values
+        nulls_last = not descending
+    if descending:
+        return F(name).desc(nulls_last=nulls_last, nulls_first=not nulls_last)
+    return F(name).asc(nulls_last=nulls_last, nulls_first=not nulls_last)
+
+
+def get_keyset_filter(keys, values) -> Q:
+    """Rows after the row with values in the keys ordering"""
+    keyset_filter = Q(pk__in=[])
+    equal = Q()
+    for (name, descending, nulls_last), value in zip(keys, values):
+        if nulls_last is None:
+            nulls_last = not descending
+        if value is None:
+            after = Q(pk__in=[]) if nulls_last else Q(**{f"{name}__isnull": False})
+            same = Q(**{f"{name}__isnull": True})
+        else:
+            after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if nulls_last:
+                after |= Q(**{f"{name}__isnull": True})
+            same = Q(**{name: value})
+        keyset_filter |= equal & after
+        equal &= same
+    return keyset_filter
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts microseconds, keys must be exact
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values: list) -> str:
+    data = json.dumps(values, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError(f"invalid cursor {cursor}") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError(f"cursor {cursor} does not match the ordering")
+    return values
+
 
 def check_tx(tx_hash, network) -> bool:
     while True:
@@ -140,6 +291,9 @@ class PaginateSerializer(serializers.Serializer):
     total = serializers.IntegerField()
     results_per_page = serializers.IntegerField()
     total_pages = serializers.IntegerField()
+    next = serializers.CharField(
+        required=False, help_text="cursor of the next page in cursor pagination"
+    )
 
 
 class AddressField(serializers.CharField):